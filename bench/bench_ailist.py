@@ -0,0 +1,60 @@
+"""
+Benchmark the AIList backend against the Nested Containment List on
+synthetic high-coverage alignments: short reads piled up at a given
+depth, mixed with a fraction of very long (e.g., spliced) alignments.
+
+Long alignments overlapping many reads without containing each other
+defeat the NCLS header scan; the AIList moves them to small components
+of their own.
+
+Usage:
+    PYTHONPATH=src python bench/bench_ailist.py [size] [queries]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalSet
+
+
+def _alignments(size, depth, long_fraction, seed=0, read_length=150):
+    rng = random.Random(seed)
+    span = size * read_length // depth
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        if rng.random() < long_fraction:
+            length = rng.randrange(10000, 100000)
+        else:
+            length = read_length
+        intervals.append(Interval("Chr", beg, beg + length))
+    return intervals, span
+
+
+def main(size=100000, nqueries=5000):
+    print("# size=%d queries=%d" % (size, nqueries))
+    print("depth\tlong\tbackend\tbuild_s\tquery_s\tqueries/s\thits")
+    for depth in (10, 100, 1000):
+        for long_fraction in (0.0, 0.01, 0.1):
+            intervals, span = _alignments(size, depth, long_fraction)
+            rng = random.Random(1)
+            queries = [
+                Interval("Chr", beg, beg + 100)
+                for beg in (rng.randrange(span) for i in range(nqueries))
+            ]
+            for backend in ('ncls', 'ailist'):
+                beg = perf_counter()
+                intervalSet = IntervalSet(intervals, backend=backend)
+                list(intervalSet.overlaps(queries[0]))  # builds the index
+                mid = perf_counter()
+                hits = sum(1 for q in queries for o in intervalSet.overlaps(q))
+                end = perf_counter()
+                print("%d\t%.2f\t%s\t%.3f\t%.3f\t%.0f\t%d" % (
+                    depth, long_fraction, backend, mid - beg, end - mid,
+                    nqueries / (end - mid), hits
+                ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,60 @@
+"""
+Benchmark elementwise interval operations: a loop of BaseInterval
+method calls over pairs of intervals, against the same operations on
+two IntervalArrays.
+
+Usage:
+    PYTHONPATH=src python bench/bench_arrays.py [size]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalArray
+
+
+def _random_intervals(size, span=10000000, length=5000, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def main(size=200000):
+    left = _random_intervals(size, span=100000, seed=0)
+    right = _random_intervals(size, span=100000, seed=1)
+    beg = perf_counter()
+    A, B = IntervalArray(left), IntervalArray(right)
+    end = perf_counter()
+    print("# size=%d convert=%.3f" % (size, end - beg))
+    print("operation\tscalar\tarray")
+    for name, scalar, vector in (
+        ("isoverlapping",
+         lambda: [i.isoverlapping(o) for i, o in zip(left, right)],
+         lambda: A.isoverlapping(B)),
+        ("overlap_length",
+         lambda: [i.overlap_length(o) for i, o in zip(left, right)],
+         lambda: A.overlap_length(B)),
+        ("inner_distance",
+         lambda: [i.inner_distance(o) for i, o in zip(left, right)],
+         lambda: A.inner_distance(B)),
+        ("intersection",
+         lambda: [i & o for i, o in zip(left, right)],
+         lambda: A & B),
+        ("shift",
+         lambda: [i + 100 for i in left],
+         lambda: A + 100),
+    ):
+        times = []
+        for method in (scalar, vector):
+            beg = perf_counter()
+            method()
+            times.append(perf_counter() - beg)
+        print("%s\t%.3f\t%.3f" % (name, times[0], times[1]))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,100 @@
+"""
+Benchmark event-loop latency of IntervalSet.aoverlaps() under concurrent
+asyncio clients, against calling the synchronous overlaps() in the loop.
+
+Each client streams its queries from an async generator and drains the
+hits; a ticker task measures how late the event loop wakes it up, which
+is the latency any other client or socket would observe.
+
+Usage:
+    PYTHONPATH=src python bench/bench_async.py [size] [queries] [clients]
+"""
+
+import sys
+import random
+import asyncio
+
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from intervals import Interval, IntervalSet
+
+
+def _random_intervals(size, span=10000000, length=5000, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+async def _source(queries):
+    for i, query in enumerate(queries):
+        if not i % 100:
+            await asyncio.sleep(0)
+        yield query
+
+
+async def _client_sync(intervalSet, queries):
+    hits = 0
+    async for query in _source(queries):
+        hits += sum(1 for o in intervalSet.overlaps(query))
+    return hits
+
+
+async def _client_async(intervalSet, queries, executor=None):
+    hits = 0
+    async for o in intervalSet.aoverlaps(_source(queries), executor=executor):
+        hits += 1
+    return hits
+
+
+async def _ticker(lags, done, period=0.001):
+    loop = asyncio.get_running_loop()
+    while not done.is_set():
+        beg = loop.time()
+        await asyncio.sleep(period)
+        lags.append(loop.time() - beg - period)
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+async def _run(client, intervalSet, chunks, *args):
+    lags = []
+    done = asyncio.Event()
+    ticker = asyncio.ensure_future(_ticker(lags, done))
+    beg = perf_counter()
+    await asyncio.gather(*(client(intervalSet, c, *args) for c in chunks))
+    end = perf_counter()
+    done.set()
+    await ticker
+    return end - beg, lags
+
+
+def main(size=100000, nqueries=20000, clients=8):
+    intervalSet = IntervalSet(_random_intervals(size))
+    queries = _random_intervals(nqueries, seed=1)
+    chunks = [queries[i::clients] for i in range(clients)]
+    print("# size=%d queries=%d clients=%d" % (size, nqueries, clients))
+    print("mode\tseconds\tqueries/s\tlag_p50_ms\tlag_p99_ms\tlag_max_ms")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        modes = [
+            ("overlaps", _client_sync, ()),
+            ("aoverlaps", _client_async, ()),
+            ("aoverlaps+executor", _client_async, (executor,)),
+        ]
+        for name, client, args in modes:
+            seconds, lags = asyncio.run(_run(client, intervalSet, chunks, *args))
+            print("%s\t%.3f\t%.0f\t%.3f\t%.3f\t%.3f" % (
+                name, seconds, nqueries / seconds,
+                1000 * _percentile(lags, 0.5),
+                1000 * _percentile(lags, 0.99),
+                1000 * max(lags or [0.0])
+            ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""
+Benchmark the IntervalList backends on a workload of interleaved
+insort()s, remove()s and overlap queries: the 'deque' backend moves
+O(n) members per insert or removal, and the 'blocked' backend
+(BlockedIntervalList) those of one block.
+
+Usage:
+    PYTHONPATH=src python bench/bench_blocked.py [size] [operations]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalList
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _run(intervalList, inserts, queries):
+    hits = 0
+    for interval, query in zip(inserts, queries):
+        intervalList.insort(interval)
+        hits += len(list(intervalList.find_overlap_index_range(query)))
+    for interval in inserts[::2]:
+        intervalList.remove(interval)
+    return hits
+
+
+def main(size=1000000, operations=2000):
+    intervals = _random_intervals(size)
+    inserts = _random_intervals(operations, seed=1)
+    queries = _random_intervals(operations, seed=2)
+    print("# size=%d operations=%d" % (size, operations))
+    print("backend\tbuild\tseconds\thits")
+    for backend in ('deque', 'blocked'):
+        beg = perf_counter()
+        intervalList = IntervalList(intervals, backend=backend)
+        build = perf_counter() - beg
+        beg = perf_counter()
+        hits = _run(intervalList, inserts, queries)
+        end = perf_counter()
+        print("%s\t%.3f\t%.3f\t%d" % (backend, build, end - beg, hits))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
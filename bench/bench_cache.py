@@ -0,0 +1,66 @@
+"""
+Benchmark the QueryCache of IntervalSet and IntervalList on a 
+genome-browser-like workload: overlap queries drawn from a small set
+of popular regions, with an occasional insort() that invalidates the 
+cached results, with and without a cache.
+
+Usage:
+    PYTHONPATH=src python bench/bench_cache.py [size] [queries] [regions]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalList, IntervalSet, QueryCache
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _run(collection, queries, inserts):
+    search = collection.overlaps \
+        if   isinstance(collection, IntervalSet) \
+        else collection.find_overlaps
+    hits = 0
+    for i, query in enumerate(queries):
+        if i % 1000 == 999:
+            collection.insort(inserts[i // 1000])
+        hits += len(list(search(query)))
+    return hits
+
+
+def main(size=200000, queries=20000, regions=100):
+    intervals = _random_intervals(size)
+    rng = random.Random(1)
+    popular = _random_intervals(regions, length=100000, seed=2)
+    # a few regions are much more popular than the others:
+    queries = [
+        popular[min(int(rng.paretovariate(1.2)) - 1, regions - 1)]
+        for i in range(queries)
+    ]
+    inserts = _random_intervals(len(queries) // 1000 + 1, seed=3)
+    print("# size=%d queries=%d regions=%d" % (size, len(queries), regions))
+    print("collection\tcache\tseconds\thits\thit_rate")
+    for cls in (IntervalSet, IntervalList):
+        for cache in (None, QueryCache(maxsize=64)):
+            collection = cls(intervals)
+            collection.set_cache(cache)
+            beg = perf_counter()
+            hits = _run(collection, queries, inserts)
+            end = perf_counter()
+            info = collection.cache_info()
+            rate = info['hits'] / (info['hits'] + info['misses']) if info else 0
+            print("%s\t%s\t%.3f\t%d\t%.3f" % (
+                cls.__name__, cache is not None, end - beg, hits, rate
+            ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
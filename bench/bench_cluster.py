@@ -0,0 +1,47 @@
+"""
+Benchmark cluster labeling: merge() followed by one overlaps() search
+per member to find its merged interval, against a single cluster()
+pass.
+
+Usage:
+    PYTHONPATH=src python bench/bench_cluster.py [size]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalSet
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _merge_labels(intervalSet):
+    merged = intervalSet.merge()
+    index = dict((id(m), i) for i, m in enumerate(merged))
+    return [index[id(next(merged.overlaps(i)))] for i in intervalSet]
+
+
+def main(size=100000):
+    intervalSet = IntervalSet(_random_intervals(size))
+    print("# size=%d" % size)
+    print("method\tseconds\tclusters")
+    for name, method in (
+        ("merge", lambda: _merge_labels(intervalSet)),
+        ("cluster", lambda: intervalSet.cluster()),
+    ):
+        beg = perf_counter()
+        labels = method()
+        end = perf_counter()
+        print("%s\t%.3f\t%d" % (name, end - beg, len(set(labels))))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
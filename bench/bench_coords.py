@@ -0,0 +1,56 @@
+"""
+Benchmark integer coordinate mode: the total memory of an IntervalSet
+(see `memory_usage()`), with the search index of each backend built,
+in bytes per interval, the time of overlaps() queries, and the time of
+rounds of one insort() and one query, with generic coordinates and
+with the 'int64' and 'int32' typed coordinate columns.
+
+Usage:
+    PYTHONPATH=src python bench/bench_coords.py [size] [queries] [rounds]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalSet
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def main(size=100000, queries=10000, rounds=20):
+    intervals = _random_intervals(size)
+    queryList = _random_intervals(queries, length=1000, seed=1)
+    updates = _random_intervals(rounds, seed=2)
+    print("# size=%d queries=%d rounds=%d" % (size, queries, rounds))
+    print("backend\tcoords\tbytes/interval\tseconds\thits\tupdate_seconds")
+    for backend in ('ncls', 'tree', 'ailist'):
+        for coords in (None, 'int64', 'int32'):
+            intervalSet = IntervalSet(intervals, backend=backend, coords=coords)
+            # the first query builds any index
+            hits = sum(1 for i in intervalSet.overlaps(queryList[0]))
+            memory = intervalSet.memory_usage()['total']
+            beg = perf_counter()
+            hits = sum(1 for query in queryList for i in intervalSet.overlaps(query))
+            end = perf_counter()
+            # rounds of one update and one query
+            update_beg = perf_counter()
+            for interval, query in zip(updates, queryList):
+                intervalSet.insort(interval)
+                sum(1 for i in intervalSet.overlaps(query))
+            update_end = perf_counter()
+            print("%s\t%s\t%.1f\t%.3f\t%d\t%.3f" % (
+                backend, coords or 'generic', memory / size, end - beg, hits,
+                update_end - update_beg
+            ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
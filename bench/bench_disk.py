@@ -0,0 +1,78 @@
+"""
+Benchmark DiskIntervalSet: building the NCLS of a sorted stream of 
+intervals on disk, and searching it through memory maps, against
+building and searching an IntervalSet in memory. The stream is never
+held in memory by the on-disk build; peak resident memory is reported
+after each stage.
+
+Usage:
+    PYTHONPATH=src python bench/bench_disk.py [size] [queries]
+"""
+
+import sys
+import random
+import resource
+
+from time import perf_counter
+from tempfile import mkdtemp
+from shutil import rmtree
+from intervals import Interval, IntervalSet, DiskIntervalSet
+
+
+def _sorted_intervals(size, length=200, seed=0):
+    # Yield intervals sorted by beg, without holding them in memory
+    rng = random.Random(seed)
+    beg = 0
+    for i in range(size):
+        beg += rng.randrange(10)
+        yield Interval("Chr", beg, beg + rng.randrange(1, length))
+
+
+def _random_queries(size, span, length=200, seed=1):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _maxrss():
+    # peak resident memory, in MiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(ncls, queries):
+    hits = 0
+    for query in queries:
+        hits += len(list(ncls.overlaps(query)))
+    return hits
+
+
+def main(size=1000000, queries=10000):
+    queries = _random_queries(queries, size * 5)
+    print("# size=%d queries=%d" % (size, len(queries)))
+    print("method\tbuild\tseconds\thits\tmaxrss_mib")
+    path = mkdtemp()
+    try:
+        beg = perf_counter()
+        ncls = DiskIntervalSet.from_sorted(_sorted_intervals(size), path)
+        build = perf_counter() - beg
+        beg = perf_counter()
+        hits = _run(ncls, queries)
+        end = perf_counter()
+        print("disk\t%.3f\t%.3f\t%d\t%.1f" % (build, end - beg, hits, _maxrss()))
+        ncls.close()
+    finally:
+        rmtree(path)
+    beg = perf_counter()
+    ncls = IntervalSet(list(_sorted_intervals(size)))
+    build = perf_counter() - beg
+    beg = perf_counter()
+    hits = _run(ncls, queries)
+    end = perf_counter()
+    print("memory\t%.3f\t%.3f\t%d\t%.1f" % (build, end - beg, hits, _maxrss()))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,51 @@
+"""
+Benchmark memory use: the bytes per interval allocated to build each
+collection type, measured with tracemalloc, at several sizes, next to
+the total reported by memory_usage(). The intervals themselves are
+created before measuring, so they are not included in either figure.
+
+Usage:
+    PYTHONPATH=src python bench/bench_memory.py [size ...]
+"""
+
+import sys
+import random
+import tracemalloc
+
+from intervals import Interval, IntervalList, IntervalSet
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def main(*sizes):
+    sizes = sizes or (1000, 10000, 100000)
+    print("collection\tsize\ttraced bytes/interval\treported bytes/interval")
+    for size in sizes:
+        intervals = _random_intervals(size)
+        for name, build in (
+            ("IntervalList", lambda: IntervalList(intervals)),
+            ("IntervalList(int64)", lambda: IntervalList(intervals, coords='int64')),
+            ("IntervalSet", lambda: IntervalSet(intervals)),
+            ("IntervalSet(tree)", lambda: IntervalSet(intervals, backend='tree')),
+            ("IntervalSet(int64)", lambda: IntervalSet(intervals, coords='int64')),
+        ):
+            tracemalloc.start()
+            collection = build()
+            if isinstance(collection, IntervalSet):
+                list(collection.overlaps(intervals[0]))  # build the index
+            traced = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            reported = collection.memory_usage(deep=False)['total']
+            print("%s\t%d\t%.1f\t%.1f" % (name, size, traced / size, reported / size))
+            del collection
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,47 @@
+"""
+Benchmark IntervalList.merge_sorted(): a k-way merge of many sorted
+IntervalLists, against building an IntervalList from their 
+concatenation, which sorts all the members again.
+
+Usage:
+    PYTHONPATH=src python bench/bench_merge_sorted.py [size] [lists ...]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalList
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def main(size=1000000, *counts):
+    counts = counts or (10, 100, 500)
+    print("# size=%d" % size)
+    print("lists\tmethod\tseconds")
+    for count in counts:
+        lists = [
+            IntervalList(_random_intervals(size // count, seed=seed))
+            for seed in range(count)
+        ]
+        for name, method in (
+            ("merge_sorted", lambda: IntervalList.merge_sorted(*lists)),
+            ("unique", lambda: IntervalList.merge_sorted(*lists, unique=True)),
+            ("concatenate", lambda: IntervalList([i for L in lists for i in L])),
+        ):
+            beg = perf_counter()
+            method()
+            end = perf_counter()
+            print("%d\t%s\t%.3f" % (count, name, end - beg))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,56 @@
+"""
+Benchmark IntervalList overlap searches among nested members: a few 
+long intervals enclosing many short ones, searched through the running
+max end index, against IntervalSet, followed by a series of insort()
+and remove() calls that update the index in place.
+
+Usage:
+    PYTHONPATH=src python bench/bench_nested.py [size] [queries]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalList, IntervalSet
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def main(size=100000, queries=10000):
+    intervals = _random_intervals(size) + \
+        _random_intervals(size // 1000, length=1000000, seed=2)
+    queryList = _random_intervals(queries, length=1000, seed=1)
+    print("# size=%d queries=%d" % (len(intervals), queries))
+    print("collection\tseconds\thits")
+    for name, collection, search in (
+        ("IntervalList", IntervalList(intervals), "find_overlaps"),
+        ("IntervalSet", IntervalSet(intervals), "overlaps"),
+    ):
+        search = getattr(collection, search)
+        beg = perf_counter()
+        hits = sum(1 for query in queryList for i in search(query))
+        end = perf_counter()
+        print("%s\t%.3f\t%d" % (name, end - beg, hits))
+
+    intervalList = IntervalList(intervals)
+    intervalList.find_index_beg(queryList[0])  # build the index
+    updates = _random_intervals(1000, length=100000, seed=3)
+    beg = perf_counter()
+    for interval in updates:
+        intervalList.insort(interval)
+    for interval in updates:
+        intervalList.remove(interval)
+    end = perf_counter()
+    print("# insort+remove x%d\t%.3f" % (len(updates), end - beg))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,88 @@
+"""
+Benchmark the strategies of intersect() on operands of various sizes,
+kinds and sortedness, and check the planner's choice against the 
+fastest: 'search a' and 'search b' binary search one operand per member
+of the other, and 'sweep' sweeps both in order of beg. Each row reports
+the estimated cost (in microseconds) and the time of every strategy,
+the choice, and its slowdown over the fastest.
+
+Usage:
+    PYTHONPATH=src python bench/bench_planner.py [size] [seed]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalList, IntervalSet, IntervalBinIndex
+from intervals.planner import _Plan
+
+_STRATEGIES = ('search a', 'search b', 'sweep')
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _operand(kind, size, seed):
+    intervals = _random_intervals(size, length=200 if kind != 'nested' else 20000, seed=seed)
+    if kind == 'list':
+        return IntervalList(intervals)
+    if kind in ('set', 'nested'):
+        return IntervalSet(intervals)
+    if kind == 'bins':
+        return IntervalBinIndex(intervals)
+    if kind == 'sorted':
+        intervals.sort(key=lambda i: i.beg)
+    return intervals
+
+
+def _time(a, b, strategy):
+    plan = _Plan(a, b)
+    plan.choice = strategy
+    beg = perf_counter()
+    pairs = sum(1 for pair in plan.execute())
+    return perf_counter() - beg, pairs
+
+
+def main(size=100000, seed=0):
+    cases = [
+        (kind_a, size_a, kind_b, size_b)
+        for kind_a in ('list', 'set', 'nested', 'bins', 'sorted')
+        for kind_b in ('unsorted', 'list')
+        for size_a, size_b in (
+            (size, 10), (size, size // 100), (size, size // 10), (size, size),
+            (size // 100, size), (10, size)
+        )
+    ]
+    print("# size=%d seed=%d" % (size, seed))
+    print("a\tb\t%s\t%s\tchoice\tslowdown\tpairs" % (
+        '\t'.join('cost(%s)' % s for s in _STRATEGIES),
+        '\t'.join('time(%s)' % s for s in _STRATEGIES)
+    ))
+    worst = 1.0
+    for kind_a, size_a, kind_b, size_b in cases:
+        a = _operand(kind_a, size_a, seed)
+        b = _operand(kind_b, size_b, seed + 1)
+        plan = _Plan(a, b)
+        times = {}
+        for strategy in _STRATEGIES:
+            times[strategy], pairs = _time(a, b, strategy)
+        slowdown = times[plan.choice] / min(times.values())
+        worst = max(worst, slowdown)
+        print("%s[%d]\t%s[%d]\t%s\t%s\t%s\t%.2f\t%d" % (
+            kind_a, size_a, kind_b, size_b,
+            '\t'.join('%.0f' % plan.costs[s] for s in _STRATEGIES),
+            '\t'.join('%.0f' % (1e6 * times[s]) for s in _STRATEGIES),
+            plan.choice, slowdown, pairs
+        ))
+    print("# worst slowdown of the choice: %.2f" % worst)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""
+Benchmark ConcurrentIntervalSet.overlaps() read throughput while a
+writer thread keeps inserting and removing intervals.
+
+Readers search the last published snapshot without taking the lock, so
+their throughput should hold up with a busy writer; only the writer
+serializes on the lock and pays for publishing a new snapshot.
+
+Usage:
+    PYTHONPATH=src python bench/bench_rwlock.py [size] [queries]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
+from intervals import Interval, ConcurrentIntervalSet
+
+
+def _random_intervals(size, span=10000000, length=5000, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _count_overlaps(intervalSet, queries):
+    return sum(1 for q in queries for o in intervalSet.overlaps(q))
+
+
+def _writer(intervalSet, intervals, done, counts):
+    updates = 0
+    while not done.is_set():
+        for interval in intervals:
+            intervalSet.insort(interval)
+            intervalSet.remove(interval)
+            updates += 2
+            if done.is_set():
+                break
+    counts.append(updates)
+
+
+def main(size=100000, nqueries=20000, threads=4):
+    intervalSet = ConcurrentIntervalSet(_random_intervals(size))
+    queries = _random_intervals(nqueries, seed=1)
+    updates = _random_intervals(1000, seed=2)
+    chunks = [queries[i::threads] for i in range(threads)]
+    print("# size=%d queries=%d threads=%d" % (size, nqueries, threads))
+    print("writer\tseconds\tqueries/s\tupdates/s")
+    for writing in (False, True):
+        done = Event()
+        counts = []
+        writer = Thread(target=_writer, args=(intervalSet, updates, done, counts))
+        if writing:
+            writer.start()
+        beg = perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            sum(executor.map(
+                lambda chunk: _count_overlaps(intervalSet, chunk), chunks
+            ))
+        end = perf_counter()
+        done.set()
+        if writing:
+            writer.join()
+        print("%s\t%.3f\t%.0f\t%.0f" % (
+            writing, end - beg, nqueries / (end - beg),
+            sum(counts) / (end - beg)
+        ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,48 @@
+"""
+Benchmark external_sort(): sorting a stream of intervals in chunks 
+of a memory budget, spilled to temporary files as sorted runs and 
+merged, against sorting them all in memory with `sorted()`.
+
+Usage:
+    PYTHONPATH=src python bench/bench_sort.py [size] [workers]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, external_sort
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _sort_key(interval):
+    return (interval.namespace, interval.isempty(), interval.beg, interval.end)
+
+
+def main(size=1000000, workers=4):
+    intervals = _random_intervals(size)
+    print("# size=%d" % size)
+    print("method\tmemory\tworkers\tseconds")
+    beg = perf_counter()
+    sorted(intervals, key=_sort_key)
+    end = perf_counter()
+    print("sorted\t-\t-\t%.3f" % (end - beg))
+    for memory in (2**30, 2**24, 2**22):
+        for n in sorted(set((1, workers))):
+            beg = perf_counter()
+            for interval in external_sort(intervals, memory=memory, workers=n):
+                pass
+            end = perf_counter()
+            print("external_sort\t%d\t%d\t%.3f" % (memory, n, end - beg))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
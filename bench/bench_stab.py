@@ -0,0 +1,52 @@
+"""
+Benchmark stabbing (point) queries, e.g., annotating variant positions:
+one overlaps() call per Point, one stab() call per position, and a 
+single stab_many() sweep over all positions.
+
+Usage:
+    PYTHONPATH=src python bench/bench_stab.py [size] [positions]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, Point, IntervalSet
+
+
+def _random_intervals(size, span=10000000, length=5000, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def main(size=100000, npositions=200000, span=10000000):
+    intervalSet = IntervalSet(_random_intervals(size, span))
+    rng = random.Random(1)
+    positions = [rng.randrange(1, span) for i in range(npositions)]
+    print("# size=%d positions=%d" % (size, npositions))
+    print("method\tseconds\tpositions/s\thits")
+    methods = (
+        ("overlaps", lambda: sum(
+            1 for p in positions for o in intervalSet.overlaps(Point("Chr", p))
+        )),
+        ("stab", lambda: sum(
+            1 for p in positions for o in intervalSet.stab(p)
+        )),
+        ("stab_many", lambda: intervalSet.stab_many(positions)[0][-1]),
+        ("stab_many(sorted)", lambda: intervalSet.stab_many(sorted(positions))[0][-1]),
+    )
+    for name, method in methods:
+        beg = perf_counter()
+        hits = method()
+        end = perf_counter()
+        print("%s\t%.3f\t%.0f\t%d" % (
+            name, end - beg, npositions / (end - beg), hits
+        ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
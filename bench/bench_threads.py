@@ -0,0 +1,61 @@
+"""
+Benchmark concurrent IntervalSet.overlaps() queries from a thread pool.
+
+Queries keep their search cursors in per-query state, so one IntervalSet
+may be shared by any number of threads. Under a free-threaded CPython
+build (e.g., python3.13t with PYTHON_GIL=0), throughput should scale
+with the number of threads; with the GIL, it should stay flat.
+
+Usage:
+    PYTHONPATH=src python bench/bench_threads.py [size] [queries]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from intervals import Interval, IntervalSet
+
+
+def _gil_enabled():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def _random_intervals(size, span=10000000, length=5000, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _count_overlaps(intervalSet, queries):
+    return sum(1 for q in queries for o in intervalSet.overlaps(q))
+
+
+def main(size=100000, nqueries=20000):
+    intervalSet = IntervalSet(_random_intervals(size))
+    queries = _random_intervals(nqueries, seed=1)
+    print("# size=%d queries=%d gil=%s" % (size, nqueries, _gil_enabled()))
+    print("threads\tseconds\tqueries/s\tspeedup")
+    baseline = None
+    for threads in (1, 2, 4, 8):
+        chunks = [queries[i::threads] for i in range(threads)]
+        beg = perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            hits = sum(executor.map(
+                lambda chunk: _count_overlaps(intervalSet, chunk), chunks
+            ))
+        end = perf_counter()
+        if baseline is None:
+            baseline = end - beg
+        print("%d\t%.3f\t%.0f\t%.2f" % (
+            threads, end - beg, nqueries / (end - beg), baseline / (end - beg)
+        ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
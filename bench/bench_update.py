@@ -0,0 +1,51 @@
+"""
+Benchmark IntervalList.update(): a batch of intervals merged into a 
+sorted IntervalList in a single pass, against insort()ing the sorted
+batch one interval at a time, for several batch sizes.
+
+Usage:
+    PYTHONPATH=src python bench/bench_update.py [size] [batch ...]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalList
+from intervals.collections import _interval_pos
+
+
+def _random_intervals(size, span=10000000, length=200, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _insort_all(intervalList, batch):
+    for interval in sorted(batch, key=_interval_pos):
+        intervalList.insort(interval)
+
+
+def main(size=1000000, *batches):
+    batches = batches or (10, 100, 1000, 10000)
+    intervals = _random_intervals(size)
+    print("# size=%d" % size)
+    print("batch\tmethod\tseconds")
+    for batch in batches:
+        batch = _random_intervals(batch, seed=batch)
+        for name, method in (
+            ("update", lambda L: L.update(batch)),
+            ("insort", lambda L: _insort_all(L, batch)),
+        ):
+            intervalList = IntervalList(intervals)
+            beg = perf_counter()
+            method(intervalList)
+            end = perf_counter()
+            print("%d\t%s\t%.3f" % (len(batch), name, end - beg))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,47 @@
+"""
+Benchmark per-window feature counts: one overlaps() search per window
+of make_windows(), against a single window_counts() sweep.
+
+Usage:
+    PYTHONPATH=src python bench/bench_windows.py [size] [window]
+"""
+
+import sys
+import random
+
+from time import perf_counter
+from intervals import Interval, IntervalSet
+
+
+def _random_intervals(size, span=10000000, length=5000, seed=0):
+    rng = random.Random(seed)
+    intervals = []
+    for i in range(size):
+        beg = rng.randrange(span)
+        intervals.append(Interval("Chr", beg, beg + rng.randrange(1, length)))
+    return intervals
+
+
+def _overlaps_counts(intervalSet, window):
+    return [
+        sum(1 for o in intervalSet.overlaps(w))
+        for w in intervalSet.make_windows(window)
+    ]
+
+
+def main(size=100000, window=1000):
+    intervalSet = IntervalSet(_random_intervals(size))
+    print("# size=%d window=%d" % (size, window))
+    print("method\tseconds\twindows\thits")
+    for name, method in (
+        ("overlaps", lambda: _overlaps_counts(intervalSet, window)),
+        ("window_counts", lambda: intervalSet.window_counts(window)[1]),
+    ):
+        beg = perf_counter()
+        counts = method()
+        end = perf_counter()
+        print("%s\t%.3f\t%d\t%d" % (name, end - beg, len(counts), sum(counts)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
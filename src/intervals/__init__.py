@@ -2,4 +2,7 @@
 from .constants import *
 from .intervals import *
 from .collections import *
-
+from .arrays import *
+from .sort import *
+from .disk import *
+from .planner import *
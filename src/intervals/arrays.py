@@ -0,0 +1,934 @@
+"""
+Module for vectorized arrays of intervals
+
+An IntervalArray stores intervals column-wise, as an array of
+namespace codes (indexing a table of namespaces) and arrays of beg and
+end coordinates, and applies the BaseInterval algebra elementwise
+without creating an interval object per element.
+
+Performance Notes:
+ 1. Coordinates are stored in array.array('d') columns, so that null
+    (nan) coordinates have the same semantics as in BaseInterval.
+    Integer coordinates are exact up to 2**53.
+ 2. Operations are single passes over the columns (zip() of arrays),
+    avoiding the method dispatch and copy.copy() of one interval
+    object per element and operation.
+
+"""
+
+from array import array as _array
+from itertools import compress as _compress
+from itertools import repeat as _repeat
+from operator import add as _add
+from operator import sub as _sub
+from operator import mul as _mul
+from operator import truediv as _truediv
+from operator import mod as _mod
+from math import isnan as _isnull
+from math import isinf as _isinf
+from math import isfinite as _isfinite
+from math import ceil as _ceil
+from math import floor as _floor
+from .constants import NULL_NAMESPACE as _NULL_NS
+from .constants import NULL_BEG as _NULL_BEG
+from .constants import NULL_END as _NULL_END
+from .constants import inf as _INF
+from .intervals import _bad_operand_type, _bad_operand_name
+from .intervals import _0s, _1s, _0div, _int
+from .intervals import _floor as _floordiv
+from .intervals import BaseInterval, LeftClosedInterval, Interval
+from .collections import IntervalList, IntervalSet
+
+_bad_operand_size = \
+    "operands could not be broadcast together with lengths {0:d} and {1:d}".format
+
+
+def _lshift(x, y):
+    return int(x) << int(y)
+
+
+def _rshift(x, y):
+    return int(x) >> int(y)
+
+
+def _number(x):
+    # Return integer-valued coordinates as int, as they were set.
+    return int(x) if _isfinite(x) and x.is_integer() else x
+
+
+def _mid(beg, end):
+    # Same as BaseInterval.mid
+    return _NULL_BEG if not (beg <= end) else float(beg + end) / 2
+
+
+def _strict_mid(beg, end):
+    # Same as Interval.mid
+    return _floordiv(beg + end, 2)
+
+
+def _semantics(cls):
+    # Return the (half-open, strictly-empty) flags of an interval class:
+    # whether overlaps exclude the end (LeftClosedInterval), and whether
+    # beg == end is empty (Interval).
+    return (issubclass(cls, LeftClosedInterval), issubclass(cls, Interval))
+
+
+def _isempty(beg, end, strict):
+    return not (beg < end) if strict else not (beg <= end)
+
+
+def _isoverlapping(sb, se, ob, oe, half):
+    return (ob < se and sb < oe) if half else (ob <= se and sb <= oe)
+
+
+def _issuperinterval(sb, se, ob, oe, half):
+    return (sb <= ob < oe <= se) if half else (sb <= ob <= oe <= se)
+
+
+def _isabutting(sb, se, ob, oe):
+    return ((se == ob and ob < oe and sb < oe) or
+            (oe == sb and ob < oe and sb < se))
+
+
+def _isoverlapping_beg(sb, se, ob, oe, half):
+    return (sb <= ob < se < oe) if half else (sb <= ob <= se <= oe)
+
+
+def _isoverlapping_end(sb, se, ob, oe, half):
+    return (ob < sb < oe <= se) if half else (ob <= sb <= oe <= se)
+
+
+def _difference(sb, se, ob, oe, same, sstrict, ohalf, ostrict):
+    # Same as BaseInterval.difference() for one pair of elements, with
+    # the predicates evaluated on the `other` side. Return a list of
+    # (beg, end) results, where None is a null result.
+    if _isempty(sb, se, sstrict) or _isempty(ob, oe, ostrict) or not same:
+        return [(sb, se)]
+    if _issuperinterval(ob, oe, sb, se, ohalf):
+        return [None]
+    if _isoverlapping_beg(ob, oe, sb, se, ohalf):
+        return [(oe, se)]
+    if _isoverlapping_end(ob, oe, sb, se, ohalf):
+        return [(sb, ob)]
+    if _issuperinterval(sb, se, ob, oe, ohalf):
+        return [(sb, ob), (oe, se)]
+    return [(sb, se)]
+
+
+
+class IntervalArray(object):
+    """
+    Class for a vectorized array of intervals of the same class, with
+    the elementwise operations of BaseInterval.
+
+    Construct from any iterable of intervals, including IntervalList
+    and IntervalSet objects:
+
+    >>> A = IntervalArray([Interval("Chr", 10, 50), Interval("Chr", 40, 80)])
+    >>> A.overlap_length(Interval("Chr", 30, 60)).tolist()
+    [20.0, 20.0]
+
+    Binary operations broadcast a single interval, a number, or an
+    IntervalArray of length one against every element, or pair the
+    elements of two IntervalArrays of the same length. Use `product()`
+    to pair every element of one array with every element of another.
+
+    Predicates return array('b') masks, measures return array('d')
+    values, and interval-valued operations return IntervalArrays (or
+    2-tuples of IntervalArrays, where the BaseInterval method returns
+    2-tuples for some inputs). Null and empty elements follow the same
+    (nan) semantics as BaseInterval, and the overlap and emptiness
+    tests of the array's interval class `cls`, which is used for the
+    left-side operand.
+
+    Namespaces must be hashable.
+    """
+    def __init__(self, intervals=[], cls=Interval):
+        self.cls = cls
+        self.namespaces = []  # code -> namespace
+        self.codes = _array('q')
+        self.begs = _array('d')
+        self.ends = _array('d')
+        self._codes = {}  # namespace -> code
+        self._half, self._strict = _semantics(cls)
+        self.extend(intervals)
+
+
+    @classmethod
+    def from_arrays(cls, namespaces, begs, ends, interval_cls=Interval):
+        """
+        IntervalArray.from_arrays(namespaces, begs, ends) -> IntervalArray
+
+        Construct an IntervalArray from parallel iterables of namespaces,
+        beg and end coordinates.
+
+        >>> A = IntervalArray.from_arrays(["Chr", "Chr"], [0, 10], [5, 20])
+        >>> list(A)
+        [Interval(Chr:0-5), Interval(Chr:10-20)]
+        """
+        self = cls(cls=interval_cls)
+        self.codes.extend(map(self._code, namespaces))
+        self.begs.extend(begs)
+        self.ends.extend(ends)
+        if self._strict:
+            self.begs = _array('d', map(_int, self.begs))
+            self.ends = _array('d', map(_int, self.ends))
+        if not (len(self.codes) == len(self.begs) == len(self.ends)):
+            raise ValueError("namespaces, begs and ends differ in length")
+        return self
+
+
+    def _code(self, namespace):
+        try:
+            return self._codes[namespace]
+        except KeyError:
+            code = self._codes[namespace] = len(self.namespaces)
+            self.namespaces.append(namespace)
+            return code
+
+
+    def _table(self, namespaces):
+        # Return self or, if some namespaces are not in its table, a copy
+        # of self sharing its columns, with a copy of the table to which
+        # they are added, so that queries never change self.
+        if all(ns in self._codes for ns in namespaces):
+            return self
+        table = self.__class__(cls=self.cls)
+        table.namespaces = list(self.namespaces)
+        table._codes = dict(self._codes)
+        table.codes = self.codes
+        table.begs = self.begs
+        table.ends = self.ends
+        for ns in namespaces:
+            table._code(ns)
+        return table
+
+
+    def _new(self, codes, begs, ends):
+        # Return a new IntervalArray sharing a copy of self's namespace
+        # table, with coordinates set as by the class's setters.
+        new = self.__class__(cls=self.cls)
+        new.namespaces = list(self.namespaces)
+        new._codes = dict(self._codes)
+        new.codes = _array('q', codes)
+        new.begs = _array('d', map(_int, begs) if new._strict else begs)
+        new.ends = _array('d', map(_int, ends) if new._strict else ends)
+        return new
+
+
+    def _make(self, code, beg, end):
+        interval = self.cls.__new__(self.cls)
+        BaseInterval.__init__(
+            interval, _number(beg), _number(end), self.namespaces[code]
+        )
+        return interval
+
+
+    def __len__(self):
+        return len(self.begs)
+
+
+    def __iter__(self):
+        return map(self._make, self.codes, self.begs, self.ends)
+
+
+    def __getitem__(self, index):
+        """
+        self[index] -> Interval
+        self[slice] -> IntervalArray
+        """
+        if isinstance(index, slice):
+            return self._new(self.codes[index], self.begs[index], self.ends[index])
+        return self._make(self.codes[index], self.begs[index], self.ends[index])
+
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, list(self))
+
+
+    def append(self, interval):
+        """Append an interval to the end of the array."""
+        self.codes.append(self._code(interval.namespace))
+        self.begs.append(interval.beg)
+        self.ends.append(interval.end)
+
+
+    def extend(self, intervals):
+        """Append each interval of an iterable to the end of the array."""
+        for interval in intervals:
+            self.append(interval)
+
+
+    def compress(self, selectors):
+        """
+        self.compress(selectors) -> IntervalArray
+
+        Return the elements for which the corresponding selector (e.g.,
+        a mask returned by a predicate method) is true.
+        """
+        selectors = list(selectors)
+        return self._new(
+            _compress(self.codes, selectors),
+            _compress(self.begs, selectors),
+            _compress(self.ends, selectors)
+        )
+
+
+    def product(self, other):
+        """
+        self.product(other) -> 2-tuple of IntervalArrays
+
+        Return the pairs of the cartesian product of self and other, as
+        two IntervalArrays of the same length, len(self) * len(other),
+        for pairwise operations.
+
+        >>> A = IntervalArray([Interval("Chr", 0, 10), Interval("Chr", 20, 30)])
+        >>> L, R = A.product(A)
+        >>> L.isoverlapping(R).tolist()
+        [1, 0, 0, 1]
+        """
+        n, m = len(self), len(other)
+        left = self._new(
+            (c for c in self.codes for i in range(m)),
+            (b for b in self.begs for i in range(m)),
+            (e for e in self.ends for i in range(m))
+        )
+        right = other._new(other.codes * n, other.begs * n, other.ends * n)
+        return (left, right)
+
+
+    def to_list(self):
+        """Return the elements as a list of `cls` intervals."""
+        return list(self)
+
+
+    def to_interval_list(self):
+        """Return the elements as an IntervalList."""
+        return IntervalList(list(self))
+
+
+    def to_interval_set(self, backend='ncls'):
+        """Return the elements as an IntervalSet."""
+        return IntervalSet(list(self), backend=backend)
+
+
+    # Broadcasting:
+    def _broadcast(self, other, op):
+        # Return (left, codes, begs, ends, half, strict), where left is
+        # self, repeated if of length one, and the columns of other are
+        # aligned with left, with codes translated into left's table. 
+        # The table also holds the null namespace, of null results.
+        left = self
+        if isinstance(other, BaseInterval):
+            n = len(left)
+            left = self._table((other.namespace, _NULL_NS))
+            code = left._code(other.namespace)
+            half, strict = _semantics(other.__class__)
+            return (left, _repeat(code, n), _repeat(other.beg, n),
+                    _repeat(other.end, n), half, strict)
+        if not isinstance(other, IntervalArray):
+            raise TypeError(_bad_operand_type(op, type(self), type(other)))
+        n, m = len(self), len(other)
+        if n == 1 and m != 1:
+            left = self._new(self.codes * m, self.begs * m, self.ends * m)
+            n = m
+        left = left._table(other.namespaces + [_NULL_NS])
+        table = [left._code(ns) for ns in other.namespaces]
+        if m == n:
+            return (left, (table[c] for c in other.codes), other.begs,
+                    other.ends, other._half, other._strict)
+        if m == 1:
+            return (left, _repeat(table[other.codes[0]], n),
+                    _repeat(other.begs[0], n), _repeat(other.ends[0], n),
+                    other._half, other._strict)
+        raise ValueError(_bad_operand_size(n, m))
+
+
+    def _values(self, other, op, i):
+        # Return the (beg, end) operand values of other, aligned with
+        # the elements of left, as for BaseInterval arithmetic: numbers
+        # apply to both coordinates, and null intervals are replaced by
+        # the identity values i(op).
+        if isinstance(other, (float, int)):
+            n = len(self)
+            return (self, _repeat(other, n), _repeat(other, n))
+        left, codes, begs, ends, half, strict = self._broadcast(other, op)
+        obegs, oends = _array('d'), _array('d')
+        for sc, oc, ob, oe in zip(left.codes, codes, begs, ends):
+            if _isnull(ob) or _isnull(oe):
+                ob, oe = i(op)
+            elif sc != oc:
+                raise ValueError(_bad_operand_name(
+                    op, left.namespaces[sc], left.namespaces[oc]
+                ))
+            obegs.append(ob)
+            oends.append(oe)
+        return (left, obegs, oends)
+
+
+    def _arith(self, other, op, func, i=_0s):
+        left, begs, ends = self._values(other, op, i)
+        return left._new(
+            left.codes, map(func, left.begs, begs), map(func, left.ends, ends)
+        )
+
+
+    def _rarith(self, other, op, func):
+        if not isinstance(other, (float, int)):
+            raise TypeError(_bad_operand_type(op, type(other), type(self)))
+        return self._new(
+            self.codes,
+            (func(other, b) for b in self.begs),
+            (func(other, e) for e in self.ends)
+        )
+
+
+    def _map(self, func):
+        return self._new(self.codes, map(func, self.begs), map(func, self.ends))
+
+
+    # Arithmetic methods
+    def __add__(self, value):
+        """
+        self + value -> IntervalArray
+
+        Shift the elements' beginning-/end-points by value, where value
+        can be any numeric primitive, BaseInterval-descendant class
+        instance or IntervalArray.
+
+        >>> A = IntervalArray([Interval("Chr", 10, 50)])
+        >>> list(A + 5)
+        [Interval(Chr:15-55)]
+        """
+        return self._arith(value, '+', _add)
+
+
+    def __sub__(self, value):
+        """self - value -> IntervalArray"""
+        return self._arith(value, '-', _sub)
+
+
+    def __mul__(self, value):
+        """self * value -> IntervalArray"""
+        return self._arith(value, '*', _mul)
+
+
+    def __truediv__(self, value):
+        """self / value -> IntervalArray"""
+        return self._arith(value, '/', _truediv, _1s)
+
+
+    def __floordiv__(self, value):
+        """self // value -> IntervalArray"""
+        return self._arith(value, '//', _floordiv, _0div)
+
+
+    def __mod__(self, value):
+        """self % value -> IntervalArray"""
+        return self._arith(value, '%', _mod)
+
+
+    def __lshift__(self, value):
+        """self << value -> IntervalArray"""
+        return self._arith(value, '<<', _lshift)
+
+
+    def __rshift__(self, value):
+        """self >> value -> IntervalArray"""
+        return self._arith(value, '>>', _rshift)
+
+
+    def __radd__(self, value):
+        """value + self -> IntervalArray"""
+        return self._rarith(value, '+', _add)
+
+
+    def __rsub__(self, value):
+        """value - self -> IntervalArray"""
+        return self._rarith(value, '-', _sub)
+
+
+    def __rmul__(self, value):
+        """value * self -> IntervalArray"""
+        return self._rarith(value, '*', _mul)
+
+
+    def __rtruediv__(self, value):
+        """value / self -> IntervalArray"""
+        return self._rarith(value, '/', _truediv)
+
+
+    def __rfloordiv__(self, value):
+        """value // self -> IntervalArray"""
+        return self._rarith(value, '//', _floordiv)
+
+
+    def __rmod__(self, value):
+        """value % self -> IntervalArray"""
+        return self._rarith(value, '%', _mod)
+
+
+    def __rlshift__(self, value):
+        """value << self -> IntervalArray"""
+        return self._rarith(value, '<<', _lshift)
+
+
+    def __rrshift__(self, value):
+        """value >> self -> IntervalArray"""
+        return self._rarith(value, '>>', _rshift)
+
+
+    def __neg__(self):
+        """-self -> IntervalArray"""
+        return self._map(lambda x: -x)
+
+
+    def __pos__(self):
+        """+self -> IntervalArray"""
+        return self._map(float)
+
+
+    def __abs__(self):
+        """abs(self) -> IntervalArray"""
+        return self._map(abs)
+
+
+    def __ceil__(self):
+        """math.ceil(self) -> IntervalArray"""
+        return self._map(lambda x: x if _isinf(x) or _isnull(x) else _ceil(x))
+
+
+    def __floor__(self):
+        """math.floor(self) -> IntervalArray"""
+        return self._map(lambda x: x if _isinf(x) or _isnull(x) else _floor(x))
+
+
+    def __round__(self, ndigits=None):
+        """round(self, ndigits) -> IntervalArray"""
+        return self._map(lambda x: x if not _isfinite(x) else round(x, ndigits))
+
+
+    def __trunc__(self):
+        """math.trunc(self) -> IntervalArray"""
+        return self._map(_int)
+
+
+    # Measures
+    def isempty(self):
+        """
+        self.isempty() -> array('b')
+
+        Test whether each element is empty (or null).
+        """
+        strict = self._strict
+        return _array('b', map(
+            lambda b, e: _isempty(b, e, strict), self.begs, self.ends
+        ))
+
+
+    def isnull(self):
+        """
+        self.isnull() -> array('b')
+
+        Test whether each element's beg or end are null (nan) values.
+        """
+        return _array('b', map(
+            lambda b, e: _isnull(b) or _isnull(e), self.begs, self.ends
+        ))
+
+
+    def lengths(self):
+        """
+        self.lengths() -> array('d')
+
+        Return the length of each element, same as `len(interval)`.
+        """
+        strict = self._strict
+        return _array('d', map(
+            lambda b, e: 0 if _isempty(b, e, strict) else e - b,
+            self.begs, self.ends
+        ))
+
+
+    def mids(self):
+        """
+        self.mids() -> array('d')
+
+        Return the midpoint of each element, same as `interval.mid`.
+        """
+        mid = _strict_mid if self._strict else _mid
+        return _array('d', map(mid, self.begs, self.ends))
+
+
+    # Predicates
+    def _pairs(self, other, op):
+        left, codes, begs, ends, half, strict = self._broadcast(other, op)
+        return left, zip(left.codes, left.begs, left.ends, codes, begs, ends)
+
+
+    def isoverlapping(self, other):
+        """
+        self.isoverlapping(other) -> array('b')
+
+        Test whether each element has any kind of overlap with other.
+
+        >>> A = IntervalArray([Interval("Chr", 20, 60), Interval("Chr", 60, 80)])
+        >>> A.isoverlapping(Interval("Chr", 40, 60)).tolist()
+        [1, 0]
+        """
+        left, pairs = self._pairs(other, 'isoverlapping')
+        half = left._half
+        return _array('b', (
+            sc == oc and _isoverlapping(sb, se, ob, oe, half)
+            for sc, sb, se, oc, ob, oe in pairs
+        ))
+
+
+    def isdisjoint(self, other):
+        """
+        self.isdisjoint(other) -> array('b')
+
+        Test whether each element and other are disjoint.
+        """
+        return _array('b', (not x for x in self.isoverlapping(other)))
+
+
+    def issuperinterval(self, other, strict=False):
+        """
+        self.issuperinterval(other) -> array('b')
+
+        Test whether each element contains other. When `strict=True`,
+        exclude equal intervals.
+        """
+        left, pairs = self._pairs(other, 'issuperinterval')
+        half = left._half
+        return _array('b', (
+            sc == oc and _issuperinterval(sb, se, ob, oe, half) and
+            not (strict and sb == ob and se == oe)
+            for sc, sb, se, oc, ob, oe in pairs
+        ))
+
+
+    def issubinterval(self, other, strict=False):
+        """
+        self.issubinterval(other) -> array('b')
+
+        Test whether each element is contained within other. When
+        `strict=True`, exclude equal intervals.
+        """
+        left, pairs = self._pairs(other, 'issubinterval')
+        half = left._half
+        return _array('b', (
+            sc == oc and _issuperinterval(ob, oe, sb, se, half) and
+            not (strict and sb == ob and se == oe)
+            for sc, sb, se, oc, ob, oe in pairs
+        ))
+
+
+    def isabutting(self, other):
+        """
+        self.isabutting(other) -> array('b')
+
+        Test whether each element is abutting the beginning or end of
+        other.
+        """
+        left, pairs = self._pairs(other, 'isabutting')
+        return _array('b', (
+            sc == oc and _isabutting(sb, se, ob, oe)
+            for sc, sb, se, oc, ob, oe in pairs
+        ))
+
+
+    def overlap_length(self, other):
+        """
+        self.overlap_length(other) -> array('d')
+
+        Return the overlap length between each element and other.
+        """
+        left, pairs = self._pairs(other, 'overlap_length')
+        return _array('d', (
+            max(0, min(se, oe) - max(sb, ob)) if sc == oc else 0
+            for sc, sb, se, oc, ob, oe in pairs
+        ))
+
+
+    def overlap_fraction(self, other):
+        """
+        self.overlap_fraction(other) -> array('d')
+
+        Return the overlap length as a fraction of each element.
+        """
+        lengths = self.lengths()
+        if len(self) == 1 and isinstance(other, IntervalArray):
+            lengths = lengths * len(other)
+        return _array('d', (
+            o / max(1, n) for o, n in zip(self.overlap_length(other), lengths)
+        ))
+
+
+    def inner_distance(self, other):
+        """
+        self.inner_distance(other) -> array('d')
+
+        Return the distance between the inner-most coordinates of each
+        element and other. A negative distances indicates that the
+        element is downstream of other. Abutting and overlapping
+        intervals return `0`, and null or mismatched ones `inf`.
+
+        >>> A = IntervalArray([Interval("Chr", 10, 20), Interval("Chr", 90, 95)])
+        >>> A.inner_distance(Interval("Chr", 45, 80)).tolist()
+        [25.0, -10.0]
+        """
+        left, pairs = self._pairs(other, 'inner_distance')
+        half = left._half
+        distances = _array('d')
+        for sc, sb, se, oc, ob, oe in pairs:
+            if _isnull(sb) or _isnull(se) or _isnull(ob) or _isnull(oe):
+                distances.append(_INF)
+            elif sc != oc:
+                distances.append(_INF)
+            elif _isoverlapping(sb, se, ob, oe, half):
+                distances.append(0)
+            elif sb < ob or sb == ob and se < oe:
+                distances.append(ob - se)
+            elif sb > ob or sb == ob and se > oe:
+                distances.append(oe - sb)
+            else:
+                distances.append(_INF)
+        return distances
+
+
+    def outer_distance(self, other, maxrange=False):
+        """
+        self.outer_distance(other) -> array('d')
+        self.outer_distance(other, maxrange=True) -> array('d')
+
+        Return the distance between the outer-most points of each
+        element and other. A negative distance indicates that the
+        element is downstream of other. If maxrange=True, then the outer
+        distance of overlapping intervals is calculated from the minimum
+        beg and maximum end.
+        """
+        left, codes, begs, ends, half, strict = \
+            self._broadcast(other, 'outer_distance')
+        smid = _strict_mid if left._strict else _mid
+        omid = _strict_mid if strict else _mid
+        distances = _array('d')
+        for sc, sb, se, oc, ob, oe in \
+            zip(left.codes, left.begs, left.ends, codes, begs, ends):
+            if _isnull(sb) or _isnull(se) or _isnull(ob) or _isnull(oe):
+                distances.append(_INF)
+                continue
+            if sc != oc:
+                distances.append(_INF)
+                continue
+            if maxrange:
+                beg = min(sb, ob)
+                end = max(se, oe)
+            elif smid(sb, se) <= omid(ob, oe):
+                beg = sb
+                end = oe
+            else:
+                beg = ob
+                end = se
+            distances.append(end - beg if sb <= ob else beg - end)
+        return distances
+
+
+    # Interval and set methods
+    def hull(self, other=None):
+        """
+        self.hull() -> IntervalArray
+        self.hull(other) -> IntervalArray
+
+        Return the smallest interval closure of each element (and,
+        optionally, other).
+        """
+        strict = self._strict
+        if other is None:
+            left = self._table((_NULL_NS,))
+            pairs = ((c, b, e, -1, _NULL_BEG, _NULL_END) for c, b, e in
+                     zip(self.codes, self.begs, self.ends))
+            ostrict = True
+        else:
+            left, codes, begs, ends, half, ostrict = \
+                self._broadcast(other, 'hull')
+            pairs = zip(left.codes, left.begs, left.ends, codes, begs, ends)
+        nulls = left._code(_NULL_NS)
+        rcodes, rbegs, rends = [], [], []
+        for sc, sb, se, oc, ob, oe in pairs:
+            if _isempty(sb, se, strict):
+                sc, sb, se = nulls, _NULL_BEG, _NULL_END
+            if not _isempty(ob, oe, ostrict) and sc == oc:
+                sb = min(sb, ob)
+                se = max(se, oe)
+            rcodes.append(sc)
+            rbegs.append(sb)
+            rends.append(se)
+        return left._new(rcodes, rbegs, rends)
+
+
+    def intersection(self, other):
+        """
+        self & other -> IntervalArray
+        self.intersection(other) -> IntervalArray
+
+        Return the intersection of each element and other. Disjoint
+        elements return null intervals.
+
+        >>> A = IntervalArray([Interval("Chr", 1, 60), Interval("Chr", 70, 90)])
+        >>> list(A & Interval("Chr", 45, 80))
+        [Interval(Chr:45-60), Interval(Chr:70-80)]
+        """
+        left, pairs = self._pairs(other, '&')
+        half = left._half
+        nulls = left._code(_NULL_NS)
+        rcodes, rbegs, rends = [], [], []
+        for sc, sb, se, oc, ob, oe in pairs:
+            if sc == oc and _isoverlapping(sb, se, ob, oe, half):
+                rcodes.append(sc)
+                rbegs.append(max(sb, ob))
+                rends.append(min(se, oe))
+            else:
+                rcodes.append(nulls)
+                rbegs.append(_NULL_BEG)
+                rends.append(_NULL_END)
+        return left._new(rcodes, rbegs, rends)
+
+
+    def union(self, other, abutting=False):
+        """
+        self | other -> 2-tuple of IntervalArrays
+        self.union(other) -> 2-tuple of IntervalArrays
+
+        Return the union of each element and other. Where the union is
+        one interval, it is returned in the first array, and the second
+        array is null; where the union is two disjoint intervals, they
+        are returned in the first and second arrays, as by the 2-tuples
+        of `BaseInterval.union()`. When `abutting=True`, abutting
+        intervals are merged.
+
+        >>> A = IntervalArray([Interval("Chr", 0, 60), Interval("Chr", 90, 95)])
+        >>> U, V = A | Interval("Chr", 45, 80)
+        >>> list(U), V.isnull().tolist()
+        ([Interval(Chr:0-80), Interval(Chr:90-95)], [1, 0])
+        """
+        left, codes, begs, ends, half, ostrict = \
+            self._broadcast(other, '|')
+        strict = left._strict
+        nulls = left._code(_NULL_NS)
+        ucodes, ubegs, uends = [], [], []
+        vcodes, vbegs, vends = [], [], []
+        for sc, sb, se, oc, ob, oe in \
+            zip(left.codes, left.begs, left.ends, codes, begs, ends):
+            ucodes.append(sc)
+            vcodes.append(nulls)
+            vbegs.append(_NULL_BEG)
+            vends.append(_NULL_END)
+            if _isempty(sb, se, strict):
+                ucodes[-1] = oc
+                ubegs.append(ob)
+                uends.append(oe)
+            elif _isempty(ob, oe, ostrict):
+                ubegs.append(sb)
+                uends.append(se)
+            elif sc == oc and (
+                _isoverlapping(sb, se, ob, oe, left._half) or
+                abutting and _isabutting(sb, se, ob, oe)
+            ):
+                ubegs.append(min(sb, ob))
+                uends.append(max(se, oe))
+            else:
+                ubegs.append(sb)
+                uends.append(se)
+                vcodes[-1] = oc
+                vbegs[-1] = ob
+                vends[-1] = oe
+        return (left._new(ucodes, ubegs, uends), left._new(vcodes, vbegs, vends))
+
+
+    def difference(self, other):
+        """
+        self.difference(other) -> 2-tuple of IntervalArrays
+
+        Return the difference of each element and other. Where other is
+        contained within the element, the two remaining intervals are
+        returned in the first and second arrays, as by the 2-tuples of
+        `BaseInterval.difference()`; otherwise, the second array is null.
+
+        >>> A = IntervalArray([Interval("Chr", 1, 60), Interval("Chr", 40, 90)])
+        >>> D, E = A.difference(Interval("Chr", 45, 80))
+        >>> list(D), list(E)[1]
+        ([Interval(Chr:1-45), Interval(Chr:40-45)], Interval(Chr:80-90))
+        """
+        left, codes, begs, ends, half, ostrict = \
+            self._broadcast(other, 'difference')
+        strict = left._strict
+        nulls = left._code(_NULL_NS)
+        columns = ([], [], []), ([], [], [])
+        for sc, sb, se, oc, ob, oe in \
+            zip(left.codes, left.begs, left.ends, codes, begs, ends):
+            results = _difference(sb, se, ob, oe, sc == oc, strict, half, ostrict)
+            results.append(None)
+            for (rcodes, rbegs, rends), result in zip(columns, results):
+                if result is None:
+                    rcodes.append(nulls)
+                    rbegs.append(_NULL_BEG)
+                    rends.append(_NULL_END)
+                else:
+                    rcodes.append(sc)
+                    rbegs.append(result[0])
+                    rends.append(result[1])
+        return tuple(left._new(*column) for column in columns)
+
+
+    def symmetric_difference(self, other):
+        """
+        self ^ other -> 2-tuple of IntervalArrays
+        self.symmetric_difference(other) -> 2-tuple of IntervalArrays
+
+        Return the symmetric difference intervals of each element and
+        other in two arrays, same as the 2-tuples returned by
+        `BaseInterval.symmetric_difference()`.
+
+        >>> A = IntervalArray([Interval("Chr", 1, 60)])
+        >>> X, Y = A ^ Interval("Chr", 45, 80)
+        >>> list(X), list(Y)
+        ([Interval(Chr:1-45)], [Interval(Chr:60-80)])
+        """
+        left, codes, begs, ends, half, ostrict = self._broadcast(other, '^')
+        strict = left._strict
+        nulls = left._code(_NULL_NS)
+        columns = ([], [], []), ([], [], [])
+        for sc, sb, se, oc, ob, oe in \
+            zip(left.codes, left.begs, left.ends, codes, begs, ends):
+            if _isnull(sb) or _isnull(se) or _isnull(ob) or _isnull(oe):
+                results = [(sc, sb, se), (oc, ob, oe)]
+            else:
+                i1 = _difference(sb, se, ob, oe, sc == oc, strict, half, ostrict)
+                i2 = _difference(ob, oe, sb, se, sc == oc, ostrict, left._half, strict)
+                if len(i1) > 1:
+                    results = [(sc,) + r for r in i1]
+                elif len(i2) > 1:
+                    results = [(oc,) + r for r in i2]
+                else:
+                    results = [
+                        (c,) + r if r else (nulls, _NULL_BEG, _NULL_END)
+                        for c, r in ((sc, i1[0]), (oc, i2[0]))
+                    ]
+            for (rcodes, rbegs, rends), (c, b, e) in zip(columns, results):
+                rcodes.append(c)
+                rbegs.append(b)
+                rends.append(e)
+        return tuple(left._new(*column) for column in columns)
+
+
+    __and__ = intersection
+
+    __or__ = union
+
+    __xor__ = symmetric_difference
+
+    issubset = issubinterval
+
+    issuperset = issuperinterval
@@ -11,13 +11,35 @@ Performance Notes:
 import sys
 
 from collections import deque as _deque
+from collections import OrderedDict as _OrderedDict
+from heapq import heappush as _heappush
+from heapq import heappop as _heappop
+from heapq import merge as _heapmerge
+from bisect import bisect_left as _bisect_left
+from bisect import bisect_right as _bisect_right
+from itertools import islice as _islice
+from itertools import groupby as _groupby
+from itertools import chain as _chain
+from array import array as _array
+from sys import getsizeof as _getsizeof
+from threading import RLock as _RLock
+from asyncio import Queue as _AsyncQueue
+from asyncio import sleep as _async_sleep
+from asyncio import ensure_future as _ensure_future
+from asyncio import get_running_loop as _get_running_loop
 from .constants import NULL_NAMESPACE as _NULL_NS
 from .constants import NULL_BEG as _NULL_BEG
 from .constants import NULL_END as _NULL_END
 from .constants import inf as _INF
-from .intervals import BaseInterval, Interval
+from .intervals import BaseInterval, LeftClosedInterval, ClosedInterval
+from .intervals import Interval, Point
 from math import isnan as _isnull
 from math import isinf as _isinf
+from math import ceil as _ceil
+from math import floor as _floor
+from operator import and_ as _and
+from operator import or_ as _or
+from operator import xor as _xor
 
 
 def remit(x):
@@ -32,6 +54,10 @@ def _node_pos(node):
     return (node.interval.isempty(), node.interval.beg, node.interval.end)
 
 
+def _node_beg(node):
+    return node.interval.beg
+
+
 def _interval_pos_longest(interval):
     return (interval.isempty(), interval.beg, -interval.end)
 
@@ -40,6 +66,118 @@ def _node_pos_longest(node):
     return (node.interval.isempty(), node.interval.beg, -node.interval.end)
 
 
+def _number_array(values):
+    # Return an array of integers, or of doubles if any value is not
+    # an integer.
+    try:
+        return _array('q', values)
+    except TypeError:
+        return _array('d', values)
+
+
+# Integer coordinate modes: name -> array typecode
+_COORDS = {
+    'int64': 'q',
+    'int32': 'i',
+}
+
+
+def _get_coords(coords):
+    # Resolve an integer coordinate mode name; the generic mode (any 
+    # numeric coordinates) is represented by None.
+    if coords is None or coords in _COORDS:
+        return coords
+    raise ValueError("unknown integer coordinate mode: %r" % (coords,))
+
+
+def _coord_arrays(intervals, typecode, half=False):
+    # Return the beg and end coordinates of intervals in typed arrays,
+    # validating that they are non-negative integers within range, and
+    # with `half=True`, that the intervals are half-open.
+    intervals = list(intervals)
+    try:
+        begs = _array(typecode, (i.beg for i in intervals))
+        ends = _array(typecode, (i.end for i in intervals))
+    except (TypeError, OverflowError) as error:
+        raise ValueError(
+            "integer coordinate mode requires integer coordinates "
+            "within range: %s" % error
+        ) from None
+    if intervals and (min(begs) < 0 or min(ends) < 0):
+        raise ValueError(
+            "integer coordinate mode requires non-negative coordinates"
+        )
+    if half:
+        for interval in intervals:
+            if not isinstance(interval, LeftClosedInterval):
+                raise ValueError(
+                    "integer coordinate mode requires half-open intervals,"
+                    " not %r" % (interval,)
+                )
+    return begs, ends
+
+
+def _int_bounds(interval, half):
+    # Return the inclusive bounds (lo, hi) such that an interval with 
+    # integer coordinates overlaps the query interval, as tested by the
+    # isoverlapping() of a half-open (`half=True`) or closed interval,
+    # if and only if end >= lo and beg <= hi; or None for null queries.
+    beg = interval.beg
+    end = interval.end
+    if _isnull(beg) or _isnull(end):
+        return None
+    if half:
+        lo = beg if _isinf(beg) else _floor(beg) + 1
+        hi = end if _isinf(end) else _ceil(end) - 1
+    else:
+        lo = beg if _isinf(beg) else _ceil(beg)
+        hi = end if _isinf(end) else _floor(end)
+    return lo, hi
+
+
+def _sizeof(obj, seen):
+    # Return the size in bytes of obj and of its __dict__, or 0 if obj
+    # was already counted (its id() is in the `seen` set).
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = _getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += _getsizeof(obj.__dict__)
+    return size
+
+
+def _sizeof_container(obj, seen):
+    # Same as _sizeof(), also counting the containers nested in obj, or
+    # held by the attributes of an index, but not their other items
+    # (nodes and coordinates), which are counted separately.
+    size = _sizeof(obj, seen)
+    if size == 0:
+        return 0
+    if isinstance(obj, BaseIntervalIndex):
+        items = obj.__dict__.values()
+    elif isinstance(obj, dict):
+        items = obj.values()
+    elif isinstance(obj, _deque):
+        items = _deque.__iter__(obj)
+    elif isinstance(obj, (list, tuple)):
+        items = obj
+    else:
+        return size
+    for item in items:
+        if isinstance(item, (list, tuple, dict, _deque, _array, BaseIntervalIndex)):
+            size += _sizeof_container(item, seen)
+    return size
+
+
+def _sizeof_interval(interval, seen):
+    # Size of an interval object, and of its namespace and coordinates.
+    return _sizeof(interval, seen) + \
+        _sizeof(interval.namespace, seen) + \
+        _sizeof(interval.beg, seen) + \
+        _sizeof(interval.end, seen)
+
+
 def isiterable(item):
     return \
         hasattr(item, '__iter__') or \
@@ -78,6 +216,224 @@ def _filter_nested(nodes, sort=False):
 
 
 
+def _merge_nodes(nodes, abutting=False):
+    # Merge a stream of nodes sorted by `beg` into new nodes of
+    # maximal, non-overlapping intervals.
+    dist = 0  # = -dist
+    overlap = dist.__ge__ if abutting else dist.__gt__
+    merged = None
+    for node in nodes:
+        if merged is None:
+            pass
+        elif overlap(node.interval.beg - merged.interval.end):
+            # overlap between the two intervals, extend merged node:
+            if merged.interval.end < node.interval.end:
+                merged.interval.end = node.interval.end
+            continue
+        else:
+            yield merged
+        merged = _Node(Interval(
+            node.interval.namespace,
+            node.interval.beg,
+            node.interval.end
+        ))
+    if merged is not None:
+        yield merged
+
+
+def _merge_setter(lists, setter=None):
+    # The setter of merge_sorted(): that given, or that of the first
+    # IntervalList merged.
+    if setter is None:
+        setter = next((
+            i._setter for i in lists if isinstance(i, IntervalList)
+        ), remit)
+    return setter
+
+
+def _iter_input_nodes(intervals, setter):
+    # Return an iterator of the nodes of a sorted IntervalList, or of
+    # an iterable of sorted intervals, validating their order.
+    if isinstance(intervals, IntervalList):
+        return intervals._iter_nodes()
+    return _iter_ordered_nodes(
+        _Node(
+            interval if isinstance(interval, BaseInterval) else setter(interval),
+            interval
+        ) for interval in intervals
+    )
+
+
+def _iter_ordered_nodes(nodes):
+    # Pass a stream of nodes through, raising ValueError if it is not 
+    # sorted by (isempty(), beg, end).
+    previous = None
+    for node in nodes:
+        key = _node_pos(node)
+        if previous is not None and key < previous:
+            raise ValueError("merge_sorted() inputs must be sorted")
+        previous = key
+        yield node
+
+
+def _unique_nodes(nodes):
+    # Skip the exact duplicates (equal intervals and equal instances)
+    # in a stream of sorted nodes; they are found among the run of 
+    # nodes of the same sort key, which may hold other namespaces.
+    key = None
+    run = []
+    for node in nodes:
+        if _node_pos(node) != key:
+            key = _node_pos(node)
+            run = []
+        elif any(
+            node.interval == other.interval and node.instance == other.instance
+            for other in run
+        ):
+            continue
+        run.append(node)
+        yield node
+
+
+def _operand_snapshot(other):
+    # The snapshot of a ConcurrentIntervalSet operand, else the operand
+    return other.snapshot() if isinstance(other, ConcurrentIntervalSet) else other
+
+
+
+_QUEUE_END = object()
+
+
+async def _aqueue(intervals, queue):
+    # Feed a (possibly asynchronous) iterable of query intervals into
+    # an asyncio.Queue, terminated by _QUEUE_END. Exceptions raised by
+    # the source are re-raised by awaiting this coroutine's task.
+    try:
+        if hasattr(intervals, '__aiter__'):
+            async for interval in intervals:
+                await queue.put(interval)
+        else:
+            for interval in _listify(intervals):
+                await queue.put(interval)
+    except Exception:
+        await queue.put(_QUEUE_END)
+        raise
+    await queue.put(_QUEUE_END)
+
+
+
+# UCSC/tabix binning scheme: (first bin, bin size in bits) per level,
+# from the 64Mb bins down to the 16kb bins; bin 0 spans all 512Mb.
+_BIN_LEVELS = ((1, 26), (9, 23), (73, 20), (585, 17), (4681, 14))
+_BIN_LIMIT = 1 << 29
+_BIN_OVERFLOW = -1
+
+
+def _reg2bin(interval):
+    # Return the smallest bin containing the interval, both ends
+    # included, or _BIN_OVERFLOW for intervals the scheme can't bin
+    # (null, empty, negative or beyond 512Mb).
+    beg = interval.beg
+    end = interval.end
+    if not (0 <= beg <= end < _BIN_LIMIT):
+        return _BIN_OVERFLOW
+    beg = int(beg)
+    end = int(end)
+    for offset, shift in reversed(_BIN_LEVELS):
+        if beg >> shift == end >> shift:
+            return offset + (beg >> shift)
+    return 0
+
+
+def _reg2bins(interval):
+    # Yield every bin that may hold intervals overlapping the input
+    # interval, starting with _BIN_OVERFLOW.
+    yield _BIN_OVERFLOW
+    beg = interval.beg
+    end = interval.end
+    if not (beg <= end) or end < 0 or beg >= _BIN_LIMIT:
+        return
+    beg = int(max(beg, 0))
+    end = int(min(end, _BIN_LIMIT - 1))
+    yield 0
+    for offset, shift in _BIN_LEVELS:
+        for bin_id in range(offset + (beg >> shift), offset + (end >> shift) + 1):
+            yield bin_id
+
+
+
+# Roaring-style IntervalMask containers: each 2**16 bases chunk holds
+# either a sorted list of disjoint, non-abutting (beg, end) runs, or a
+# bitmap (an int) when it would take more than _MASK_MAX_RUNS runs.
+_MASK_BITS = 16
+_MASK_CHUNK = 1 << _MASK_BITS
+_MASK_MAX_RUNS = 2048
+
+
+def _mask_sub(a, b):
+    # a AND NOT b, for both bools and int bitmaps
+    return a & ~b
+
+
+def _runs_bitmap(runs):
+    bits = 0
+    for beg, end in runs:
+        bits |= ((1 << (end - beg)) - 1) << beg
+    return bits
+
+
+def _bitmap_runs(bits):
+    runs = []
+    while bits:
+        beg = (bits & -bits).bit_length() - 1
+        ones = bits >> beg
+        end = beg + ((ones + 1) & ~ones).bit_length() - 1
+        runs.append((beg, end))
+        bits = bits >> end << end
+    return runs
+
+
+def _mask_container(bits):
+    # Return the canonical container for a chunk bitmap, or None if
+    # the chunk is empty.
+    if not bits:
+        return None
+    if bin(bits & ~(bits << 1)).count('1') > _MASK_MAX_RUNS:
+        return bits
+    return _bitmap_runs(bits)
+
+
+def _runs_container(runs):
+    # Return the canonical container for a chunk's runs, or None if
+    # the chunk is empty.
+    if not runs:
+        return None
+    if len(runs) > _MASK_MAX_RUNS:
+        return _runs_bitmap(runs)
+    return runs
+
+
+def _sweep_runs(a, b, op):
+    # Combine two sorted run lists with a boolean operator, visiting
+    # only the run boundaries.
+    runs = []
+    i = j = 0
+    beg = None
+    for pos in sorted(set([x for r in a for x in r] + [x for r in b for x in r])):
+        while i < len(a) and a[i][1] <= pos:
+            i += 1
+        while j < len(b) and b[j][1] <= pos:
+            j += 1
+        inside = op(i < len(a) and a[i][0] <= pos, j < len(b) and b[j][0] <= pos)
+        if inside and beg is None:
+            beg = pos
+        elif not inside and beg is not None:
+            runs.append((beg, pos))
+            beg = None
+    return runs
+
+
+
 class DuplicateKeyError(LookupError):
     pass
 
@@ -124,12 +480,155 @@ class _Node(object):
 
 
 
+class QueryCache(object):
+    """
+    A least-recently-used cache of the query results of a collection,
+    set with `set_cache()`: repeated queries, with the same kind (e.g.
+    overlaps, count or nearest), arguments and query coordinates, are
+    answered from the cache until the collection is next updated.
+
+    Every update of a collection (e.g., `insort()`, `remove()` or the
+    `*_update()` methods) bumps its version counter, and the first
+    query after an update invalidates all of the cached results. The 
+    least recently used results are evicted beyond `maxsize` entries,
+    or beyond `maxbytes` bytes when it is not None, as estimated by 
+    `sys.getsizeof()` of their keys and result containers (members are
+    held by the collection anyway). A QueryCache is thread-safe, and 
+    serves a single collection.
+
+    >>> I = IntervalSet([Interval("Chr", 0, 100)])
+    >>> I.set_cache(QueryCache(maxsize=100))
+    >>> list(I.overlaps(Interval("Chr", 10, 20)))
+    [Interval(Chr:0-100)]
+    >>> list(I.overlaps(Interval("Chr", 10, 20)))
+    [Interval(Chr:0-100)]
+    >>> I.cache_info()['hits']
+    1
+    """
+
+    def __init__(self, maxsize=1024, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._lock = _RLock()
+        self.clear()
+
+
+    def clear(self):
+        """Remove all results and reset the statistics."""
+        with self._lock:
+            self._entries = _OrderedDict()  # key -> (result, size)
+            self._version = None  # of the collection, at the results
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+            self.evictions = 0
+
+
+    def _lookup(self, version, key, query):
+        # Return the cached result of a query, or compute and cache it
+        with self._lock:
+            if version != self._version:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        # Queries run unlocked; a result is cached only if the 
+        # collection was not updated in the meantime.
+        result = query()
+        size = _getsizeof(key) + _getsizeof(result)
+        with self._lock:
+            if version != self._version or \
+               (self.maxbytes is not None and size > self.maxbytes):
+                return result
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or \
+                  (self.maxbytes is not None and self._bytes > self.maxbytes):
+                self._bytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return result
+
+
+    def info(self):
+        """
+        self.info() -> dict
+
+        Return the statistics of the cache, for monitoring: the number
+        of 'hits' and 'misses' of queries, of results invalidated by 
+        updates ('invalidations') and evicted ('evictions'), and the 
+        current number of 'entries' and of their 'bytes', with the
+        'maxsize' and 'maxbytes' limits.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxsize': self.maxsize,
+                'maxbytes': self.maxbytes,
+            }
+
+
+
 class BaseIntervalCollection(object):
     # Copied and extended this pattern from collections.abc.Collection
     def __init__(self, setter=remit):
         self._setter = setter
 
 
+    # the query cache (see set_cache()), and the version counter that
+    # updates bump to invalidate its results:
+    _cache = None
+
+    _version = 0
+
+
+    def set_cache(self, cache):
+        """
+        self.set_cache(cache) -> None
+
+        Cache the results of the overlap, count and nearest queries of
+        self in a QueryCache, or stop caching them with `cache=None`.
+        Cached results are materialized: generator methods, e.g. 
+        `overlaps()`, produce them from a list.
+        """
+        self._cache = cache
+
+
+    def cache_info(self):
+        """
+        self.cache_info() -> dict
+
+        Return the statistics of the query cache (see `QueryCache.info()`),
+        or None if self has none.
+        """
+        return None if self._cache is None else self._cache.info()
+
+
+    def _cached(self, query, kind, nodes, *args):
+        # Return query(), or from the query cache, the result it returned
+        # for the same query since self was last updated. Queries are
+        # keyed by their kind, arguments, and the normalized coordinates
+        # (and class) of their _Node objects.
+        key = (kind, args, tuple(
+            (n.interval.__class__, n.interval.namespace, n.interval.beg, n.interval.end)
+            for n in nodes
+        ))
+        return self._cache._lookup(self._version, key, query)
+
+
     def __contains__(self, value):
         raise NotImplementedError('%s.__contains__()' % self.__class__.__name__)
 
@@ -166,6 +665,14 @@ class BaseIntervalCollection(object):
 
     def _iter_nodes(self, lower=0, upper=-1):
         raise NotImplementedError('%s._iter_nodes()' % self.__class__.__name__)
+
+
+    def _iter_sorted_nodes(self):
+        raise NotImplementedError('%s._iter_sorted_nodes()' % self.__class__.__name__)
+
+
+    def _iter_top_nodes(self):
+        raise NotImplementedError('%s._iter_top_nodes()' % self.__class__.__name__)
     
 
     def _copy_nodes(self):
@@ -198,10 +705,320 @@ class BaseIntervalCollection(object):
     def isfinite(self):
         return not (_isinf(self.beg) or _isinf(self.end))
 
-    
-    
+
+    def _transform(self, func, lower=None, upper=None):
+        # Set each member's coordinates to func(beg, end), clipped to
+        # the lower and upper bounds, in place, on the intervals of the
+        # nodes of _own_members(); an interval held by several members
+        # is changed once. _transformed() then updates the search 
+        # structures, or raises ValueError (e.g., in integer coordinate
+        # mode), and the coordinates are restored. A strictly increasing
+        # transform keeps the members' order and nesting; only clipping,
+        # rounding (e.g., by Interval's int coordinates) or emptying a
+        # member requires re-sorting them.
+        resort = False
+        nodes = self._own_members()
+        saved = {}  # id(interval) -> (interval, beg, end) before the transform
+        for node in nodes:
+            interval = node.interval
+            if id(interval) in saved:
+                continue
+            saved[id(interval)] = (interval, interval.beg, interval.end)
+            empty = interval.isempty()
+            beg, end = func(interval.beg, interval.end)
+            if lower is not None and beg < lower:
+                beg = lower
+                resort = True
+            if upper is not None and end > upper:
+                end = upper
+                resort = True
+            interval.beg = beg
+            interval.end = end
+            if interval.beg != beg or interval.end != end or \
+               interval.isempty() != empty:
+                resort = True
+        try:
+            self._transformed(nodes, resort)
+        except ValueError:
+            for interval, beg, end in saved.values():
+                interval.beg = beg
+                interval.end = end
+            raise
+
+
+    def _own_members(self):
+        # Return a list of the nodes whose intervals _transform() may
+        # change in place.
+        raise NotImplementedError('%s._own_members()' % self.__class__.__name__)
+
+
+    def _transformed(self, nodes, resort):
+        raise NotImplementedError('%s._transformed()' % self.__class__.__name__)
+
+
+    def _iter_flanks(self, left, right, lower, upper):
+        for node in self._iter_sorted_nodes():
+            for beg, end in (
+                (node.interval.beg - left, node.interval.beg),
+                (node.interval.end, node.interval.end + right)
+            ):
+                if lower is not None and beg < lower:
+                    beg = lower
+                if upper is not None and end > upper:
+                    end = upper
+                if beg < end:
+                    flank = node.interval.copy()
+                    flank.beg = beg
+                    flank.end = end
+                    yield flank
+
+
+    def shift(self, offset):
+        """
+        Shift every member's coordinates by `offset`, in place. Requires
+        O(n) time, as the members' order and nesting are unchanged.
+
+        Members' intervals are changed in place, and stay the same 
+        objects, except those an IntervalSet shares with a snapshot
+        (see `IntervalSet.snapshot()`), which are replaced by changed
+        copies: snapshots, and the queries of a ConcurrentIntervalSet, 
+        keep the original coordinates. Objects members were made from
+        by a `setter` are not changed, unless the setter returned their
+        own interval (e.g., an attribute of a record), the one changed.
+
+        >>> I = IntervalList([Interval("Chr", 10, 20)])
+        >>> I.shift(5)
+        >>> list(I)
+        [Interval(Chr:15-25)]
+        """
+        self._transform(lambda beg, end: (beg + offset, end + offset))
+
+
+    def scale(self, factor):
+        """
+        Multiply every member's coordinates by a positive `factor`, in 
+        place. Requires O(n) time, unless coordinates are rounded (e.g.,
+        Interval coordinates are integers), and members are re-sorted.
+
+        Members' intervals are changed in place, as with `shift()`.
+
+        >>> I = IntervalList([Interval("Chr", 10, 20)])
+        >>> I.scale(3)
+        >>> list(I)
+        [Interval(Chr:30-60)]
+        """
+        if not factor > 0:
+            raise ValueError("scale factor must be positive")
+        self._transform(lambda beg, end: (beg * factor, end * factor))
+
+
+    def slop(self, left, right=None, lower=None, upper=None):
+        """
+        Extend every member by `left` before its beg and `right` (by
+        default, `left`) after its end, clipped to the `lower` and 
+        `upper` bounds when given, in place. Same as bedtools slop.
+        Requires O(n) time, as the members' order and nesting are 
+        unchanged, unless members are clipped, emptied (by negative
+        values) or rounded, and are re-sorted. Empty members are 
+        dropped from an IntervalSet.
+
+        Members' intervals are changed in place, as with `shift()`.
+
+        >>> I = IntervalList([Interval("Chr", 10, 20)])
+        >>> I.slop(15, 5, lower=0)
+        >>> list(I)
+        [Interval(Chr:0-25)]
+        """
+        if right is None:
+            right = left
+        self._transform(lambda beg, end: (beg - left, end + right), lower, upper)
+
+
+    def flank(self, left, right=None, lower=None, upper=None):
+        """
+        Return a new collection of the regions of `left` length before,
+        and `right` (by default, `left`) length after each member, 
+        clipped to the `lower` and `upper` bounds when given. Same as 
+        bedtools flank. Flanks are copies of their member's interval.
+
+        >>> I = IntervalList([Interval("Chr", 10, 20)])
+        >>> list(I.flank(15, 5, lower=0))
+        [Interval(Chr:0-10), Interval(Chr:20-25)]
+        """
+        if right is None:
+            right = left
+        return self.__class__(list(self._iter_flanks(left, right, lower, upper)))
+
+
+    def _window_bounds(self, size, step, lower, upper):
+        # Return the lower and upper bounds, step and number of windows:
+        if step is None:
+            step = size
+        if not (size > 0 and step > 0):
+            raise ValueError("window size and step must be positive")
+        if len(self) < 1 and (lower is None or upper is None):
+            return 0, 0, step, 0
+        if lower is None:
+            lower = self.beg
+        if upper is None:
+            upper = max(n.interval.end for n in self._iter_top_nodes())
+        return lower, upper, step, max(0, -((lower - upper) // step))
+
+
+    def make_windows(self, size, step=None, lower=None, upper=None):
+        """
+        self.make_windows(size) -> generator
+
+        Generate Interval objects tiling the collection's namespace from
+        `lower` to `upper` (by default, the collection's beg and the 
+        largest end of its members) with windows of `size`, beginning 
+        every `step` (by default, `size`). The last windows are clipped
+        to `upper`. Same as bedtools makewindows.
+
+        >>> I = IntervalList([Interval("Chr", 0, 250)])
+        >>> list(I.make_windows(100))
+        [Interval(Chr:0-100), Interval(Chr:100-200), Interval(Chr:200-250)]
+        """
+        lower, upper, step, count = self._window_bounds(size, step, lower, upper)
+        namespace = self.namespace
+        for i in range(count):
+            beg = lower + i * step
+            yield Interval(namespace, beg, min(beg + size, upper))
+
+
+    def window_counts(self, size, step=None, lower=None, upper=None):
+        """
+        self.window_counts(size) -> (array, array, array)
+
+        Count the members overlapping, and the positions covered by at 
+        least one member in, each window of `make_windows()`, without 
+        creating the windows or searching for each one. Returns three
+        arrays: the windows' beg, the counts, and the covered lengths.
+        Members' coordinates are treated as half-open.
+
+        The sorted members are swept once: each member adds one to the
+        counts of the range of windows it overlaps, computed from its
+        coordinates, through an array of differences; overlapping members
+        are merged on the fly, and each merged run adds its overlap to 
+        the covered length of the windows it spans. Requires O(n + w)
+        time for n members and w windows (when step = size).
+
+        >>> I = IntervalList([Interval("Chr", 0, 50), Interval("Chr", 40, 250)])
+        >>> begs, counts, covered = I.window_counts(100)
+        >>> begs.tolist(), counts.tolist(), covered.tolist()
+        ([0, 100, 200], [2, 1, 1], [100, 100, 50])
+        """
+        lower, upper, step, count = self._window_bounds(size, step, lower, upper)
+        diffs = [0] * (count + 1)
+        covered = [0] * count
+
+        def cover(beg, end):
+            # add the overlap of a merged run with each window:
+            first = max(0, (beg - lower - size) // step + 1)
+            for i in range(int(first), count):
+                wbeg = lower + i * step
+                if wbeg >= end:
+                    break
+                covered[i] += min(end, wbeg + size, upper) - max(beg, wbeg)
+
+        run = None  # current [beg, end] run of overlapping members
+        for node in self._iter_sorted_nodes():
+            beg = node.interval.beg
+            end = node.interval.end
+            if not (beg < end) or end <= lower or beg >= upper:
+                continue
+            first = max(0, (beg - lower - size) // step + 1)
+            last = min(count - 1, -((lower - end) // step) - 1)
+            if first <= last:
+                diffs[int(first)] += 1
+                diffs[int(last) + 1] -= 1
+            beg = max(beg, lower)
+            end = min(end, upper)
+            if run is not None and beg <= run[1]:
+                if run[1] < end:
+                    run[1] = end
+                continue
+            if run is not None:
+                cover(*run)
+            run = [beg, end]
+        if run is not None:
+            cover(*run)
+
+        counts = []
+        total = 0
+        for diff in diffs[:count]:
+            total += diff
+            counts.append(total)
+        begs = [lower + i * step for i in range(count)]
+        return (
+            _number_array(begs),
+            _array('q', counts),
+            _number_array(covered)
+        )
+
+
+    def _iter_containers(self):
+        # Yield (component, container) pairs of the objects holding the
+        # nodes and the query index, for memory_usage().
+        raise NotImplementedError('%s._iter_containers()' % self.__class__.__name__)
+
+
+    def memory_usage(self, deep=True):
+        """
+        self.memory_usage(deep=True) -> dict
+
+        Report the memory, in bytes, used by the collection, as a dict
+        with the following components, and their 'total':
+
+          'nodes':      the _Node objects wrapping each member
+          'intervals':  the members' interval objects, with their 
+                        namespaces and coordinates
+          'payload':    the members, when they are not the interval 
+                        objects themselves (see `setter`)
+          'sublists':   the (sub)list containers holding the nodes
+          'free_slots': the released sublist slots awaiting reuse
+          'index':      the integer coordinate columns, or the query
+                        index of the `backend`, if built
+
+        With deep=False, only the objects that belong to the collection 
+        are counted, and 'intervals' and 'payload' are 0. Sizes are those
+        of `sys.getsizeof()`, including instance dicts, and objects 
+        referenced more than once (e.g., a namespace string, or a small
+        int coordinate) are counted once. (Sub)lists shared with a 
+        snapshot (see `IntervalSet.snapshot()`) are counted in full.
+
+        >>> I = IntervalList([Interval("Chr", 0, 50), Interval("Chr", 40, 250)])
+        >>> usage = I.memory_usage()
+        >>> usage['total'] == sum(v for k,v in usage.items() if k != 'total')
+        True
+        >>> I.memory_usage(deep=False)['intervals']
+        0
+        """
+        seen = set()
+        usage = dict.fromkeys(
+            ('nodes', 'intervals', 'payload', 'sublists', 'free_slots', 'index'), 0
+        )
+        for component, container in self._iter_containers():
+            usage[component] += _sizeof_container(container, seen)
+        for node in self._iter_nodes():
+            usage['nodes'] += _sizeof(node, seen)
+            if deep:
+                usage['intervals'] += _sizeof_interval(node.interval, seen)
+                if node.instance is not node.interval:
+                    usage['payload'] += _sizeof(node.instance, seen)
+        usage['total'] = sum(usage.values())
+        return usage
+
+
+
 class IntervalList(BaseIntervalCollection, _deque):
-    def __init__(self, intervals=[], setter=remit):
+    def __new__(cls, intervals=[], setter=remit, coords=None, backend='deque'):
+        # IntervalList(..., backend='blocked') is a BlockedIntervalList
+        backend = _get_list_backend(backend)
+        return _deque.__new__(backend if cls is IntervalList else cls)
+
+
+    def __init__(self, intervals=[], setter=remit, coords=None, backend='deque'):
         """
         The `setter` keyword argument accepts a function used to 
         extract/construct from the input object an Interval-descendant
@@ -209,16 +1026,212 @@ class IntervalList(BaseIntervalCollection, _deque):
         for when the inputs are not of the same object class as the 
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
+
+        The `coords` keyword argument selects an integer coordinate 
+        mode, 'int64' or 'int32', for half-open members of one namespace
+        whose coordinates are all non-negative integers: they are 
+        validated once when the IntervalList is built (and as members
+        are added), and copied into array.array columns of that type,
+        which the searches bisect and compare with integer comparisons
+        only. The default, None, accepts any numeric coordinates, 
+        including nan and inf.
+
+        Overlap searches bisect a running maximum of the members' ends,
+        so that they find the first member overlapping a query even when
+        longer members enclose shorter ones, then skip the blocks of 
+        members ending before the query by their maximum end. These 
+        search columns are built by the first search, and updated in 
+        place as members are inserted (e.g., by `insort()`) or removed
+        (e.g., by `remove()`); other updates discard them, and the next
+        search rebuilds them.
+
+        The `backend` keyword argument selects the storage of the 
+        members: 'deque' (the default), whose inserts and removals move
+        O(n) members, or 'blocked', a BlockedIntervalList of bounded-size
+        sorted blocks, whose `insort()`, `remove()` and searches require
+        O(log n) (amortized) time, for lists updated between searches.
         """
         BaseIntervalCollection.__init__(self, setter)
         _deque.__init__(self)
+        self._coords = _get_coords(coords)
+        self._index = None
+        self._maxends = None
+        self._blockmax = None
         if len(intervals) > 0:
             self.extend(sorted(
                 intervals, key=lambda i: _interval_pos(setter(i))
             ))
+        if self._coords is not None:
+            self._get_index()
+
+
+    def __reduce__(self):
+        # Copies and pickles are rebuilt from the members alone, with 
+        # the setter: the deque's own reduction restores the state and
+        # appends the members in an order that differs between pickle
+        # and copy.deepcopy(), and search columns or blocks are derived.
+        return (self.__class__, (list(self), self._setter, self._coords))
+
+
+    # number of members per block of _get_blockmax():
+    _blocksize = 64
+
+
+    def _get_index(self):
+        # Build the (begs, ends) columns of the members' coordinates on
+        # first use, as lists, or as arrays of the integer coordinate 
+        # mode; updates reset them to None.
+        index = self._index
+        if index is None and self._coords is None:
+            index = self._index = (
+                [n.interval.beg for n in self._iter_nodes()],
+                [n.interval.end for n in self._iter_nodes()]
+            )
+        elif index is None:
+            index = _coord_arrays(
+                (n.interval for n in self._iter_nodes()), 
+                _COORDS[self._coords], half=True
+            )
+            namespace = self.namespace
+            for node in self._iter_nodes():
+                if node.interval.namespace != namespace:
+                    raise ValueError(
+                        "mixed-namespace IntervalList in integer coordinate mode"
+                    )
+            self._index = index
+        return index
+
+
+    def _get_maxends(self):
+        # Build the running maximum of the members' ends on first use, 
+        # such that maxends[i] is the max end of members 0 to i; unlike
+        # the ends themselves, it is sorted however members nest. nan 
+        # ends (of null members) are skipped.
+        maxends = self._maxends
+        if maxends is None:
+            maxends = []
+            maxend = -_INF
+            for node in self._iter_nodes():
+                if node.interval.end > maxend:
+                    maxend = node.interval.end
+                maxends.append(maxend)
+            self._maxends = maxends
+        return maxends
+
+
+    def _get_blockmax(self, block):
+        # Return the maximum end of the members of a block of indexes, 
+        # [block * _blocksize, (block + 1) * _blocksize), computed on
+        # demand, in order. Inserting or removing a member discards the
+        # maximums of its block and of the blocks after it.
+        blockmax = self._blockmax
+        if blockmax is None:
+            blockmax = self._blockmax = []
+        if block >= len(blockmax):
+            size = self._blocksize
+            ends = self._get_index()[1]
+            for lower in range(len(blockmax) * size, (block + 1) * size, size):
+                blockmax.append(max(ends[lower:lower+size], default=-_INF))
+        return blockmax[block]
+
+
+    def _reset_index(self):
+        # Discard the search columns; the next search rebuilds them.
+        self._version += 1
+        self._index = None
+        self._maxends = None
+        self._blockmax = None
+
+
+    def _set_member(self, interval, setter=None):
+        # Same as _set(), for a new member: validates the member's 
+        # coordinates in integer coordinate mode.
+        node = self._set(interval, setter)
+        if self._coords is not None:
+            _coord_arrays([node.interval], _COORDS[self._coords], half=True)
+        return node
+
+
+    def _insert_node(self, index, node):
+        # Insert a node as deque.insert() does, updating the search 
+        # columns in place. Only the running maximums following the
+        # node that are below its end need raising.
+        length = len(self)
+        if index < 0:
+            index = max(0, index + length)
+        index = min(index, length)
+        namespace = self.namespace if length else node.interval.namespace
+        self._version += 1
+        _deque.insert(self, index, node)
+        if self._blockmax is not None:
+            del self._blockmax[index // self._blocksize:]
+        if self._index is not None:
+            if self._coords is None or node.interval.namespace == namespace:
+                begs, ends = self._index
+                begs.insert(index, node.interval.beg)
+                ends.insert(index, node.interval.end)
+            else:
+                self._index = None  # the next search raises ValueError
+        maxends = self._maxends
+        if maxends is not None:
+            end = node.interval.end
+            maxend = maxends[index-1] if index > 0 else -_INF
+            maxends.insert(index, end if end > maxend else maxend)
+            index += 1
+            while index <= length and maxends[index] < end:
+                maxends[index] = end
+                index += 1
+
+
+    def _remove_node(self, index):
+        # Remove and return the node at an index, updating the search
+        # columns in place. The running maximums following the index
+        # are recomputed until one is unchanged, as are all after it.
+        length = len(self)
+        if index < 0:
+            index += length
+        if not (0 <= index < length):
+            raise IndexError("deque index out of range")
+        node = _deque.__getitem__(self, index)
+        _deque.__delitem__(self, index)
+        self._version += 1
+        if self._blockmax is not None:
+            del self._blockmax[index // self._blocksize:]
+        if self._index is not None:
+            begs, ends = self._index
+            del begs[index]
+            del ends[index]
+        maxends = self._maxends
+        if maxends is not None:
+            del maxends[index]
+            maxend = maxends[index-1] if index > 0 else -_INF
+            nodes = _islice(_deque.__iter__(self), index, None)
+            for i, other in enumerate(nodes, index):
+                if other.interval.end > maxend:
+                    maxend = other.interval.end
+                if maxends[i] == maxend:
+                    break
+                maxends[i] = maxend
+        return node
+
+
+    def _overlap_test(self, node):
+        # Return a function testing whether the member at an index 
+        # overlaps the query node, same as member.isoverlapping(query).
+        if self._coords is None:
+            get_node = self._get_node
+            return lambda index: \
+                get_node(index).interval.isoverlapping(node.interval)
+        begs, ends = self._get_index()
+        bounds = _int_bounds(node.interval, True)
+        if bounds is None or node.interval.namespace != self.namespace:
+            return lambda index: False
+        lo, hi = bounds
+        return lambda index: ends[index] >= lo and begs[index] <= hi
 
         
     def _set_node(self, index, node):
+        self._reset_index()
         return _deque.__setitem__(self, index, node)    
 
 
@@ -226,12 +1239,33 @@ class IntervalList(BaseIntervalCollection, _deque):
         return _deque.__getitem__(self, index)
     
     
+    def _set_nodes(self, nodes):
+        # Replace all members with a list of sorted nodes.
+        self._reset_index()
+        _deque.clear(self)
+        _deque.extend(self, nodes)
+
+
     def __getitem__(self, index):
-        return self._get(_deque.__getitem__(self, index))
+        return self._get(self._get_node(index))
 
 
     def __setitem__(self, index, interval):
-        _deque.__setitem__(self, index, self._set(interval))
+        self._set_node(index, self._set_member(interval))
+
+
+    def __delitem__(self, index):
+        self._remove_node(index)
+
+
+    def __iadd__(self, intervals):
+        self.extend(intervals)
+        return self
+
+
+    def __imul__(self, n):
+        self._reset_index()
+        return _deque.__imul__(self, n)
 
 
     def __contains__(self, interval):
@@ -243,10 +1277,47 @@ class IntervalList(BaseIntervalCollection, _deque):
         return (self._get(n) for n in self._iter_nodes())
 
 
+    def __reversed__(self):
+        return (self._get(n) for n in _deque.__reversed__(self))
+
+
     def _iter_nodes(self):
         return _deque.__iter__(self)
 
 
+    # members are kept in sorted order, and none are
+    # hidden beneath others:
+    _iter_sorted_nodes = _iter_nodes
+
+    _iter_top_nodes = _iter_nodes
+
+
+    def _own_members(self):
+        # No snapshot shares the nodes of an IntervalList:
+        return list(self._iter_nodes())
+
+
+    def _transformed(self, nodes, resort):
+        if self._coords is not None:
+            _coord_arrays(
+                (n.interval for n in nodes), _COORDS[self._coords], half=True
+            )
+        if resort:
+            self._set_nodes(sorted(nodes, key=_node_pos))
+        else:
+            self._reset_index()
+
+
+    def _iter_containers(self):
+        yield 'sublists', self
+        if self._index is not None:
+            yield 'index', self._index
+        if self._maxends is not None:
+            yield 'index', self._maxends
+        if self._blockmax is not None:
+            yield 'index', self._blockmax
+
+
     def __len__(self):
         return _deque.__len__(self)
 
@@ -297,7 +1368,7 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
-        _deque.append(self, self._set(interval, setter))
+        self._insert_node(len(self), self._set_member(interval, setter))
 
 
     def appendleft(self, interval, setter=None):
@@ -311,12 +1382,87 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
-        _deque.appendleft(self, self._set(interval, setter))
+        self._insert_node(0, self._set_member(interval, setter))
+
+
+    def clear(self):
+        """Remove all elements from the IntervalList."""
+        self._set_nodes([])
 
 
     def copy(self):
         """Create a copy of the IntervalList."""
-        return self.__class__(self, setter=self._setter)
+        return self.__class__(self, setter=self._setter, coords=self._coords)
+
+
+    @staticmethod
+    def _iter_merge_sorted(lists, unique, setter):
+        # k-way merge of the nodes of the sorted inputs, identical nodes
+        # in the order of their inputs; IntervalList inputs share their
+        # nodes, which no IntervalList modifies.
+        nodes = _heapmerge(*[
+            _iter_input_nodes(intervals, setter) for intervals in lists
+        ], key=_node_pos)
+        return _unique_nodes(nodes) if unique else nodes
+
+
+    @classmethod
+    def iter_merge_sorted(cls, *lists, unique=False, setter=None):
+        """
+        IntervalList.iter_merge_sorted(*lists) -> generator
+
+        Generator variant of `merge_sorted()`, producing the members of
+        the merged lists in sorted order, without building an 
+        IntervalList. Requires O(k) memory for k lists.
+
+        >>> A = IntervalList([Interval("Chr",1,50), Interval("Chr",60,80)])
+        >>> B = IntervalList([Interval("Chr",1,50), Interval("Chr",55,90)])
+        >>> list(IntervalList.iter_merge_sorted(A, B, unique=True))
+        [Interval(Chr:1-50), Interval(Chr:55-90), Interval(Chr:60-80)]
+        """
+        setter = _merge_setter(lists, setter)
+        return (
+            node.instance for node in 
+            cls._iter_merge_sorted(lists, unique, setter)
+        )
+
+
+    @classmethod
+    def merge_sorted(cls, *lists, unique=False, setter=None, coords=None, backend='deque'):
+        """
+        IntervalList.merge_sorted(*lists) -> IntervalList
+
+        Merge sorted IntervalLists, or iterables of sorted intervals, 
+        into a new IntervalList, by a k-way merge of their members in 
+        O(n log k) time for n members of k lists, rather than sorting 
+        them all again. Identical members are kept in the order of the
+        lists, as `IntervalList()` would sort their concatenation; with
+        `unique=True`, exact duplicates (equal intervals of equal 
+        instances) are kept once. Raises ValueError if an iterable of
+        intervals is not sorted.
+
+        The `setter` keyword argument extracts/constructs the intervals
+        of inputs that are not IntervalLists, and is the setter of the 
+        new IntervalList; by default, that of the first IntervalList 
+        input. The `coords` and `backend` keyword arguments are those 
+        of `IntervalList()`.
+
+        >>> A = IntervalList([Interval("Chr",1,50), Interval("Chr",60,80)])
+        >>> B = IntervalList([Interval("Chr",1,50), Interval("Chr",55,90)])
+        >>> IntervalList.merge_sorted(A, B)
+        IntervalList([Interval(Chr:1-50), Interval(Chr:1-50), Interval(Chr:55-90), Interval(Chr:60-80)])
+        """
+        setter = _merge_setter(lists, setter)
+        merged = cls(setter=setter, coords=coords, backend=backend)
+        nodes = list(cls._iter_merge_sorted(lists, unique, setter))
+        if merged._coords is not None:
+            _coord_arrays(
+                (n.interval for n in nodes), _COORDS[merged._coords], half=True
+            )
+        merged._set_nodes(nodes)
+        if merged._coords is not None:
+            merged._get_index()
+        return merged
         
 
     def count(self, interval, setter=None):
@@ -345,8 +1491,9 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
+        self._reset_index()
         _deque.extend(self, map(
-            lambda i: self._set(i, setter),
+            lambda i: self._set_member(i, setter),
             intervals
         ))
 
@@ -363,8 +1510,9 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
+        self._reset_index()
         _deque.extendleft(self, map(
-            lambda i: self._set(i, setter),
+            lambda i: self._set_member(i, setter),
             intervals
         ))
 
@@ -383,7 +1531,7 @@ class IntervalList(BaseIntervalCollection, _deque):
         index = self.find_index(
             interval, lower=start, upper=stop, setter=setter
         )
-        if 0 <= index < self._length:
+        if 0 <= index < len(self):
             return index
         else:
             raise ValueError("'%s' is not in list" % str(interval))
@@ -400,9 +1548,28 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
-        _deque.insert(self, index, self._set(interval, setter))
+        self._insert_node(index, self._set_member(interval, setter))
 
         
+    def _insort_index(self, node, left, lower=0, upper=-1):
+        # Return the sorted position of a node, to the left (or right)
+        # of the identical members.
+        length = len(self)
+        if not (0 <= lower < length):
+            lower = 0
+        if not (0 <= upper < length):
+            upper = length
+        key = _node_pos(node)
+        while lower < upper:
+            middle = (lower + upper) // 2
+            if (_node_pos(self._get_node(middle)) < key) if left else \
+               not (key < _node_pos(self._get_node(middle))):
+                lower = middle + 1
+            else:
+                upper = middle
+        return lower
+
+
     def insort(self, interval, lower=0, upper=-1, setter=None):
         """
         Insert an interval into its sorted position, with identical
@@ -416,18 +1583,7 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         node = self._set(interval, setter)
-        length = len(self)
-        if not (0 <= lower < length):
-            lower = 0
-        if not (0 <= upper < length):
-            upper = length
-        while lower < upper:
-            middle = (lower + upper) // 2
-            if node.interval < self._get_node(middle).interval:
-                upper = middle
-            else:
-                lower = middle + 1
-        self.insert(lower, interval, setter)
+        self.insert(self._insort_index(node, False, lower, upper), interval, setter)
 
         
     def insortleft(self, interval, lower=0, upper=-1, setter=None):
@@ -443,24 +1599,67 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         node = self._set(interval, setter)
-        length = len(self)
-        if not (0 <= lower < length):
-            lower = 0
-        if not (0 <= upper < length):
-            upper = length
-        while lower < upper:
-            middle = (lower + upper) // 2
-            if self._get_node(middle).interval < node.interval:
-                lower = middle + 1
-            else:
-                upper = middle
-        self.insert(lower, interval, setter)
+        self.insert(self._insort_index(node, True, lower, upper), interval, setter)
         
 
+    # batches of fewer intervals are insort()ed one by one by update():
+    _merge_threshold = 64
+
+
+    def _merge(self, nodes, left):
+        # Merge the sorted nodes into the sorted members in one linear
+        # pass, as insort()ing (or insortleft()ing) them in order would:
+        # each node is bisected in the members following the previous
+        # one, and the members in between are copied in a single slice.
+        members = list(self._iter_nodes())
+        merged = []
+        lower = 0
+        upper = len(members)
+        for node in nodes:
+            key = _node_pos(node)
+            index = lower
+            high = upper
+            while index < high:
+                middle = (index + high) // 2
+                if (_node_pos(members[middle]) < key) if left else \
+                   not (key < _node_pos(members[middle])):
+                    index = middle + 1
+                else:
+                    high = middle
+            merged.extend(members[lower:index])
+            merged.append(node)
+            lower = index
+        merged.extend(members[lower:])
+        self._set_nodes(merged)
+
+
+    def _update_nodes(self, intervals, setter, left):
+        setter = setter or self._setter
+        nodes = sorted(
+            (self._set_member(i, setter) for i in intervals), key=_node_pos
+        )
+        if len(nodes) < self._merge_threshold:
+            for node in nodes:
+                self._insert_node(self._insort_index(node, left), node)
+            return
+        if left:
+            # insortleft() places each interval before the identical
+            # ones inserted before it:
+            nodes = [
+                node for key, group in _groupby(nodes, key=_node_pos)
+                for node in reversed(list(group))
+            ]
+        self._merge(nodes, left)
+
+
     def update(self, intervals, setter=None):
         """
         `insort()` a collection of intervals
         
+        A large collection is merged with the members in a single pass,
+        in O(n + m log n) time for m intervals and n members, rather 
+        than insort()ed one by one (in O(m n) time).
+
         The `setter` keyword argument accepts a function used to 
         extract/construct from the input object an Interval-descendant
         object instance for setting the IntervalList. This is useful
@@ -468,16 +1667,17 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
-        setter = setter or self._setter
-        for interval in sorted(intervals,
-                               key=lambda i: _interval_pos(setter(i))):
-            self.insort(interval, setter=setter)
+        self._update_nodes(intervals, setter, False)
 
 
     def updateleft(self, intervals, setter=None):
         """
         `insortleft()` a collection of intervals
 
+        A large collection is merged with the members in a single pass,
+        in O(n + m log n) time for m intervals and n members, rather 
+        than insortleft()ed one by one (in O(m n) time).
+
         The `setter` keyword argument accepts a function used to 
         extract/construct from the input object an Interval-descendant
         object instance for setting the IntervalList. This is useful
@@ -485,20 +1685,33 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
-        setter = setter or self._setter
-        for interval in sorted(intervals,
-                               key=lambda i: _interval_pos(setter(i))):
-            self.insortleft(interval, setter=setter)
+        self._update_nodes(intervals, setter, True)
         
 
     def pop(self):
         """Pop one item off the right side of IntervalList and return it."""
-        return self._get(_deque.pop(self))
+        if len(self) < 1:
+            raise IndexError("pop from an empty deque")
+        return self._get(self._remove_node(-1))
 
 
     def popleft(self):
         """Pop one item off the left side of IntervalList and return it."""
-        return self._get(_deque.popleft(self))
+        if len(self) < 1:
+            raise IndexError("pop from an empty deque")
+        return self._get(self._remove_node(0))
+
+
+    def reverse(self):
+        """Reverse the IntervalList in place."""
+        self._reset_index()
+        _deque.reverse(self)
+
+
+    def rotate(self, n=1):
+        """Rotate the IntervalList n steps to the right."""
+        self._reset_index()
+        _deque.rotate(self, n)
     
 
     def remove(self, interval, setter=None):
@@ -513,17 +1726,20 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         index = self.find_index(interval, setter=setter)
-        if 0 <= index < self._length:
+        if 0 <= index < len(self):
             del(self[index])
         else:
-            raise ValueError("interval not in deque" % self.__class__.__name__)
+            raise ValueError("%s.remove(x): x not in %s" % (
+                self.__class__.__name__, self.__class__.__name__
+            ))
 
 
     def find_index_beg(self, interval, lower=0, upper=-1, setter=None):
         """
-        Return the start (inclusive) index for a query interval. 
-        IntervalList members may not necessarily overlap the input 
-        interval object.
+        Return the start (inclusive) index for a query interval; i.e.,
+        the index of the first member whose end, or the end of a member
+        before it, is after the query's beg. IntervalList members may 
+        not necessarily overlap the input interval object.
 
         The `lower` and `upper` keywords can be used to restrict 
         the search space when the lower and upper bounds are known.
@@ -537,17 +1753,12 @@ class IntervalList(BaseIntervalCollection, _deque):
         """
         node = self._set(interval, setter)
         length = len(self)
+        maxends = self._get_maxends()
         if not (0 <= lower < length):
             lower = 0
         if not (0 <= upper < length):
             upper = length
-        while lower < upper:
-            middle = (lower + upper) // 2
-            if self._get_node(middle).interval.end <= node.interval.beg:
-                lower = middle + 1
-            else:
-                upper = middle
-        return lower
+        return _bisect_right(maxends, node.interval.beg, lower, upper)
 
     
     def find_index_end(self, interval, lower=0, upper=-1, setter=None):
@@ -567,15 +1778,22 @@ class IntervalList(BaseIntervalCollection, _deque):
         """
         node = self._set(interval, setter)
         length = len(self)
+        if length < 1:
+            return 0
+        begs = self._get_index()[0] if self._coords is not None else None
         if not (0 <= lower < length):
             lower = 0
         if not (0 <= upper < length):
             upper = length
-        if self._get_node(length-1).interval.beg < node.interval.end:
+        beg = self._get_node(length-1).interval.beg \
+            if begs is None else begs[length-1]
+        if beg < node.interval.end:
             return length  # - 1  # <=[makes inclusive]
         while lower < upper:
             middle = (lower + upper) // 2
-            if node.interval.end <= self._get_node(middle).interval.beg:
+            beg = self._get_node(middle).interval.beg \
+                if begs is None else begs[middle]
+            if node.interval.end <= beg:
                 upper = middle
             else:
                 lower = middle + 1
@@ -584,8 +1802,8 @@ class IntervalList(BaseIntervalCollection, _deque):
 
     def find_index(self, interval, lower=0, upper=-1, setter=None):
         """
-        Return the index for a query interval, or -1 if it doesn't
-        exist.
+        Return the index of the first member equal to a query interval,
+        or -1 if it doesn't exist.
 
         The `lower` and `upper` keywords can be used to restrict 
         the search space when the lower and upper bounds are known.
@@ -603,14 +1821,23 @@ class IntervalList(BaseIntervalCollection, _deque):
             lower = 0
         if not (0 <= upper < length):
             upper = length
+        key = _node_pos(node)
+        stop = upper
         while lower < upper:
             middle = (lower + upper) // 2
-            if self._get_node(middle).interval == node.interval:
-                return middle
-            elif self._get_node(middle).interval < node.interval:
+            if _node_pos(self._get_node(middle)) < key:
                 lower = middle + 1
             else:
-                upper = middle - 1
+                upper = middle
+        # Bisect to the first member of the query's sort key; those of
+        # the same key may not be equal (e.g., of other namespaces), so
+        # they are tested in order:
+        for index in range(lower, stop):
+            member = self._get_node(index)
+            if member.interval == node.interval:
+                return index
+            if _node_pos(member) != key:
+                break
         return -1
     
     
@@ -632,6 +1859,15 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         node = self._set(interval, setter)
+        if self._cache is not None:
+            return self._cached(
+                lambda: self._find_index_nearest(node, lower, upper),
+                'nearest', [node], lower, upper
+            )
+        return self._find_index_nearest(node, lower, upper)
+
+
+    def _find_index_nearest(self, node, lower, upper):
         length = len(self)
         distance = _INF
         if not (0 <= lower < length):
@@ -667,13 +1903,75 @@ class IntervalList(BaseIntervalCollection, _deque):
         return lower
 
 
-    def find_overlap_index_beg(self, interval, lower=0, upper=-1, setter=None):
-        """
-        Return the (inclusive) index of the left-most overlapping
-        IntervalList member, or -1 if none.
-
-        The `lower` and `upper` keywords can be used to restrict 
-        the search space when the lower and upper bounds are known.
+    def _find_index_empty(self, lower=0, upper=-1):
+        # Return the index of the first empty member between the lower
+        # and upper indexes: members are sorted by (isempty(), beg, end),
+        # so the empty ones (if any) follow all the others.
+        length = len(self)
+        if upper < 0 or upper > length:
+            upper = length
+        if lower >= upper or not self._get_node(upper-1).interval.isempty():
+            return upper
+        while lower < upper:
+            middle = (lower + upper) // 2
+            if self._get_node(middle).interval.isempty():
+                upper = middle
+            else:
+                lower = middle + 1
+        return lower
+
+
+    def _iter_overlap_indexes(self, node, lower=0, upper=-1):
+        # Yield the indexes of the members overlapping a query node, in
+        # order. Non-empty members are scanned from the first whose 
+        # running max end reaches the query's beg, until they begin 
+        # after the query's end, skipping whole blocks that end before
+        # it; the empty members sorted after them (if any), which may
+        # still overlap the query, are all tested.
+        length = len(self)
+        lower = max(lower, 0)
+        if upper < 0 or upper > length:
+            upper = length
+        if lower >= upper:
+            return
+        query = node.interval
+        tail = self._find_index_empty(lower, upper)
+        index = _bisect_left(self._get_maxends(), query.beg, lower, tail)
+        begs, ends = self._get_index()
+        exact = self._coords is not None
+        if exact:
+            bounds = _int_bounds(query, True)
+            if bounds is None or query.namespace != self.namespace:
+                return
+            beg, end = bounds
+        else:
+            beg = query.beg
+            end = query.end
+        size = self._blocksize
+        get_node = self._get_node
+        while index < tail and begs[index] <= query.end:
+            if index % size == 0 and self._get_blockmax(index // size) < beg:
+                index += size
+                continue
+            if ends[index] >= beg and (
+                begs[index] <= end if exact else 
+                get_node(index).interval.isoverlapping(query)
+            ):
+                yield index
+            index += 1
+        overlaps = self._overlap_test(node)
+        for index in range(tail, upper):
+            if overlaps(index):
+                yield index
+
+
+    def find_overlap_index_beg(self, interval, lower=0, upper=-1, setter=None):
+        """
+        Return the (inclusive) index of the left-most overlapping
+        IntervalList member, or -1 if none.
+
+        The `lower` and `upper` keywords can be used to restrict 
+        the search space when the lower and upper bounds are known.
 
         The `setter` keyword argument accepts a function used to 
         extract/construct from the input object an Interval-descendant
@@ -683,11 +1981,7 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         node = self._set(interval, setter)
-        index = self.find_index_beg(node.interval, lower, upper, remit)
-        return index \
-            if 0 <= index < len(self) and \
-               self._get_node(index).interval.isoverlapping(node.interval) \
-            else -1
+        return next(self._iter_overlap_indexes(node, lower, upper), -1)
 
 
     def find_overlap_index_end(self, interval, lower=0, upper=-1, setter=None):
@@ -706,11 +2000,10 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         node = self._set(interval, setter)
-        index = self.find_index_end(node.interval, lower, upper, remit)
-        return index \
-            if 0 < index <= len(self) and \
-               self._get_node(index-1).interval.isoverlapping(node.interval) \
-            else -1
+        index = -1
+        for index in self._iter_overlap_indexes(node, lower, upper):
+            pass
+        return index + 1 if index >= 0 else -1
     
 
     def find_overlap_index_nearest(self, interval, lower=0, upper=-1, setter=None):
@@ -732,8 +2025,7 @@ class IntervalList(BaseIntervalCollection, _deque):
         node = self._set(interval, setter)
         index = self.find_index_nearest(node.interval, lower, upper, remit)
         return index \
-            if 0 <= index < len(self) and \
-               self._get_node(index).interval.isoverlapping(node.interval) \
+            if 0 <= index < len(self) and self._overlap_test(node)(index) \
             else -1
 
 
@@ -754,15 +2046,16 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         nodes = map(lambda i: self._set(i, setter), _listify(intervals))
-        length = len(self)
-        upper = 0
-        for node in _filter_nested(nodes, sort=_node_pos_longest):
-            index = self.find_index_beg(node.interval, lower=upper, setter=remit)
-            while index < length and \
-                  self._get_node(index).interval.isoverlapping(node.interval):
+        # merge the indices of each query, produced in order, skipping
+        # those of members overlapping more than one query:
+        previous = -1
+        for index in _heapmerge(*[
+            self._iter_overlap_indexes(node)
+            for node in _filter_nested(nodes, sort=_node_pos_longest)
+        ]):
+            if index != previous:
                 yield index
-                index += 1
-            upper = index
+            previous = index
 
             
     def find_overlap_index_bounds(self, intervals, setter=None):
@@ -778,18 +2071,12 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
-        nodes = map(lambda i: self._set(i, setter), _listify(intervals))
-        length = len(self)
         lower = -1
         upper = -1
-        for node in _filter_nested(nodes, sort=_node_pos_longest):
-            index = self.find_index_beg(node.interval, lower=upper, setter=remit)
-            while index < length and \
-                  self._get_node(index).interval.isoverlapping(node.interval):
-                if lower < 0:
-                    lower = index
-                index += 1
-                upper = index
+        for index in self.find_overlap_index_range(intervals, setter):
+            if lower < 0:
+                lower = index
+            upper = index + 1
         return lower, upper
 
     
@@ -806,16 +2093,10 @@ class IntervalList(BaseIntervalCollection, _deque):
         one) argument and outputs a single Interval-descendant object.
         """
         nodes = map(lambda i: self._set(i, setter), _listify(intervals))
-        length = len(self)
         overlap_length = 0
         for node in sorted(nodes, key=_node_pos):
-            index = self.find_overlap_index_beg(node.interval, setter=remit)
-            if index < 0:
-                continue
-            while index < length and \
-                  self._get_node(index).interval.isoverlapping(node.interval):
+            for index in self._iter_overlap_indexes(node):
                 overlap_length += self._get_node(index).interval.overlap_length(node.interval)
-                index += 1
         return overlap_length
     
 
@@ -864,17 +2145,12 @@ class IntervalList(BaseIntervalCollection, _deque):
 
         #nr = not pairwise
         #visited = set()
-        length = len(self)
         for node in nodes:
-            index = self.find_overlap_index_beg(node.interval, setter=remit)
-            while ((0 <= index < length) and
-                   (self._get_node(index).interval.isoverlapping(node.interval))):
+            for index in self._iter_overlap_indexes(node):
                 # if nr and hash(self._get_node(index).instance) in visited:
-                #     index += 1
                 #     continue
                 # visited.add(hash(self._get_node(index).instance))
                 yield (node.instance, self._get_node(index).instance)
-                index += 1
         
     
     def find_overlaps(self, intervals, setter=None):
@@ -890,9 +2166,42 @@ class IntervalList(BaseIntervalCollection, _deque):
         members of IntervalList. The function must accept one (and only
         one) argument and outputs a single Interval-descendant object.
         """
+        if self._cache is not None:
+            nodes = list(_filter_nested(
+                map(lambda i: self._set(i, setter), _listify(intervals)),
+                sort=_node_pos_longest
+            ))
+            queries = [n.interval for n in nodes]
+            return iter(self._cached(
+                lambda: [self[i] for i in self.find_overlap_index_range(queries, remit)],
+                'overlaps', nodes
+            ))
         return (self[index] for index in self.find_overlap_index_range(intervals, setter=setter))
 
 
+    def count_overlaps(self, intervals, setter=None):
+        """
+        self.count_overlaps(intervals) -> int
+
+        Return the number of IntervalList members overlapping one or 
+        more query interval objects, same as counting those 
+        `find_overlaps()` produces.
+
+        >>> L = IntervalList([Interval("Chr", 0, 100), Interval("Chr", 50, 60)])
+        >>> L.count_overlaps(Interval("Chr", 55, 56))
+        2
+        """
+        nodes = list(_filter_nested(
+            map(lambda i: self._set(i, setter), _listify(intervals)),
+            sort=_node_pos_longest
+        ))
+        queries = [n.interval for n in nodes]
+        count = lambda: sum(1 for i in self.find_overlap_index_range(queries, remit))
+        if self._cache is not None:
+            return self._cached(count, 'count', nodes)
+        return count()
+
+
     find_overlap_index_start = find_overlap_index_beg
 
     find_overlap_index_stop = find_overlap_index_end
@@ -905,15 +2214,649 @@ class IntervalList(BaseIntervalCollection, _deque):
 
     
 
+class BlockedIntervalList(IntervalList):
+    """
+    An IntervalList stored as a list of sorted blocks of bounded size,
+    with an index of the blocks, in the manner of the SortedList of:
+
+      Jenks G. Python Sorted Containers. J Open Source Softw. 2018
+      3(24):1081. doi: 10.21105/joss.01081.
+
+    Inserting or removing a member only moves the members of its block 
+    (of `_load` to 2 * `_load` members), so that `insort()`, 
+    `insortleft()`, `update()`, `remove()`, and the `find_index_*()` 
+    and overlap searches require O(log n) (amortized) time, rather than
+    the O(n) inserts of a deque; blocks are split and joined as they 
+    grow and shrink. Each block keeps the last member's sort key, for 
+    bisecting the blocks, and the running maximum of its members' ends,
+    as do the blocks themselves, for overlap searches to skip the blocks
+    ending before the query. A positional index (a Fenwick tree of the 
+    blocks' lengths) locates the i-th member.
+
+    The members are kept in sorted order: `append()`, `insert()`, 
+    `extend()` and item assignment raise ValueError if they would break
+    it, as do `reverse()` and `rotate()`.
+
+    >>> I = IntervalList([Interval("Chr", 40, 250)], backend='blocked')
+    >>> I.insort(Interval("Chr", 0, 50))
+    >>> I
+    BlockedIntervalList([Interval(Chr:0-50), Interval(Chr:40-250)])
+    >>> I.find_overlap_index_bounds(Interval("Chr", 45, 60))
+    (0, 2)
+    """
+    def __init__(self, intervals=[], setter=remit, coords=None, backend='blocked'):
+        self._lists = []
+        self._keys = []
+        self._runs = []
+        self._tops = []
+        self._offsets = None
+        self._length = 0
+        IntervalList.__init__(self, intervals, setter, coords, backend)
+
+
+    # blocks hold _load to 2 * _load members; smaller ones are joined:
+    _load = 500
+
+
+    def _get_index(self):
+        # The blocks are their own search index; members are validated
+        # as they are added.
+        return None
+
+
+    def _reset_index(self):
+        # only versions the members; their blocks are kept up to date
+        self._version += 1
+
+
+    def _check_namespace(self, nodes, namespace=None):
+        # In integer coordinate mode, members must share one namespace:
+        # that of the first node, or the namespace given.
+        if self._coords is None:
+            return
+        for node in nodes:
+            if namespace is None:
+                namespace = node.interval.namespace
+            elif node.interval.namespace != namespace:
+                raise ValueError(
+                    "mixed-namespace IntervalList in integer coordinate mode"
+                )
+
+
+    def _check_order(self, nodes, before=None, after=None):
+        # Raise ValueError unless the sorted order of the members is
+        # kept by placing the nodes, in order, between the nodes before
+        # and after them (or None).
+        previous = _node_pos(before) if before is not None else None
+        for node in _chain(nodes, [after] if after is not None else []):
+            key = _node_pos(node)
+            if previous is not None and key < previous:
+                raise ValueError(
+                    "%s members must be kept in sorted order" 
+                    % self.__class__.__name__
+                )
+            previous = key
+
+
+    @staticmethod
+    def _run(members):
+        # Running maximum of the members' ends; nan ends are skipped.
+        run = []
+        maxend = -_INF
+        for node in members:
+            if node.interval.end > maxend:
+                maxend = node.interval.end
+            run.append(maxend)
+        return run
+
+
+    def _retop(self, block):
+        # Recompute the running maximum end of the blocks from a block
+        # on, until one is unchanged, as are all after it.
+        tops = self._tops
+        top = tops[block-1] if block > 0 else -_INF
+        for i in range(block, len(tops)):
+            end = self._runs[i][-1]
+            if end > top:
+                top = end
+            if tops[i] == top:
+                break
+            tops[i] = top
+
+
+    def _set_nodes(self, nodes):
+        nodes = list(nodes)
+        self._check_namespace(nodes)
+        self._version += 1
+        load = self._load
+        self._lists = [nodes[i:i+load] for i in range(0, len(nodes), load)]
+        self._keys = [_node_pos(members[-1]) for members in self._lists]
+        self._runs = [self._run(members) for members in self._lists]
+        self._tops = [None] * len(self._lists)
+        self._offsets = None
+        self._length = len(nodes)
+        if self._tops:
+            self._retop(0)
+
+
+    def _get_offsets(self):
+        # Build the Fenwick tree of the blocks' lengths on first use; 
+        # splitting or joining blocks resets it to None.
+        tree = self._offsets
+        if tree is None:
+            tree = [0]
+            tree.extend(map(len, self._lists))
+            size = len(tree)
+            for i in range(1, size):
+                j = i + (i & -i)
+                if j < size:
+                    tree[j] += tree[i]
+            self._offsets = tree
+        return tree
+
+
+    def _offset(self, block):
+        # Return the index of the first member of a block.
+        if block == 0:
+            return 0
+        tree = self._get_offsets()
+        index = 0
+        while block > 0:
+            index += tree[block]
+            block -= block & -block
+        return index
+
+
+    def _resize(self, block, delta):
+        # Record a change of a block's length in the Fenwick tree.
+        self._version += 1
+        self._length += delta
+        tree = self._offsets
+        if tree is not None:
+            block += 1
+            while block < len(tree):
+                tree[block] += delta
+                block += block & -block
+
+
+    def _locate(self, index):
+        # Return the (block, offset) of the member at an index.
+        length = self._length
+        if index < 0:
+            index += length
+        if not (0 <= index < length):
+            raise IndexError("%s index out of range" % self.__class__.__name__)
+        if index < len(self._lists[0]):
+            return 0, index
+        tree = self._get_offsets()
+        block = 0
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            nxt = block + step
+            if nxt < len(tree) and tree[nxt] <= index:
+                index -= tree[nxt]
+                block = nxt
+            step >>= 1
+        return block, index
+
+
+    def _locate_key(self, key, left):
+        # Return the (block, offset) of the sorted position of a key, 
+        # to the left (or right) of the identical members.
+        keys = self._keys
+        block = (_bisect_left if left else _bisect_right)(keys, key)
+        if block == len(keys):
+            block -= 1
+            return block, len(self._lists[block])
+        members = self._lists[block]
+        lower = 0
+        upper = len(members)
+        while lower < upper:
+            middle = (lower + upper) // 2
+            if (_node_pos(members[middle]) < key) if left else \
+               not (key < _node_pos(members[middle])):
+                lower = middle + 1
+            else:
+                upper = middle
+        return block, lower
+
+
+    def _split(self, block):
+        # Split a block holding more than 2 * _load members in halves.
+        members = self._lists[block]
+        half = len(members) // 2
+        self._lists[block:block+1] = [members[:half], members[half:]]
+        self._keys.insert(block, _node_pos(members[half-1]))
+        run = self._runs[block]
+        self._runs[block:block+1] = [run[:half], self._run(members[half:])]
+        self._tops.insert(block, None)
+        self._offsets = None
+        self._retop(block)
+
+
+    def _join(self, block):
+        # Join a block holding fewer than _load / 2 members with the one 
+        # after (or before) it, splitting the result if too large.
+        if block == len(self._lists) - 1:
+            block -= 1
+        members = self._lists[block] + self._lists[block+1]
+        self._lists[block:block+2] = [members]
+        self._keys[block:block+2] = [self._keys[block+1]]
+        self._runs[block:block+2] = [self._run(members)]
+        self._tops[block:block+2] = [self._tops[block+1]]
+        self._offsets = None
+        if len(members) > 2 * self._load:
+            self._split(block)
+
+
+    def _insert_node(self, index, node):
+        length = self._length
+        if index < 0:
+            index = max(0, index + length)
+        index = min(index, length)
+        if not length:
+            self._set_nodes([node])
+            return
+        if index == length:
+            block = len(self._lists) - 1
+            offset = len(self._lists[block])
+        else:
+            block, offset = self._locate(index)
+        members = self._lists[block]
+        self._check_order(
+            [node],
+            members[offset-1] if offset > 0 else 
+            self._lists[block-1][-1] if block > 0 else None,
+            members[offset] if index < length else None
+        )
+        self._check_namespace([node], self.namespace)
+        members.insert(offset, node)
+        if offset == len(members) - 1:
+            self._keys[block] = _node_pos(node)
+        run = self._runs[block]
+        end = node.interval.end
+        maxend = run[offset-1] if offset > 0 else -_INF
+        run.insert(offset, end if end > maxend else maxend)
+        for i in range(offset + 1, len(run)):
+            if not run[i] < end:
+                break
+            run[i] = end
+        self._resize(block, 1)
+        self._retop(block)
+        if len(members) > 2 * self._load:
+            self._split(block)
+
+
+    def _remove_node(self, index):
+        block, offset = self._locate(index)
+        members = self._lists[block]
+        node = members.pop(offset)
+        self._resize(block, -1)
+        if not members:
+            del self._lists[block]
+            del self._keys[block]
+            del self._runs[block]
+            del self._tops[block]
+            self._offsets = None
+            if block < len(self._tops):
+                self._retop(block)
+            return node
+        if offset == len(members):
+            self._keys[block] = _node_pos(members[-1])
+        run = self._runs[block]
+        del run[offset]
+        maxend = run[offset-1] if offset > 0 else -_INF
+        for i in range(offset, len(run)):
+            if members[i].interval.end > maxend:
+                maxend = members[i].interval.end
+            if run[i] == maxend:
+                break
+            run[i] = maxend
+        self._retop(block)
+        if len(members) < self._load // 2 and len(self._lists) > 1:
+            self._join(block)
+        return node
+
+
+    def _overlap_test(self, node):
+        get_node = self._get_node
+        return lambda index: \
+            get_node(index).interval.isoverlapping(node.interval)
+
+
+    def _set_node(self, index, node):
+        block, offset = self._locate(index)
+        index = self._offset(block) + offset
+        self._check_order(
+            [node],
+            self._get_node(index - 1) if index > 0 else None,
+            self._get_node(index + 1) if index + 1 < self._length else None
+        )
+        if self._length > 1:
+            self._check_namespace([node], self.namespace)
+        members = self._lists[block]
+        members[offset] = node
+        self._version += 1
+        self._keys[block] = _node_pos(members[-1])
+        self._runs[block] = self._run(members)
+        self._tops[block] = None
+        self._retop(block)
+
+
+    def _get_node(self, index):
+        block, offset = self._locate(index)
+        return self._lists[block][offset]
+
+
+    def __imul__(self, n):
+        self._set_nodes(sorted(list(self._iter_nodes()) * n, key=_node_pos))
+        return self
+
+
+    def __add__(self, intervals):
+        other = self.copy()
+        other.update(intervals)
+        return other
+
+
+    def __mul__(self, n):
+        other = self.copy()
+        other *= n
+        return other
+
+
+    __rmul__ = __mul__
+
+
+    def __contains__(self, interval):
+        node = self._set(interval)
+        return any(node == other for other in self._iter_nodes())
+
+
+    def __reversed__(self):
+        return (
+            self._get(n) for members in reversed(self._lists) 
+            for n in reversed(members)
+        )
+
+
+    def _iter_nodes(self):
+        return _chain.from_iterable(self._lists)
+
+
+    _iter_sorted_nodes = _iter_nodes
+
+    _iter_top_nodes = _iter_nodes
+
+
+    def _transformed(self, nodes, resort):
+        IntervalList._transformed(self, nodes, resort)
+        if not resort:
+            # members keep their blocks; only the blocks' sort keys and
+            # running maximums change
+            self._keys = [_node_pos(members[-1]) for members in self._lists]
+            self._runs = [self._run(members) for members in self._lists]
+            self._tops = [None] * len(self._lists)
+            if self._tops:
+                self._retop(0)
+
+
+    def _iter_containers(self):
+        yield 'sublists', self
+        yield 'sublists', self._lists
+        yield 'index', self._keys
+        yield 'index', self._runs
+        yield 'index', self._tops
+        if self._offsets is not None:
+            yield 'index', self._offsets
+
+
+    def __len__(self):
+        return self._length
+
+
+    # deque compares its own (empty) storage:
+
+    def __eq__(self, other):
+        return list(self) == list(other) \
+            if isinstance(other, _deque) else NotImplemented
+
+
+    def __ne__(self, other):
+        return list(self) != list(other) \
+            if isinstance(other, _deque) else NotImplemented
+
+
+    def __lt__(self, other):
+        return list(self) < list(other) \
+            if isinstance(other, _deque) else NotImplemented
+
+
+    def __le__(self, other):
+        return list(self) <= list(other) \
+            if isinstance(other, _deque) else NotImplemented
+
+
+    def __gt__(self, other):
+        return list(self) > list(other) \
+            if isinstance(other, _deque) else NotImplemented
+
+
+    def __ge__(self, other):
+        return list(self) >= list(other) \
+            if isinstance(other, _deque) else NotImplemented
+
+
+    __hash__ = None
+
+
+    def count(self, interval, setter=None):
+        """Same as `IntervalList.count()`."""
+        node = self._set(interval, setter)
+        return sum(1 for other in self._iter_nodes() if node == other)
+
+
+    def extend(self, intervals, setter=None):
+        """
+        Same as `IntervalList.extend()`; raises ValueError unless the 
+        intervals are sorted, and follow the members.
+        """
+        nodes = [self._set_member(i, setter) for i in intervals]
+        self._check_order(nodes, self._get_node(-1) if self._length else None)
+        if not self._length:
+            self._set_nodes(nodes)
+            return
+        for node in nodes:
+            self._insert_node(self._length, node)
+
+
+    def extendleft(self, intervals, setter=None):
+        """
+        Same as `IntervalList.extendleft()`; raises ValueError unless 
+        the intervals are reverse sorted, and precede the members.
+        """
+        nodes = [self._set_member(i, setter) for i in intervals]
+        nodes.reverse()
+        self._check_order(nodes, None, self._get_node(0) if self._length else None)
+        self._set_nodes(nodes + list(self._iter_nodes()))
+
+
+    def _insort_index(self, node, left, lower=0, upper=-1):
+        length = self._length
+        if not length:
+            return 0
+        if not (0 <= lower < length):
+            lower = 0
+        if not (0 <= upper < length):
+            upper = length
+        block, offset = self._locate_key(_node_pos(node), left)
+        return max(min(self._offset(block) + offset, upper), lower)
+
+
+    def reverse(self):
+        """Raises ValueError: members are kept in sorted order."""
+        raise ValueError(
+            "%s members must be kept in sorted order, cannot reverse()"
+            % self.__class__.__name__
+        )
+
+
+    def rotate(self, n=1):
+        """Raises ValueError: members are kept in sorted order."""
+        raise ValueError(
+            "%s members must be kept in sorted order, cannot rotate()"
+            % self.__class__.__name__
+        )
+
+
+    def find_index_beg(self, interval, lower=0, upper=-1, setter=None):
+        """Same as `IntervalList.find_index_beg()`, bisecting the blocks."""
+        node = self._set(interval, setter)
+        length = self._length
+        if not (0 <= lower < length):
+            lower = 0
+        if not (0 <= upper < length):
+            upper = length
+        beg = node.interval.beg
+        block = _bisect_right(self._tops, beg)
+        index = length if block == len(self._tops) else \
+            self._offset(block) + _bisect_right(self._runs[block], beg)
+        return max(min(index, upper), lower)
+
+
+    def find_index_end(self, interval, lower=0, upper=-1, setter=None):
+        """Same as `IntervalList.find_index_end()`, bisecting the blocks."""
+        node = self._set(interval, setter)
+        length = self._length
+        if length < 1:
+            return 0
+        if not (0 <= lower < length):
+            lower = 0
+        if not (0 <= upper < length):
+            upper = length
+        end = node.interval.end
+        if self._get_node(length-1).interval.beg < end:
+            return length
+        lists = self._lists
+        low = 0
+        high = len(lists) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if end <= lists[middle][-1].interval.beg:
+                high = middle
+            else:
+                low = middle + 1
+        members = lists[low]
+        offset = 0
+        high = len(members)
+        while offset < high:
+            middle = (offset + high) // 2
+            if end <= members[middle].interval.beg:
+                high = middle
+            else:
+                offset = middle + 1
+        return max(min(self._offset(low) + offset, upper), lower)
+
+
+    def find_index(self, interval, lower=0, upper=-1, setter=None):
+        """Same as `IntervalList.find_index()`, bisecting the blocks."""
+        node = self._set(interval, setter)
+        length = self._length
+        if not length:
+            return -1
+        if not (0 <= lower < length):
+            lower = 0
+        if not (0 <= upper < length):
+            upper = length
+        key = _node_pos(node)
+        block, offset = self._locate_key(key, True)
+        for index in range(max(self._offset(block) + offset, lower), upper):
+            member = self._get_node(index)
+            if member.interval == node.interval:
+                return index
+            if _node_pos(member) != key:
+                break
+        return -1
+
+
+    def _iter_overlap_indexes(self, node, lower=0, upper=-1):
+        # Same as IntervalList._iter_overlap_indexes(), by block: the 
+        # scan starts in the first block whose running max end reaches
+        # the query's beg, and skips the blocks that end before it.
+        length = self._length
+        lower = max(lower, 0)
+        if upper < 0 or upper > length:
+            upper = length
+        if lower >= upper:
+            return
+        query = node.interval
+        exact = self._coords is not None
+        if exact:
+            bounds = _int_bounds(query, True)
+            if bounds is None or query.namespace != self.namespace:
+                return
+            beg, end = bounds
+        else:
+            beg = query.beg
+            end = query.end
+        lists = self._lists
+        runs = self._runs
+        tail = empty = self._find_index_empty(lower, upper)
+        block = _bisect_left(self._tops, beg)
+        if block < len(lists):
+            offset = _bisect_left(runs[block], beg)
+            first = self._offset(block)
+            if first + offset < lower:
+                block, offset = self._locate(lower)
+                first = lower - offset
+            while first + offset < tail:
+                members = lists[block]
+                if members[offset].interval.beg > query.end:
+                    break
+                if runs[block][-1] >= beg:
+                    for offset in range(offset, min(len(members), tail - first)):
+                        interval = members[offset].interval
+                        if interval.beg > query.end:
+                            tail = 0
+                            break
+                        if interval.end >= beg and (
+                            interval.beg <= end if exact else 
+                            interval.isoverlapping(query)
+                        ):
+                            yield first + offset
+                first += len(members)
+                block += 1
+                offset = 0
+        overlaps = self._overlap_test(node)
+        for index in range(empty, upper):
+            if overlaps(index):
+                yield index
+
+
+
+_LIST_BACKENDS = {
+    'deque': IntervalList,
+    'blocked': BlockedIntervalList,
+}
+
+
+def _get_list_backend(backend):
+    try:
+        return _LIST_BACKENDS[backend]
+    except KeyError:
+        raise ValueError("unknown IntervalList backend: %r" % (backend,))
+
+
+
 class _Sublist(BaseIntervalCollection, _deque):
-    def __init__(self, nodes=None, index=-1, setter=remit):
+    def __init__(self, nodes=None, setter=remit, owner=None):
         BaseIntervalCollection.__init__(self, setter)
         if nodes is None:
             _deque.__init__(self)
         else:
             _deque.__init__(self, nodes)
         self.length = len(self)
-        self.index = index
+        self.owner = owner
 
 
     def __delitem__(self, index):
@@ -1029,7 +2972,11 @@ class _Sublist(BaseIntervalCollection, _deque):
             upper = self.length
         while lower < upper:
             middle = (lower + upper) // 2
-            if self[middle].interval.end <= node.interval.beg:
+            # members ending where the query begins may still overlap
+            # it, if the query is closed at that end:
+            if self[middle].interval.end < node.interval.beg or \
+               (self[middle].interval.end == node.interval.beg and \
+                not node.interval.isoverlapping(self[middle].interval)):
                 lower = middle + 1
             else:
                 upper = middle
@@ -1160,7 +3107,7 @@ class _Sublist(BaseIntervalCollection, _deque):
         index = self.find_index_beg(node, lower, upper)
         return index \
             if 0 <= index < self.length and \
-               self[index].interval.isoverlapping(node.interval) \
+               node.interval.isoverlapping(self[index].interval) \
             else -1
 
 
@@ -1329,54 +3276,493 @@ class _Sublist(BaseIntervalCollection, _deque):
 
     
     
-class IntervalSet(BaseIntervalCollection):
+class BaseIntervalIndex(object):
+    """
+    Base class of the query indexes that `IntervalSet` can search in
+    place of its Nested Containment List, selected with its `backend`
+    keyword argument. An index is built once from the IntervalSet's
+    _Node objects, sorted by (beg, -end), and is never modified: any
+    update to the IntervalSet discards it and the next query builds
+    a new one.
+
+    In an IntervalSet's integer coordinate mode, the index is built
+    with the `typecode` of the mode's array.array storage ('q' or 'i'),
+    and its search compares the query's integer bounds (see 
+    `_int_bounds()`) with the members' coordinates only, without
+    calling `isoverlapping()`. Subclasses that do not accept `typecode`
+    are searched in the generic mode.
     """
-    Implements and extends the Nested Containment List algorithm
-    described in:
-    
-      Alekseyenko AV, Lee CJ. Nested Containment List (IntervalSet): a new
-      algorithm for accelerating interval query of genome alignment
-      and interval databases. Bioinformatics. 2007 23(11):1386-1393. 
-      doi: 10.1093/bioinformatics/btl647. PMID: 17234640.
 
-    The constructor code is ported from:
-      https://github.com/biocore-ntnu/ncls/blob/master/ncls/src/intervaldb.c
+    def __init__(self, nodes, typecode=None):
+        raise NotImplementedError('%s.__init__()' % self.__class__.__name__)
 
-    This class extends the original IntervalSet algorithm to include 
-    `insert()` and `remove()` methods, as well as some useful binary
-    searches.
 
-    Build a Nested Containment List:
+    def __len__(self):
+        raise NotImplementedError('%s.__len__()' % self.__class__.__name__)
 
-    >>> intervals = [
-    ...    Interval("Chr1", 10, 100),
-    ...    Interval("Chr1", 200,500),
-    ...    Interval("Chr1",  0, 150)
-    ... ]
-    >>> ncl = IntervalSet(intervals)
 
-    Find intervals overlapping a query interval:
+    def find(self, node):
+        """
+        Return a generator object producing the indexed _Node objects
+        overlapping the query _Node object, in sorted order.
+        """
+        raise NotImplementedError('%s.find()' % self.__class__.__name__)
 
-    >>> overlaps = list(ncl.find_overlaps(Interval("Chr1", 75, 120)))
-    [Interval(Chr1:0-150), Interval(Chr1:10-100)]
 
+
+class IntervalTreeIndex(BaseIntervalIndex):
+    """
+    Implements the implicit augmented interval tree of cgranges:
+
+      Li H. cgranges: a C/C++ and Python library for genomic interval
+      queries. https://github.com/lh3/cgranges
+
+    Members are stored in an array sorted by `beg`, which is read as a
+    perfectly balanced binary search tree: the node at index i of level
+    k has its children at i -/+ 2**(k-1). Each node is augmented with
+    the maximum `end` of its subtree, so that a query skips subtrees
+    ending before it. Unlike the Nested Containment List, the search
+    cost does not depend on how intervals nest: a query takes O(log n
+    + k) time for k hits, even among overlapping, non-nested members.
+
+    >>> ncls = IntervalSet([Interval("Chr1", 0, 150)], backend='tree')
+    >>> list(ncls.overlaps(Interval("Chr1", 75, 120)))
+    [Interval(Chr1:0-150)]
     """
 
-    # Constructors
-    # ============
-    def __init__(self, intervals=[], setter=remit):
-        """
-        Multiple references to the same object(s) are silently ignored.
+    def __init__(self, nodes, typecode=None):
+        nodes = list(nodes)
+        begs = [n.interval.beg for n in nodes]
+        ends = [n.interval.end for n in nodes]
+        maxends = list(ends)
+        length = len(nodes)
+        if typecode is not None:
+            begs = _array(typecode, begs)
+            ends = _array(typecode, ends)
+            maxends = _array(typecode, maxends)
+
+        # Augment the implicit tree bottom-up, level by level. Nodes
+        # missing from the right edge of an incomplete tree borrow the
+        # max end of the last node of the level below (`last`).
+        last_i = 0
+        last = ends[0] if length else 0
+        for i in range(0, length, 2):
+            last_i = i
+            last = maxends[i]
+        k = 1
+        while (1 << k) <= length:
+            x = 1 << (k - 1)
+            for i in range((x << 1) - 1, length, x << 2):
+                left = maxends[i - x]
+                right = maxends[i + x] if i + x < length else last
+                maxends[i] = max(maxends[i], left, right)
+            last_i = last_i - x if (last_i >> k) & 1 else last_i + x
+            if last_i < length and maxends[last_i] > last:
+                last = maxends[last_i]
+            k += 1
+
+        self._nodes = nodes
+        self._begs = begs
+        self._ends = ends
+        self._maxends = maxends
+        self._length = length
+        self._level = k - 1
+        self._namespace = nodes[0].interval.namespace if nodes else None
+        self._typecode = typecode
 
-        The `setter` keyword argument accepts a function used to 
-        extract/construct from the input object an Interval-descendant
-        object instance for querying the IntervalSet. This is useful for
-        when the query is not of the same object class as the members 
+
+    def __len__(self):
+        return self._length
+
+
+    def find(self, node):
+        if self._length < 1 or node.interval.namespace != self._namespace:
+            return
+        # Bounds are compared inclusively to prune the search; the hits
+        # are then checked with isoverlapping(), exactly as the NCLS,
+        # unless the bounds are exact integer bounds.
+        exact = self._typecode is not None
+        if exact:
+            bounds = _int_bounds(
+                node.interval, isinstance(node.interval, LeftClosedInterval)
+            )
+            if bounds is None:
+                return
+            beg, end = bounds
+        else:
+            beg = node.interval.beg
+            end = node.interval.end
+        nodes = self._nodes
+        begs = self._begs
+        ends = self._ends
+        maxends = self._maxends
+        length = self._length
+
+        # Per-query stack of [level, index, left child visited] entries:
+        level = self._level
+        stack = [(level, (1 << level) - 1, False)]
+        while stack:
+            k, x, visited = stack.pop()
+            if k <= 3:
+                # Small subtree, scan its members in order:
+                i = x >> k << k
+                upper = min(i + (1 << (k + 1)) - 1, length)
+                while i < upper and begs[i] <= end:
+                    if beg <= ends[i] and (exact or
+                       node.interval.isoverlapping(nodes[i].interval)):
+                        yield nodes[i]
+                    i += 1
+            elif not visited:
+                stack.append((k, x, True))
+                y = x - (1 << (k - 1))
+                if y >= length or maxends[y] >= beg:
+                    stack.append((k - 1, y, False))
+            elif x < length and begs[x] <= end:
+                if beg <= ends[x] and (exact or
+                   node.interval.isoverlapping(nodes[x].interval)):
+                    yield nodes[x]
+                stack.append((k - 1, x + (1 << (k - 1)), False))
+
+
+
+class AIListIndex(BaseIntervalIndex):
+    """
+    Implements the Augmented Interval List described in:
+
+      Feng J, Ratan A, Sheffield NC. Augmented Interval List: a novel
+      data structure for efficient genomic interval search. 
+      Bioinformatics. 2019 35(23):4907-4911.
+      doi: 10.1093/bioinformatics/btz407. PMID: 31070698.
+
+    Members sorted by `beg` are decomposed into a few components: a
+    member covering (i.e. ending after) at least half of the next 
+    `coverage` members is moved to the next component, up to
+    `components` components or until fewer than `minimum` members are
+    left. Each component stores the running maximum `end` of its 
+    members, so a query scans backward from its last member beginning
+    before the query ends, and stops as soon as no earlier member can
+    reach it. Long intervals mixed with short ones, as in high-coverage
+    read alignments, end up in small components of their own instead
+    of lengthening every scan.
+
+    >>> ncls = IntervalSet([Interval("Chr1", 0, 150)], backend='ailist')
+    >>> list(ncls.overlaps(Interval("Chr1", 75, 120)))
+    [Interval(Chr1:0-150)]
+    """
+
+    coverage = 20
+    components = 10
+    minimum = 64
+
+    def __init__(self, nodes, typecode=None):
+        nodes = list(nodes)
+        self._rank = dict((id(n), r) for r,n in enumerate(nodes))
+        self._length = len(nodes)
+        self._namespace = nodes[0].interval.namespace if nodes else None
+        self._typecode = typecode
+
+        coverage = self.coverage
+        half = coverage // 2
+        self._components = []
+        while nodes:
+            if len(nodes) < self.minimum or \
+               len(self._components) + 1 >= self.components:
+                kept, nodes = nodes, []
+            else:
+                ends = [n.interval.end for n in nodes]
+                kept = []
+                extracted = []
+                for i, node in enumerate(nodes):
+                    end = ends[i]
+                    covered = 0
+                    for other in ends[i + 1:i + 1 + coverage]:
+                        if other <= end:
+                            covered += 1
+                    if covered >= half:
+                        extracted.append(node)
+                    else:
+                        kept.append(node)
+                if not kept:
+                    kept, extracted = extracted, []
+                nodes = extracted
+            begs = [n.interval.beg for n in kept]
+            ends = [n.interval.end for n in kept]
+            maxends = []
+            maxend = ends[0]
+            for end in ends:
+                if maxend < end:
+                    maxend = end
+                maxends.append(maxend)
+            if typecode is not None:
+                begs = _array(typecode, begs)
+                ends = _array(typecode, ends)
+                maxends = _array(typecode, maxends)
+            self._components.append((kept, begs, ends, maxends))
+
+
+    def __len__(self):
+        return self._length
+
+
+    def _find_component(self, node, component, beg, end, exact):
+        # Scan backward from the last member beginning before the 
+        # query ends, while the running max end still reaches it:
+        nodes, begs, ends, maxends = component
+        index = _bisect_right(begs, end) - 1
+        hits = []
+        while index >= 0 and maxends[index] >= beg:
+            if ends[index] >= beg and (exact or
+               node.interval.isoverlapping(nodes[index].interval)):
+                hits.append(nodes[index])
+            index -= 1
+        hits.reverse()
+        return hits
+
+
+    def find(self, node):
+        if self._length < 1 or node.interval.namespace != self._namespace:
+            return iter(())
+        # Bounds are compared inclusively to prune the search; the hits
+        # are then checked with isoverlapping(), exactly as the NCLS,
+        # unless the bounds are exact integer bounds.
+        exact = self._typecode is not None
+        if exact:
+            bounds = _int_bounds(
+                node.interval, isinstance(node.interval, LeftClosedInterval)
+            )
+            if bounds is None:
+                return iter(())
+            beg, end = bounds
+        else:
+            beg = node.interval.beg
+            end = node.interval.end
+        hits = [
+            self._find_component(node, c, beg, end, exact) 
+            for c in self._components
+        ]
+        if len(hits) == 1:
+            return iter(hits[0])
+        rank = self._rank
+        return _heapmerge(*hits, key=lambda n: rank[id(n)])
+
+
+
+class NCListIndex(BaseIntervalIndex):
+    """
+    Implements the flat, array-based layout of the Nested Containment
+    List of the original C implementation (intervaldb.c, see 
+    IntervalSet): the toplist, then each sublist, are stored as 
+    contiguous ranges of parallel arrays of coordinates, and each
+    member records the range of its sublist. IntervalSet searches it
+    in place of its own _Node lists in integer coordinate mode, where
+    the coordinates are array.array columns and the search compares
+    integers only (see `IntervalSet._use_index()` for when).
+
+    >>> ncls = IntervalSet([Interval("Chr1", 0, 150)], coords='int64')
+    >>> list(ncls.overlaps(Interval("Chr1", 75, 120)))
+    [Interval(Chr1:0-150)]
+    """
+
+    def __init__(self, nodes, typecode=None):
+        nodes = list(nodes)
+        length = len(nodes)
+
+        # Nest the nodes, sorted by (beg, -end), as in _set_ncls():
+        children = {}  # rank -> ranks of the members of its sublist
+        toplist = []
+        parents = []  # stack of open superinterval ranks
+        for rank, node in enumerate(nodes):
+            beg = node.interval.beg
+            end = node.interval.end
+            while parents:
+                parent = nodes[parents[-1]].interval
+                if parent.beg <= beg and end <= parent.end and \
+                   (parent.beg, parent.end) != (beg, end):
+                    break
+                parents.pop()
+            if parents:
+                children.setdefault(parents[-1], []).append(rank)
+            else:
+                toplist.append(rank)
+            parents.append(rank)
+
+        # Lay out the toplist, then each sublist after the last one,
+        # breadth-first, in slot columns of 32-bit ints if they fit:
+        slots = 'i' if length < 2**31 else 'q'
+        ranks = _array(slots, toplist)
+        sublo = _array(slots, [0]) * length
+        subhi = _array(slots, [0]) * length
+        for slot in range(length):
+            sublist = children.get(ranks[slot])
+            if sublist:
+                sublo[slot] = len(ranks)
+                ranks.extend(sublist)
+                subhi[slot] = len(ranks)
+
+        begs = [nodes[r].interval.beg for r in ranks]
+        ends = [nodes[r].interval.end for r in ranks]
+        if typecode is not None:
+            begs = _array(typecode, begs)
+            ends = _array(typecode, ends)
+        self._nodes = [nodes[r] for r in ranks]
+        self._ranks = ranks
+        self._begs = begs
+        self._ends = ends
+        self._sublo = sublo
+        self._subhi = subhi
+        self._toplength = len(toplist)
+        self._length = length
+        self._namespace = nodes[0].interval.namespace if nodes else None
+        self._typecode = typecode
+
+
+    def __len__(self):
+        return self._length
+
+
+    def find(self, node):
+        nodes = self._nodes
+        return (nodes[index] for index in self._find_slots(node))
+
+
+    def _find_slots(self, node):
+        # Return the list of the slots of the members overlapping the
+        # query _Node object, in sorted order
+        if self._length < 1 or node.interval.namespace != self._namespace:
+            return []
+        # Bounds are compared inclusively to prune the search; the hits
+        # are then checked with isoverlapping(), exactly as the NCLS,
+        # unless the bounds are exact integer bounds.
+        exact = self._typecode is not None
+        if exact:
+            bounds = _int_bounds(
+                node.interval, isinstance(node.interval, LeftClosedInterval)
+            )
+            if bounds is None:
+                return []
+            beg, end = bounds
+        else:
+            beg = node.interval.beg
+            end = node.interval.end
+        nodes = self._nodes
+        begs = self._begs
+        ends = self._ends
+        sublo = self._sublo
+        subhi = self._subhi
+
+        # The ends of each (sub)list are sorted too, so the first member 
+        # ending at or after the query's beg is found by binary search:
+        hits = []
+        stack = [(0, self._toplength)]  # per-query (sub)list ranges
+        while stack:
+            lower, upper = stack.pop()
+            index = _bisect_left(ends, beg, lower, upper)
+            while index < upper and begs[index] <= end:
+                if exact or node.interval.isoverlapping(nodes[index].interval):
+                    hits.append(index)
+                if sublo[index] < subhi[index]:
+                    stack.append((sublo[index], subhi[index]))
+                index += 1
+        ranks = self._ranks
+        hits.sort(key=ranks.__getitem__)
+        return hits
+
+
+
+_BACKENDS = {
+    'ncls': None,
+    'tree': IntervalTreeIndex,
+    'ailist': AIListIndex,
+}
+
+
+def _get_backend(backend):
+    # Resolve a backend name or BaseIntervalIndex subclass; the NCLS
+    # itself is represented by None.
+    if backend is None or isinstance(backend, type):
+        return backend
+    try:
+        return _BACKENDS[backend]
+    except KeyError:
+        raise ValueError("unknown IntervalSet backend: %r" % (backend,))
+
+
+
+class IntervalSet(BaseIntervalCollection):
+    """
+    Implements and extends the Nested Containment List algorithm
+    described in:
+    
+      Alekseyenko AV, Lee CJ. Nested Containment List (IntervalSet): a new
+      algorithm for accelerating interval query of genome alignment
+      and interval databases. Bioinformatics. 2007 23(11):1386-1393. 
+      doi: 10.1093/bioinformatics/btl647. PMID: 17234640.
+
+    The constructor code is ported from:
+      https://github.com/biocore-ntnu/ncls/blob/master/ncls/src/intervaldb.c
+
+    This class extends the original IntervalSet algorithm to include 
+    `insert()` and `remove()` methods, as well as some useful binary
+    searches.
+
+    Build a Nested Containment List:
+
+    >>> intervals = [
+    ...    Interval("Chr1", 10, 100),
+    ...    Interval("Chr1", 200,500),
+    ...    Interval("Chr1",  0, 150)
+    ... ]
+    >>> ncl = IntervalSet(intervals)
+
+    Find intervals overlapping a query interval:
+
+    >>> overlaps = list(ncl.find_overlaps(Interval("Chr1", 75, 120)))
+    [Interval(Chr1:0-150), Interval(Chr1:10-100)]
+
+    """
+
+    # Constructors
+    # ============
+    def __init__(self, intervals=[], setter=remit, backend='ncls', coords=None):
+        """
+        Multiple references to the same object(s) are silently ignored.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalSet. This is useful for
+        when the query is not of the same object class as the members 
         of IntervalSet. The function must accept one (and only one) argument
         and outputs a single Interval-descendant object.
+
+        The `backend` keyword argument selects the index searched by 
+        overlap queries: 'ncls' (default) searches the Nested Containment
+        List itself, 'tree' an implicit augmented interval tree (see
+        IntervalTreeIndex), which is faster when many members overlap 
+        without nesting, and 'ailist' an Augmented Interval List (see
+        AIListIndex), suited to long members mixed with short ones. A
+        BaseIntervalIndex subclass is also accepted.
+        All backends find the same members, though not necessarily in 
+        the same order.
+
+        The `coords` keyword argument selects an integer coordinate 
+        mode, 'int64' or 'int32', for members whose coordinates are all
+        non-negative integers: they are validated once when the 
+        IntervalSet is built (and as members are inserted), and the
+        query index stores them in array.array columns of that type, 
+        searched with integer comparisons only. In this mode the 'ncls'
+        backend searches the flat layout of NCListIndex; after updates,
+        which discard it, the NCLS is searched in place until enough 
+        queries follow to pay for rebuilding it. The default, None, 
+        accepts any numeric coordinates, including nan and inf.
         """
         BaseIntervalCollection.__init__(self, setter)
+        self._backend = _get_backend(backend)
+        self._coords = _get_coords(coords)
         self._set_ncls(map(self._set, intervals))  # calls clear()
+        if self._coords is not None:
+            _coord_arrays(
+                (n.interval for n in self._iter_nodes()), _COORDS[self._coords]
+            )
 
 
     def _set_ncls(self, nodes):
@@ -1390,44 +3776,37 @@ class IntervalSet(BaseIntervalCollection):
         if ((length < 1) or nodes[0].interval.isempty()):
             return
 
-        d = 0  # duplicate count
-        p = 0  # parent index
-        i = 1  # "child" index
+        n = 0  # member count
+        group = None  # coordinates of the nodes in `visited`
         visited = set()
-        parents = _Sublist()  # stack of superinterval indices
+        parents = []  # stack of open superinterval nodes, innermost last
         toplist = self._toplist
-        sublist = self._sublist
-        toplist.append(nodes[p])
-        while i < length:
-            if nodes[i].interval.isempty():
+        for node in nodes:
+            if node.interval.isempty():
                 break
-            if nodes[i].interval.namespace != nodes[p].interval.namespace:
+            if node.interval.namespace != nodes[0].interval.namespace:
                 raise ValueError("mixed-namespace IntervalSet")
-            if nodes[i].interval.issubinterval(nodes[p].interval, strict=True):
-                if hash(nodes[i]) in visited:
-                    i += 1
-                    d += 1
-                    continue
-                
-                if nodes[i].interval.issubinterval(nodes[i-1].interval, strict=True):
-                    # if the parent is not already in the stack, add it:
-                    if ((parents.length < 1) or (parents[0] != i-1)):
-                        parents.appendleft(i-1)
-                    p = parents[0]
-                self._insert_sublist(nodes[p])
-                sublist[nodes[p].sublist].append(nodes[i])
-                visited.add(hash(nodes[i]))
-                i += 1
-                
-            elif parents.length:
-                p = parents.popleft()
-            else:
-                toplist.append(nodes[i])
+            # Repeats of an object have the same coordinates, so they
+            # are sorted into the same group, and skipped before they
+            # can close the open superintervals:
+            if group != (node.interval.beg, node.interval.end):
+                group = (node.interval.beg, node.interval.end)
                 visited = set()
-                p  = i
-                i += 1
+            if hash(node) in visited:
+                continue
+            visited.add(hash(node))
+            while parents and \
+                  not node.interval.issubinterval(parents[-1].interval, strict=True):
+                parents.pop()
+            if parents:
+                self._insert_sublist(parents[-1]).append(node)
+            else:
+                toplist.append(node)
+            parents.append(node)
+            n += 1
                 
-        self._length = i - d
+        self._length = n
+        self._queries = (self._version, n)
 
         
     # Superclass polymorphisms:
@@ -1439,37 +3818,168 @@ class IntervalSet(BaseIntervalCollection):
     def _iter_nodes(self, lower=0, upper=-1):
         if self._length < 1:
             return
-        if not (0 <= lower < self._toplist.length):
-            lower = 0
-        if not (0 <= upper < self._toplist.length):
-            upper = self._toplist.length
-            
-        toplists = self._toplist
+        toplist = self._toplist
         sublists = self._sublist
-        toplists.index = lower
+        if not (0 <= lower < toplist.length):
+            lower = 0
+        if not (0 <= upper < toplist.length):
+            upper = toplist.length
 
+        # Traversal state is kept in per-call [(sub)list, index, upper]
+        # cursors, never in the shared index, so that any number of
+        # iterations and searches may run concurrently.
         listdeque = _deque()
-        listdeque.append(toplists)
-        rangedeque = _deque()
-        rangedeque.append((lower, upper))
+        listdeque.append([toplist, lower, upper])
         while listdeque:
-            toplist = listdeque[0]
-            lower, upper = rangedeque[0]
-            if lower <= toplist.index < upper:
-                yield toplist[toplist.index]
-
-                if 0 <= toplist[toplist.index].sublist < sublists.length:
-                    sublist = sublists[toplist[toplist.index].sublist]
-                    sublist.index = 0
-                    rangedeque.appendleft((0, sublist.length))
-                    listdeque.appendleft(sublist)
-                toplist.index += 1
+            cursor = listdeque[0]
+            toplist, index, upper = cursor
+            if index < upper:
+                cursor[1] += 1
+                yield toplist[index]
+
+                if 0 <= toplist[index].sublist < sublists.length:
+                    sublist = sublists[toplist[index].sublist]
+                    listdeque.appendleft([sublist, 0, sublist.length])
             else:
-                rangedeque.popleft()
                 listdeque.popleft()
 
+
+    def _iter_sorted_nodes(self):
+        # Yield all nodes sorted by (beg, -end) without re-sorting: the
+        # toplist and each sublist are already sorted, and sublist
+        # members never begin before their parent, so a heap of list
+        # iterators only needs to hold one entry per open (sub)list.
+        if self._length < 1:
+            return
+        sublists = self._sublist
+        count = 0  # heap tie-breaker
+        heap = []
+        nodes = iter(self._toplist)
+        node = next(nodes)
+        while True:
+            yield node
+            if 0 <= node.sublist < sublists.length:
+                subnodes = iter(sublists[node.sublist])
+                subnode = next(subnodes, None)
+                if subnode is not None:
+                    _heappush(heap, (
+                        subnode.interval.beg, -subnode.interval.end,
+                        count, subnode, subnodes
+                    ))
+                    count += 1
+            node = next(nodes, None)
+            if node is not None:
+                _heappush(heap, (
+                    node.interval.beg, -node.interval.end,
+                    count, node, nodes
+                ))
+                count += 1
+            if not heap:
+                return
+            node, nodes = _heappop(heap)[3:]
+
+
+    def _iter_top_nodes(self):
+        return iter(self._toplist)
+
+
+    def _own_members(self):
+        # Own every (sub)list, copying only those shared with snapshots,
+        # and, if snapshots may share the members' intervals (since the
+        # last _copy_state()), replace these by copies, once each.
+        lists = [self._own_toplist()]
+        lists.extend(self._own_sublist(slot) for slot in range(self._sublist.length))
+        if self._shared:
+            copies = {}  # id(interval) -> (interval, copy)
+            for members in lists:
+                for node in members:
+                    interval = node.interval
+                    if id(interval) not in copies:
+                        copies[id(interval)] = (interval, interval.copy())
+                    copy = copies[id(interval)][1]
+                    if node.instance is interval:
+                        node.instance = copy
+                    node.interval = copy
+            self._shared = False
+        return [node for members in lists for node in members]
+
+
+    def _transformed(self, nodes, resort):
+        if self._coords is not None:
+            _coord_arrays((n.interval for n in nodes), _COORDS[self._coords])
+        self._version += 1
+        self._index = None
+        if resort:
+            self._set_ncls([_Node(n.interval, n.instance) for n in nodes])
+
         
     def _find_nodes(self, nodes, pairwise=False, get=lambda i,o:o):
+        if not self._use_index(len(nodes) if isinstance(nodes, list) else 1):
+            return self._find_ncls_nodes(nodes, pairwise, get)
+        return self._find_index_nodes(nodes, pairwise, get)
+
+
+    # In integer coordinate mode, the flat index of the 'ncls' backend
+    # is rebuilt after an update once length / _reindex queries follow:
+    _reindex = 64
+
+    # (version, count) of the queries since the last update:
+    _queries = (-1, 0)
+
+
+    def _use_index(self, count=1):
+        # Return whether `count` queries search the backend's index,
+        # rather than the NCLS itself. Updates discard the index, and
+        # in integer coordinate mode, the 'ncls' backend's NCListIndex 
+        # takes O(n) time to rebuild, so until enough queries follow an
+        # update to pay for it, the NCLS (updated in place) is searched,
+        # with the same results: interleaved updates and queries do not
+        # rebuild it each time. A build of the NCLS pays for it at once.
+        if self._backend is not None:
+            return True
+        if self._coords is None:
+            return False
+        if self._index is not None:
+            return True
+        version, queries = self._queries
+        if version != self._version:
+            queries = 0
+        queries += count
+        self._queries = (self._version, queries)
+        return queries * self._reindex >= self._length
+
+
+    def _find_index_nodes(self, nodes, pairwise=False, get=lambda i,o:o):
+        if self._length < 1:
+            return
+        index = self._get_index()
+        nr = not pairwise
+        visited = set()
+        for node in _listify(nodes):
+            for member in index.find(node):
+                if nr:
+                    if hash(member.instance) in visited:
+                        continue
+                    visited.add(hash(member.instance))
+                yield get(node, member)
+
+
+    def _get_index(self):
+        # Build the backend's query index on first use; updates reset
+        # it to None. An index is immutable, so snapshots share it.
+        index = self._index
+        if index is None:
+            if self._coords is None:
+                index = self._backend(self._iter_sorted_nodes())
+            else:
+                index = (self._backend or NCListIndex)(
+                    self._iter_sorted_nodes(), _COORDS[self._coords]
+                )
+            self._index = index
+        return index
+
+
+    def _find_ncls_nodes(self, nodes, pairwise=False, get=lambda i,o:o):
         if self._length < 1:
             return
         # Use the depth-first recursive algorithm, leveraging (sub)list
@@ -1477,7 +3987,9 @@ class IntervalSet(BaseIntervalCollection):
         # overlaps from the root (toplist) down (through sublists). This
         # method returns a generator object (via `yield`) that collects 
         # overlapping _Node objects, deferring to wrapper methods
-        # that will decide what data to extract.
+        # that will decide what data to extract. The search position
+        # is kept in per-query [(sub)list, index] cursors, so the 
+        # IntervalSet itself is never written to.
         toplists = self._toplist
         sublists = self._sublist
 
@@ -1487,31 +3999,30 @@ class IntervalSet(BaseIntervalCollection):
             # Search toplist for top-level overlap; if no overlaps,
             # then we are certain there are no sub-intervals with
             # overlaps
-
-            toplist = toplists
-            toplist.index = toplist.find_overlap_index_beg(node)
-
             listdeque = _deque()
-            listdeque.append(toplist)
+            listdeque.append([toplists, toplists.find_overlap_index_beg(node)])
             while listdeque:
-                toplist = listdeque[0]
-                if ((0 <= toplist.index < toplist.length) and
-                    (node.interval.isoverlapping(toplist[toplist.index].interval))):
+                cursor = listdeque[0]
+                toplist, index = cursor
+                if ((0 <= index < toplist.length) and
+                    (node.interval.isoverlapping(toplist[index].interval))):
+                    cursor[1] += 1
+                    member = toplist[index]
+                    # Search the sublist even when its parent was seen
+                    # by an earlier query; its members may not have been.
+                    if 0 <= member.sublist < sublists.length:
+                        sublist = sublists[member.sublist]
+                        subindex = sublist.find_overlap_index_beg(node)
+                        if 0 <= subindex < sublist.length:
+                            listdeque.appendleft([sublist, subindex])
+
                     # The interval intersects another, return result if 
                     # non-redundant (if we haven't seen its hash value)
-                    if nr and hash(toplist[toplist.index].instance) in visited:
-                        toplist.index += 1
-                        continue
-                    visited.add(hash(toplist[toplist.index].instance))
-                    
-                    yield get(node, toplist[toplist.index])
-
-                    if 0 <= toplist[toplist.index].sublist < sublists.length:
-                        sublist = sublists[toplist[toplist.index].sublist]
-                        sublist.index = sublist.find_overlap_index_beg(node)
-                        if 0 <= sublist.index < sublist.length:
-                            listdeque.appendleft(sublist)
-                    toplist.index += 1
+                    if nr:
+                        if hash(member.instance) in visited:
+                            continue
+                        visited.add(hash(member.instance))
+                    yield get(node, member)
                 else:
                     # End of overlap with (sub)list
                     listdeque.popleft()
@@ -1620,126 +4131,237 @@ class IntervalSet(BaseIntervalCollection):
     
     
     # Update methods
-    def _insert(self, index, node, _list=None):
+    def _insert(self, node, _list=None):
+        self._version += 1
+        self._index = None
+        if self._coords is not None:
+            _coord_arrays([node.interval], _COORDS[self._coords])
         toplists = self._toplist
-        sublists = self._sublist
-        subslots = self._subslot
 
         if toplists.length and \
            toplists[0].interval.namespace != node.interval.namespace:
             raise ValueError("Cannot construct mixed namespace IntervalSet")
         
-        toplist = toplists if _list is None else _list
-        toplist.index = index
-
-        nodedeque = _deque()  # as a queue
-        listdeque = _deque()  # as a queue
-        nodedeque.append(node)
-        listdeque.append(toplist)
+        toplist = self._own_toplist() if _list is None else _list
+
+        # Each (sub)list is sorted by beg, and no member contains another,
+        # so ends are sorted too. Members containing the query node, and 
+        # members contained by it, are therefore each a contiguous range
+        # found by binary search.
+        nodedeque = _deque()  # as a queue of [node, (sub)list] pairs
+        nodedeque.append((node, toplist))
         while nodedeque:
-            node = nodedeque[0]  # query node
-            toplist = listdeque[0]
-            if toplist.index < 0 or \
-               toplist.length < 1 or \
-               toplist.length <= toplist.index:
-                toplist.append(node)
-                nodedeque.popleft()
-                listdeque.popleft()
+            node, toplist = nodedeque.popleft()
+            while True:
+                # Find the first member ending at or after the query node:
+                lower = 0
+                upper = toplist.length
+                while lower < upper:
+                    middle = (lower + upper) // 2
+                    if toplist[middle].interval.end < node.interval.end:
+                        lower = middle + 1
+                    else:
+                        upper = middle
+                if lower >= toplist.length or \
+                   toplist[lower].interval.beg > node.interval.beg:
+                    break
+                elif toplist[lower].interval.beg == node.interval.beg and \
+                     toplist[lower].interval.end == node.interval.end:
+                    # Target node i and query node are equivalent; insert
+                    # query node after its equivalents, and transfer the
+                    # sublist of the last one:
+                    while ((lower < toplist.length) and
+                           (toplist[lower].interval.beg == node.interval.beg) and
+                           (toplist[lower].interval.end == node.interval.end)):
+                        if toplist[lower].instance is node.instance:
+                            raise DuplicateKeyError("'%s'" % repr(node.instance))
+                        lower += 1
+                    if node.sublist < 0:
+                        node.sublist = toplist[lower-1].sublist
+                        toplist[lower-1].sublist = -1
+                    elif toplist[lower-1].sublist >= 0:
+                        # both have sublists, merge the previous one:
+                        sublist = self._own_sublist(node.sublist)
+                        for subnode in self._release_sublist(toplist[lower-1]):
+                            nodedeque.append((subnode, sublist))
+                    toplist.insert(lower, node)
+                    node = None
+                    break
+                else:
+                    # Target node i contains query node. Descend into its
+                    # sublist.
+                    if toplist[lower].instance is node.instance:
+                        raise DuplicateKeyError("'%s'" % repr(node.instance))
+                    toplist = self._insert_sublist(toplist[lower])
+            if node is None:
+                continue
 
-            elif ((toplist.index+1 < toplist.length) and
-                  ((toplist[toplist.index].interval.beg == toplist[toplist.index+1].interval.beg) and 
-                   (toplist[toplist.index].interval.end == toplist[toplist.index+1].interval.end))):
-                # list contains equivalents; shift right to maintain
-                # sorted order:
-                toplist.index += 1
-                
-            elif toplist[toplist.index].interval.beg == node.interval.beg and \
-                 toplist[toplist.index].interval.end == node.interval.end:
-                # Target node i and query node are equivalent; insert
-                # query node after node i, and transfer its sublist:
-                node.sublist = toplist[toplist.index].sublist
-                toplist[toplist.index].sublist = -1
-                toplist.insert(toplist.index+1, node)
-                nodedeque.popleft()
-                listdeque.popleft()
-                
-            elif toplist[toplist.index].interval.issuperinterval(node.interval):
-                # Target node i contains query node. Insert into sublist,
-                # then update queue
-                if toplist[toplist.index].instance is node.instance:
-                    raise DuplicateKeyError("'%s'" % repr(node.instance))
-                sublist = self._insert_sublist(toplist[toplist.index])
-                sublist.index = sublist.find_index_beg(node)
-                listdeque[0] = sublist
-
-            elif toplist[toplist.index].interval.issubinterval(node.interval):
-                # Target node i contained within query node. Query may
-                # contain others, so add the target to node queue, delete
-                # target from the toplist, and pull another.
-                sublist = self._insert_sublist(node)
-                subnode = toplist[toplist.index]
-                # sublist = sublists[node.sublist]
-                sublist.index = sublist.find_index_beg(subnode)
-                nodedeque.append(subnode)
-                listdeque.append(sublist)
-                del(toplist[toplist.index])
-                # Next target node shifts into place, don't increment
-                
-            elif toplist[toplist.index].interval.end >= node.interval.end:
-                # Query node does not contain--and is not contained by--the
-                # target node, i. Insert, as target.end >= query.end and
-                # the query node cannot contain other nodes.
-                toplist.insert(toplist.index, node)
-                nodedeque.popleft()  # <= check next target interval too?
-                listdeque.popleft()
-                
-            elif toplist[toplist.index].interval.beg <= node.interval.beg:
-                # Query node does not contain--and is not contained by--the 
-                # target node, i. Both the start *and* stop of the query
-                # node are also downstream of the target node. New node may
-                # contain others downstream, so examine target node i+1.
-
-                # Is is possible that sublisted target nodes are present
-                # under target node i that should be included under the
-                # query before checking node i+1 ?
-                toplist.index += 1
-                
-            else:
-                raise NotImplementedError(
-                    "BUG: Record %s" % str(node.interval)
-                )
+            # Find the first member beginning at or after the query node;
+            # members from there that end within the query node are 
+            # contained by it, and are moved under it:
+            lower = 0
+            upper = toplist.length
+            while lower < upper:
+                middle = (lower + upper) // 2
+                if toplist[middle].interval.beg < node.interval.beg:
+                    lower = middle + 1
+                else:
+                    upper = middle
+            while ((lower < toplist.length) and
+                   (toplist[lower].interval.end <= node.interval.end)):
+                nodedeque.append((toplist[lower], self._insert_sublist(node)))
+                del(toplist[lower])
+            toplist.insert(lower, node)
         
             
     def _insert_sublist(self, node):
         if node.sublist < 0:
             if self._subslot.length > 0:
-                node.sublist = self._subslot.popleft()
+                node.sublist = self._own_subslots().popleft()
             else:
                 node.sublist = self._sublist.length
-                self._sublist.append(_Sublist())
-        return self._sublist[node.sublist]
+                self._own_sublists().append(_Sublist(owner=self._owner))
+        return self._own_sublist(node.sublist)
+
+
+    def _release_sublist(self, node):
+        # Detach and return the (owned) sublist of node, making its
+        # slot available for reuse.
+        sublist = self._own_sublist(node.sublist)
+        self._sublist[node.sublist] = _Sublist(owner=self._owner)
+        self._own_subslots().append(node.sublist)
+        node.sublist = -1
+        return sublist
+
+
+    # Copy-on-write: (sub)lists may be shared with snapshots of self,
+    # and are only mutated once owned by self. Copying a (sub)list 
+    # also copies its nodes, as their `sublist` fields are mutable,
+    # so every node in an owned (sub)list is owned too. Sublists are
+    # referenced by slot, so owning one does not require its parents.
+    def _own_nodes(self, nodes):
+        return _Sublist(
+            [_Node(n.interval, n.instance, n.sublist) for n in nodes],
+            owner=self._owner
+        )
+
+
+    def _own_toplist(self):
+        if self._toplist.owner is not self._owner:
+            self._toplist = self._own_nodes(self._toplist)
+        return self._toplist
+
+
+    def _own_sublists(self):
+        if self._sublist.owner is not self._owner:
+            self._sublist = _Sublist(self._sublist, owner=self._owner)
+        return self._sublist
+
+
+    def _own_sublist(self, slot):
+        sublists = self._own_sublists()
+        if sublists[slot].owner is not self._owner:
+            sublists[slot] = self._own_nodes(sublists[slot])
+        return sublists[slot]
+
+
+    def _own_subslots(self):
+        if self._subslot.owner is not self._owner:
+            self._subslot = _Sublist(self._subslot, owner=self._owner)
+        return self._subslot
             
 
     def _copy_state(self, other):
+        # Share other's (sub)lists, and have both objects copy them
+        # before any further mutation, and the members' intervals before
+        # a transform (see _own_members()):
         self._toplist = other._toplist
         self._sublist = other._sublist
         self._subslot = other._subslot
         self._length  = other._length
+        self._version += 1
+        self._index   = other._index \
+            if self._backend is other._backend and \
+               self._coords == other._coords \
+            else None
+        self._owner   = object()
+        other._owner  = object()
+        self._shared  = True
+        other._shared = True
+        self._queries = (
+            self._version, 
+            other._queries[1] if other._queries[0] == other._version else 0
+        )
 
                     
     def empty(self):
         """Remove all elements from the IntervalSet."""
-        self._toplist = _Sublist()
-        self._sublist = _Sublist()
-        self._subslot = _Sublist()
+        self._owner   = object()
+        self._toplist = _Sublist(owner=self._owner)
+        self._sublist = _Sublist(owner=self._owner)
+        self._subslot = _Sublist(owner=self._owner)
         self._length  = 0
+        self._index   = None
+        self._shared  = False
+        self._version += 1
+
+
+    def _iter_containers(self):
+        # Released slots hold empty sublists until they are reused:
+        yield 'free_slots', self._subslot
+        for slot in self._subslot:
+            yield 'free_slots', self._sublist[slot]
+        yield 'sublists', self._toplist
+        yield 'sublists', self._sublist
+        if self._index is not None:
+            yield 'index', self._index
+
+
+    def _new_set(self, *args, **kwargs):
+        # Create the new IntervalSets that methods return, of the class
+        # of self:
+        return self.__class__(*args, **kwargs)
 
 
     def copy(self):
-        """Create and copy of self."""
-        copy = self.__class__(setter=self._setter)
-        copy._set_ncls(self._copy_nodes())
-        return copy
+        """
+        Create a copy of self. Same as `snapshot()`, requires O(1) time.
+        """
+        return self.snapshot()
+
+
+    def flank(self, left, right=None, lower=None, upper=None):
+        """
+        Same as `BaseIntervalCollection.flank()`, keeping self's backend.
+        """
+        if right is None:
+            right = left
+        return self._new_set(
+            list(self._iter_flanks(left, right, lower, upper)),
+            backend=self._backend, coords=self._coords
+        )
+
+
+    def snapshot(self):
+        """
+        self.snapshot() -> IntervalSet
+
+        Create a point-in-time copy of self in O(1) time. The snapshot
+        shares its header and subheader lists with self; later calls to
+        `insort()` or `remove()` on either object copy only the lists
+        they modify, so neither observes the other's updates.
+
+        >>> I = IntervalSet([Interval("Chr", 0, 100)])
+        >>> S = I.snapshot()
+        >>> I.insort(Interval("Chr", 10, 20))
+        >>> len(I), len(S)
+        (2, 1)
+        """
+        snapshot = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
+        snapshot._copy_state(self)
+        return snapshot
     
         
     def discard(self, interval, setter=None):
@@ -1772,9 +4394,8 @@ class IntervalSet(BaseIntervalCollection):
         and output a single Interval-descendant object.
         """
         node = self._set(interval, setter)
-        index = self._toplist.find_index_beg(node)
         try:
-            self._insert(index, node)
+            self._insert(node)
             self._length += 1
         except DuplicateKeyError:
             pass
@@ -1804,75 +4425,66 @@ class IntervalSet(BaseIntervalCollection):
 
                 
     def _remove(self, node):
+        self._version += 1
+        self._index = None
         toplists = self._toplist
         sublists = self._sublist
-        subslots = self._subslot
-        toplist  = toplists
-        toplist.index = toplist.find_overlap_index_beg(node)
+        index = toplists.find_overlap_index_beg(node)
         # .find_overlap_index_beg(node) not ideal, it would be
         # more efficient to do a search requiring the query to
         # be contained.
 
-        if toplist.index < 0 or \
-           toplist.length < 1:
+        if index < 0 or \
+           toplists.length < 1:
             raise KeyError("'%s'" % repr(node.instance))
         
-        listdeque = _deque()
-        listdeque.append(toplists)
+        listdeque = _deque()  # [slot, index] cursors, slot -1 is the toplist
+        listdeque.append([-1, index])
         while listdeque:
-            toplist = listdeque[0]
-            if 0 <= toplist.index < toplist.length:
-                if toplist[toplist.index].instance is node.instance:
+            cursor = listdeque[0]
+            slot, index = cursor
+            toplist = toplists if slot < 0 else sublists[slot]
+            if ((0 <= index < toplist.length) and
+                (toplist[index].interval.beg <= node.interval.beg)):
+                if toplist[index].instance is node.instance:
+                    toplist = self._own_toplist() \
+                        if   slot < 0 \
+                        else self._own_sublist(slot)
                     # If node has a sublist, re-insort sublist
-                    if 0 <= toplist[toplist.index].sublist < sublists.length:
+                    if 0 <= toplist[index].sublist < sublists.length:
                         # Save the sublist data before deleting the
                         # node and making its sublist slot available
                         # or the indexing will be incorrect.
-                        subnodes = sublists[toplist[toplist.index].sublist]
-                        sublists[toplist[toplist.index].sublist] = _Sublist()
-                        subslots.append(toplist[toplist.index].sublist)
-                        del(toplist[toplist.index])
+                        subnodes = self._release_sublist(toplist[index])
+                        del(toplist[index])
                         self._length -= 1
-                        
-                        # befor = toplist.index - 1
-                        # after = toplist.index
                         for subnode in subnodes:
-                            self._insert(toplist.index-1, subnode, _list=toplist)
-                            # if-else condition order matters.
-                            # Prioritize sort order:
-                            # if ((after < toplist.length) and
-                            #     (toplist[after].interval.beg <= subnode.interval.beg) and
-                            #     (toplist[after].interval.end >= subnode.interval.end)):
-                            #     # Insert after current index
-                            #     self._insert(after, subnode, _list=toplist)
-                            # elif befor < 0:
-                            #     self._insert(after, subnode, _list=toplist)
-                            # else:
-                            #     # Insert before or at position
-                            #     self._insert(befor, subnode, _list=toplist)
+                            self._insert(subnode, _list=toplist)
                     else:
-                        del(toplist[toplist.index])
+                        del(toplist[index])
                         self._length -= 1
-                    listdeque.popleft()
                     return
 
-                elif 0 <= toplist[toplist.index].sublist < sublists.length:
+                elif ((0 <= toplist[index].sublist < sublists.length) and
+                      (toplist[index].interval.end >= node.interval.end)):
                     # No match in toplist, add its sublist to the deque
-                    # for dfs search. Increment toplist.index because
+                    # for dfs search. Increment the index because
                     # our query interval may not be contained in node i,
                     # but may be in/under node i+1.
-                    sublist = sublists[toplist[toplist.index].sublist]
-                    sublist.index = sublist.find_overlap_index_beg(node)
-                    listdeque.appendleft(sublist)
-                    toplist.index += 1  
+                    sublist = sublists[toplist[index].sublist]
+                    cursor[1] += 1
+                    listdeque.appendleft([
+                        toplist[index].sublist,
+                        sublist.find_overlap_index_beg(node)
+                    ])
                 else:
                     # No sublists to search
-                    toplist.index += 1
+                    cursor[1] += 1
             else:
                 # When searching toplist[i] but our match is in i+1,
-                # searching the sublist of i will get us here.
+                # searching the sublist of i will get us here. Members
+                # beginning downstream of the query cannot match.
                 listdeque.popleft()
-                # next element pops into place, don't increment
 
         raise KeyError("'%s'" % repr(node.instance))
         
@@ -1931,7 +4543,7 @@ class IntervalSet(BaseIntervalCollection):
             map(lambda i: self._set(i, setter), _listify(intervals)),
             key=_node_pos
         )
-        for i,o in self._find_nodes(nodes, True, remit):
+        for i,o in self._find_nodes(nodes, True, lambda i,o:(i,o)):
             yield (i.instance, o.instance)
             
                     
@@ -1952,9 +4564,230 @@ class IntervalSet(BaseIntervalCollection):
             map(lambda n: self._set(n, setter), _listify(intervals)),
             sort=_node_pos_longest
         )
+        if self._cache is not None:
+            nodes = list(nodes)
+            return iter(self._cached(
+                lambda: [n.instance for n in self._find_nodes(nodes, False)],
+                'overlaps', nodes
+            ))
         return (n.instance for n in self._find_nodes(nodes, False))
+
+
+    def count_overlaps(self, intervals, setter=None):
+        """
+        self.count_overlaps(intervals) -> int
+
+        Return the number of IntervalSet members overlapping one or more
+        query interval objects, same as counting those `overlaps()` 
+        produces.
+
+        >>> I = IntervalSet([Interval("Chr", 0, 100), Interval("Chr", 50, 60)])
+        >>> I.count_overlaps(Interval("Chr", 55, 56))
+        2
+        """
+        nodes = list(_filter_nested(
+            map(lambda n: self._set(n, setter), _listify(intervals)),
+            sort=_node_pos_longest
+        ))
+        count = lambda: sum(1 for n in self._find_nodes(nodes, False))
+        if self._cache is not None:
+            return self._cached(count, 'count', nodes)
+        return count()
+
+
+    def _overlaps_batch(self, intervals, setter=None):
+        return [
+            [n.instance for n in self._find_nodes([self._set(i, setter)])]
+            for i in intervals
+        ]
+
+
+    async def aoverlaps(self, intervals, setter=None, batch=256, chunk=512, executor=None):
+        """
+        Asynchronous counterpart of `overlaps()` for asyncio programs,
+        returning an async generator producing IntervalSet members 
+        overlapping each query interval object in turn. Queries may be
+        an async iterable (e.g., intervals parsed from a socket), an 
+        ordinary iterable or a single interval object.
+
+        Unlike `overlaps()`, each query is searched independently: its
+        hits are produced in the same order as `overlaps(query)` would,
+        and all hits of one query precede those of the next, so members
+        overlapping several queries are produced once per query.
+
+        Queries are read into batches of up to `batch` queries that are
+        already waiting, so a slow source is never held up to fill a 
+        batch. By default, batches are searched on the event loop in 
+        cooperative chunks, yielding control to other tasks after about
+        `chunk` queries and hits. Alternatively, each batch is searched
+        by `executor`, a concurrent.futures.Executor, keeping the event
+        loop free for the whole search. Concurrent updates should go
+        through a ConcurrentIntervalSet.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalSet. This is useful for
+        when the query is not of the same object class as the members 
+        of IntervalSet. The function must accept one (and only one) argument
+        and outputs a single Interval-descendant object.
+
+        >>> async def main(ncls, queries):
+        ...     return [hit async for hit in ncls.aoverlaps(queries)]
+        >>> ncls = IntervalSet([Interval("Chr1", 0, 150)])
+        >>> asyncio.run(main(ncls, [Interval("Chr1", 75, 120)]))
+        [Interval(Chr1:0-150)]
+        """
+        if batch < 1 or chunk < 1:
+            raise ValueError("batch and chunk sizes must be positive")
+        loop = _get_running_loop()
+        queue = _AsyncQueue(maxsize=batch)
+        feeder = _ensure_future(_aqueue(intervals, queue))
+        try:
+            end = False
+            while not end:
+                queries = [await queue.get()]
+                while len(queries) < batch and not queue.empty():
+                    queries.append(queue.get_nowait())
+                if queries[-1] is _QUEUE_END:
+                    queries.pop()
+                    end = True
+                if executor is not None:
+                    results = await loop.run_in_executor(
+                        executor, self._overlaps_batch, queries, setter
+                    )
+                    for hits in results:
+                        for hit in hits:
+                            yield hit
+                    continue
+                work = 0
+                for query in queries:
+                    work += 1
+                    for hit in self._find_nodes([self._set(query, setter)]):
+                        yield hit.instance
+                        work += 1
+                        if work >= chunk:
+                            work = 0
+                            await _async_sleep(0)
+                    if work >= chunk:
+                        work = 0
+                        await _async_sleep(0)
+            # Re-raise any exception from reading the queries:
+            await feeder
+        finally:
+            feeder.cancel()
     
     
+    def _stab_nodes(self, node):
+        if self._length < 1:
+            return
+        if self._use_index():
+            yield from self._find_index_nodes([node])
+            return
+        # Every member overlapping a point contains it, so descend only
+        # into the sublists of overlapping members, which need neither
+        # the query sorting/filtering nor the `visited` set of 
+        # _find_ncls_nodes().
+        sublists = self._sublist
+        stack = []  # per-query [(sub)list, index] cursors
+        members = self._toplist
+        index = members.find_index_beg(node)
+        while True:
+            if 0 <= index < members.length and \
+               node.interval.isoverlapping(members[index].interval):
+                member = members[index]
+                yield member
+                if 0 <= member.sublist < sublists.length:
+                    stack.append((members, index + 1))
+                    members = sublists[member.sublist]
+                    index = members.find_index_beg(node)
+                else:
+                    index += 1
+            elif stack:
+                members, index = stack.pop()
+            else:
+                return
+
+
+    def stab(self, pos):
+        """
+        self.stab(pos) -> generator
+
+        Perform a stabbing query, producing the IntervalSet members
+        containing a position, in the same order as `overlaps()` would
+        for Point(namespace, pos). The position is either a 1-based 
+        integer position in the IntervalSet's namespace (e.g., a VCF 
+        POS), as for Point objects, or a Point or ClosedPoint object.
+
+        >>> I = IntervalSet([Interval("Chr", 0, 100), Interval("Chr", 50, 60)])
+        >>> list(I.stab(55))
+        [Interval(Chr:0-100), Interval(Chr:50-60)]
+        >>> list(I.stab(50))
+        [Interval(Chr:0-100)]
+        """
+        if not isinstance(pos, BaseInterval):
+            pos = Point(self.namespace, pos)
+        return (self._get(n) for n in self._stab_nodes(_Node(pos)))
+
+
+    def stab_many(self, positions):
+        """
+        self.stab_many(positions) -> (array, list)
+
+        Perform a stabbing query for each 1-based integer position of
+        an iterable in the IntervalSet's namespace, with the same results
+        as `stab()`, but returned in compressed sparse row (CSR) form:
+        an array('q') of offsets, one longer than `positions`, and the
+        list of hits, such that `hits[offsets[i]:offsets[i+1]]` are the
+        members containing `positions[i]`, sorted by position.
+
+        Rather than searching for each position, the positions are 
+        sorted and swept along the sorted members once, keeping the 
+        members containing the current position, so the whole batch 
+        takes O(n log n + m log m + k) time for k hits.
+
+        >>> I = IntervalSet([Interval("Chr", 0, 100), Interval("Chr", 50, 60)])
+        >>> offsets, hits = I.stab_many([55, 75, 200])
+        >>> offsets.tolist(), hits
+        ([0, 2, 3, 3], [Interval(Chr:0-100), Interval(Chr:50-60), Interval(Chr:0-100)])
+        """
+        positions = list(positions)
+        results = [()] * len(positions)
+        nodes = self._iter_sorted_nodes()
+        node = next(nodes, None)
+        count = 0  # heap tie-breaker
+        heap = []  # (end, count, member) of the active members
+        active = []  # active members, sorted by position
+        stabbed = ()
+        for i in sorted(range(len(positions)), key=positions.__getitem__):
+            # Same test as Point(namespace, pos).isoverlapping(member),
+            # Point(namespace, pos) spanning [pos - 1, pos):
+            pos = positions[i]
+            beg = pos - 1
+            changed = False
+            while heap and not (beg < heap[0][0]):
+                _heappop(heap)
+                changed = True
+            if changed:
+                active = [n for n in active if beg < n.interval.end]
+            while node is not None and node.interval.beg < pos:
+                if beg < node.interval.end:
+                    active.append(node)
+                    _heappush(heap, (node.interval.end, count, node))
+                    count += 1
+                    changed = True
+                node = next(nodes, None)
+            if changed:
+                stabbed = [self._get(n) for n in active]
+            results[i] = stabbed
+
+        offsets = _array('q', [0])
+        hits = []
+        for stabbed in results:
+            hits.extend(stabbed)
+            offsets.append(len(hits))
+        return offsets, hits
+
+
     def subintervals(self, intervals, setter=None):
         raise NotImplementedError('%s.subintervals()' % self.__class__.__name__)
         
@@ -2016,13 +4849,13 @@ class IntervalSet(BaseIntervalCollection):
         if isinstance(other, BaseIntervalCollection):
             return other
         else:
-            return self.__class__(_listify(other), setter or remit)
+            return self._new_set(_listify(other), setter or remit)
 
     
     def _isoverlapping(self, other, setter=remit):
         if not isinstance(other, BaseIntervalCollection):
             return self._isoverlapping(
-                self.__class__(_listify(other), setter=setter)
+                self._new_set(_listify(other), setter=setter)
             )
         elif self.namespace == other.namespace:
             lower, upper = (self, other) if self < other else (other, self)
@@ -2088,6 +4921,24 @@ class IntervalSet(BaseIntervalCollection):
                 ((not overlapping) or self._isoverlapping(other)))
 
     
+    def iter_merge(self, abutting=False):
+        """
+        self.iter_merge() -> generator
+
+        Generator variant of `merge()`, producing the merged, non-
+        overlapping interval objects in sorted order without building
+        a new IntervalSet. Requires O(n) time and O(1) extra memory.
+        
+        >>> I = IntervalSet([Interval("Chr",1,50), Interval("Chr",45,80)])
+        >>> list(I.iter_merge())
+        [Interval(Chr:1-80)]
+        """
+        return (
+            self._get(n) for n in
+            _merge_nodes(self._iter_top_nodes(), abutting)
+        )
+
+
     def merge(self, abutting=False):
         """
         self.merge() -> IntervalSet
@@ -2103,35 +4954,13 @@ class IntervalSet(BaseIntervalCollection):
         """
         # I independently re-invented the interval merge algorithm:
         # https://www.geeksforgeeks.org/merging-intervals
-        ncls = self.__class__(setter=self._setter)
-        if self._length < 1:
-            return ncls
-        N = self._toplist.length
-        i = 1
-        p = 0
-        dist = 0  # = -dist
-        nodes = self._toplist
-        toplist = ncls._toplist
-        toplist.append(_Node(Interval(
-            nodes[0].interval.namespace,
-            nodes[0].interval.beg,
-            nodes[0].interval.end
-        )))
-        overlap = dist.__ge__ if abutting else dist.__gt__
-        while i < N:
-            if overlap(nodes[i].interval.beg - toplist[p].interval.end):
-                # overlap between the two intervals, extend node p:
-                toplist[p].interval.end = nodes[i].interval.end
-            else:
-                # no overlap, add new node p:
-                toplist.append(_Node(Interval(
-                    nodes[i].interval.namespace,
-                    nodes[i].interval.beg,
-                    nodes[i].interval.end
-                )))
-                p += 1
-            i += 1
-        ncls._length = p + 1
+        ncls = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
+        ncls._toplist.extend(list(
+            _merge_nodes(self._iter_top_nodes(), abutting)
+        ))
+        ncls._length = ncls._toplist.length
         return ncls
 
 
@@ -2150,22 +4979,124 @@ class IntervalSet(BaseIntervalCollection):
         IntervalSet(header=[Chr:1-80], subheader=[])
         """
         self._copy_state(self.merge(abutting))
+
+
+    def _iter_cluster_nodes(self, distance=0, abutting=False):
+        # Yield (cluster, node) for every member in iteration order. A
+        # toplist node starts a new cluster unless its gap to the end
+        # of the current cluster is within `distance`; nested members
+        # immediately follow their toplist node, and join its cluster.
+        if abutting:
+            within = lambda gap: gap <= distance
+        else:
+            within = lambda gap: gap < distance
+        tops = self._iter_top_nodes()
+        top = next(tops, None)
+        cluster = -1
+        end = None
+        for node in self._iter_nodes():
+            if node is top:
+                if end is None or not within(node.interval.beg - end):
+                    cluster += 1
+                    end = node.interval.end
+                elif end < node.interval.end:
+                    end = node.interval.end
+                top = next(tops, None)
+            yield cluster, node
+
+
+    def cluster(self, distance=0, abutting=False, hulls=False, counts=False):
+        """
+        self.cluster() -> array
+        self.cluster(hulls=True, counts=True) -> 3-tuple
+
+        Label members with the id of their cluster, same as bedtools
+        cluster, and return an array('q') of ids aligned with the
+        iteration order of self. Clusters are numbered from 0 in sorted
+        order, and are the groups of members `merge()` would merge into
+        one interval, without building the merged intervals. Members 
+        separated by less than `distance` (or up to `distance` when 
+        `abutting=True`) are also clustered. Requires O(n) time, in one
+        pass over the toplist.
+
+        When `hulls=True`, the list of each cluster's hull interval is
+        also returned, of the type of the cluster's first member, and 
+        when `counts=True`, an array('q') of each cluster's member 
+        count, in this order.
+
+        >>> I = IntervalSet([
+        ...     Interval("Chr",1,50), Interval("Chr",10,20), 
+        ...     Interval("Chr",45,80), Interval("Chr",90,95)
+        ... ])
+        >>> I.cluster().tolist()
+        [0, 0, 0, 1]
+        >>> labels, hulls, counts = I.cluster(hulls=True, counts=True)
+        >>> hulls, counts.tolist()
+        ([Interval(Chr:1-80), Interval(Chr:90-95)], [3, 1])
+        >>> I.cluster(distance=10, abutting=True).tolist()
+        [0, 0, 0, 0]
+        """
+        labels = _array('q')
+        sizes = _array('q')
+        spans = []  # hull per cluster, a copy of its first member
+        for cluster, node in self._iter_cluster_nodes(distance, abutting):
+            labels.append(cluster)
+            if cluster == len(sizes):
+                sizes.append(0)
+                spans.append(node.interval.copy())
+            sizes[cluster] += 1
+            if spans[cluster].end < node.interval.end:
+                spans[cluster].end = node.interval.end
+        result = (labels,)
+        if hulls:
+            result += (spans,)
+        if counts:
+            result += (sizes,)
+        return result if len(result) > 1 else labels
         
 
-    def complement(self, lower=None, upper=None):
+    def _iter_complement_nodes(self, lower, upper):
+        dist = 0  # = -dist
+        gapped = dist.__lt__
+        prev = None
+        for node in self._iter_top_nodes():
+            if prev is None:
+                if node.interval.beg > lower:
+                    yield _Node(Interval(
+                        node.interval.namespace,
+                        lower,
+                        node.interval.beg
+                    ))
+            elif gapped(node.interval.beg - prev.interval.end):
+                # gap between the two intervals, new record:
+                yield _Node(Interval(
+                    node.interval.namespace,
+                    prev.interval.end,
+                    node.interval.beg
+                ))
+            prev = node
+        if prev is not None and prev.interval.end < upper:
+            yield _Node(Interval(
+                prev.interval.namespace,
+                prev.interval.end,
+                upper
+            ))
+
+
+    def iter_complement(self, lower=None, upper=None):
         """
-        self.complement() -> IntervalSet
+        self.iter_complement() -> generator
 
-        Computes the complement of the intervals contained in self
-        and return a new IntervalSet object. Requires O(n) time in 
-        the average case.
+        Generator variant of `complement()`, producing the complement
+        interval objects in sorted order without building a new 
+        IntervalSet. Requires O(n) time and O(1) extra memory.
         
         Setting `lower` and `upper` defines the lower- and upper-bound
         values of the namespace.
         
         >>> I = IntervalSet([Interval("Chr",100, 1000)])
-        >>> I.complement(lower=0, upper=1048)
-        IntervalSet(header=[Chr:0-100, Chr:1000-1048], subheader=[])
+        >>> list(I.iter_complement(lower=0, upper=1048))
+        [Interval(Chr:0-100), Interval(Chr:1000-1048)]
         """
         if lower is None:
             lower = self.beg
@@ -2175,35 +5106,33 @@ class IntervalSet(BaseIntervalCollection):
             upper = self.end
         if upper < self.end:
             raise ValueError("Upper bound less than IntervalSet.end")
-        ncls = self.__class__()
-        dist = 0  # = -dist
-        gapped = dist.__lt__
-        nodes = self._toplist
-        toplist = ncls._toplist
-        if self.beg > lower:
-            toplist.append(_Node(Interval(
-                self.namespace,
-                lower,
-                self.beg
-            )))
-            ncls._length += 1
-        for i in range(1, self._toplist.length):
-            if gapped(nodes[i].interval.beg - nodes[i-1].interval.end):
-                # gap between the two intervals, new record:
-                toplist.append(_Node(Interval(
-                    nodes[i].interval.namespace,
-                    nodes[i-1].interval.end,
-                    nodes[i].interval.beg
-                )))
-                ncls._length += 1
-        if self.end < upper:
-            toplist.append(_Node(Interval(
-                self.namespace,
-                self.end,
-                upper
-            )))
-            ncls._length += 1
-        return ncls
+        return (
+            self._get(n) for n in
+            self._iter_complement_nodes(lower, upper)
+        )
+
+
+    def complement(self, lower=None, upper=None):
+        """
+        self.complement() -> IntervalSet
+
+        Computes the complement of the intervals contained in self
+        and return a new IntervalSet object. Requires O(n) time in 
+        the average case.
+        
+        Setting `lower` and `upper` defines the lower- and upper-bound
+        values of the namespace.
+        
+        >>> I = IntervalSet([Interval("Chr",100, 1000)])
+        >>> I.complement(lower=0, upper=1048)
+        IntervalSet(header=[Chr:0-100, Chr:1000-1048], subheader=[])
+        """
+        ncls = self._new_set(backend=self._backend, coords=self._coords)
+        ncls._toplist.extend(list(
+            map(_Node, self.iter_complement(lower, upper))
+        ))
+        ncls._length = ncls._toplist.length
+        return ncls
 
 
     def complement_update(self, lower=None, upper=None):
@@ -2275,6 +5204,84 @@ class IntervalSet(BaseIntervalCollection):
         return this
 
     
+    def _iter_intersection_nodes(self, other, pairwise=True):
+        if self._length < 1 or len(other) < 1:
+            return
+        if pairwise:
+            queries = other._iter_nodes()
+        else:
+            queries = _merge_nodes(other._iter_top_nodes())
+
+        sublists = self._sublist
+        for node in queries:
+            # Depth-first search from the toplist down, keeping a
+            # [(sub)list, index] cursor per open (sub)list:
+            index = self._toplist.find_overlap_index_beg(node)
+            if index < 0:
+                continue
+            listdeque = _deque()
+            listdeque.append([self._toplist, index])
+            while listdeque:
+                cursor = listdeque[0]
+                toplist, index = cursor
+                if ((index < toplist.length) and
+                    (toplist[index].interval.beg < node.interval.end)):
+                    # member node must overlap query node by search criterion
+                    member = toplist[index]
+                    copy = Interval()
+                    copy.namespace = member.interval.namespace
+                    if member.interval.issuperinterval(node.interval):
+                        copy.beg = node.interval.beg
+                        copy.end = node.interval.end
+                    elif member.interval.issubinterval(node.interval):
+                        copy.beg = member.interval.beg
+                        copy.end = member.interval.end
+                    elif member.interval.end < node.interval.end:
+                        copy.beg = node.interval.beg
+                        copy.end = member.interval.end
+                    else:  # isoverlapping_end of query
+                        copy.beg = member.interval.beg
+                        copy.end = node.interval.end
+                    cursor[1] += 1
+                    if 0 <= member.sublist < sublists.length:
+                        sublist = sublists[member.sublist]
+                        subindex = sublist.find_overlap_index_beg(node)
+                        if subindex >= 0:
+                            listdeque.appendleft([sublist, subindex])
+                    yield _Node(copy, (member.instance, node.instance))
+                else:
+                    # no overlap
+                    listdeque.popleft()
+
+
+    def iter_intersection(self, other, pairwise=True, setter=None):
+        """
+        self.iter_intersection(other) -> generator
+
+        Generator variant of `intersection()`, producing the same 
+        members as iterating over the IntervalSet returned by 
+        `intersection()`, straight from the search and without 
+        materializing it. Requires O(m*log(n)) time in the worst case.
+        Members are produced in search order, which is not necessarily
+        sorted.
+
+        When `pairwise=False`, only maximal intersection ranges 
+        with other are returned.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalSet. This is useful for
+        when the query is not of the same object class as the members 
+        of IntervalSet. The function must accept one (and only one) argument
+        and output a single Interval-descendant object.
+        """
+        other = self._coerce_class(other, setter)
+        return (
+            self._get(n) for n in
+            self._iter_intersection_nodes(other, pairwise)
+        )
+
+    
     def intersection(self, other, pairwise=True, setter=None):
         """
         self.intersection(other) -> IntervalSet
@@ -2293,50 +5300,10 @@ class IntervalSet(BaseIntervalCollection):
         and output a single Interval-descendant object.
         """
         other = self._coerce_class(other, setter)
-        ncls = self.__class__(setter=setter)
-        if self._length < 1 or other._length < 1:
-            return ncls
-        if not pairwise:
-            other = other.merge()
-                
-        nodes = _deque()
-        sublists = self._sublist
-        toplists = self._toplist
-        for node in other._iter_nodes():
-            toplist = toplists
-            toplist.index = toplist.find_overlap_index_beg(node)
-
-            listdeque = _deque()
-            listdeque.append(toplist)
-            while listdeque:
-                toplist = listdeque[0]
-                if ((0 <= toplist.index < toplist.length) and
-                    (toplist[toplist.index].interval.beg < node.interval.end)):
-                    # member node must overlap query node by search criterion
-                    copy = Interval()
-                    copy.namespace = toplist[toplist.index].interval.namespace
-                    if toplist[toplist.index].interval.issuperinterval(node.interval):
-                        copy.beg = node.interval.beg
-                        copy.end = node.interval.end
-                    elif toplist[toplist.index].interval.issubinterval(node.interval):
-                        copy.beg = toplist[toplist.index].interval.beg
-                        copy.end = toplist[toplist.index].interval.end
-                    elif toplist[toplist.index].interval.end < node.interval.end:
-                        copy.beg = node.interval.beg
-                        copy.end = toplist[toplist.index].interval.end
-                    else:  # isoverlapping_end of query
-                        copy.beg = toplist[toplist.index].interval.beg
-                        copy.end = node.interval.end
-                    nodes.append(_Node(copy, (toplist[toplist.index].instance, node.instance)))
-                    if 0 <= toplist[toplist.index].sublist < sublists.length:
-                        sublist = sublists[toplist[toplist.index].sublist]
-                        sublist.index = sublist.find_overlap_index_beg(node)
-                        listdeque.appendleft(sublist)
-                    toplist.index += 1
-                else:
-                    # no overlap
-                    listdeque.popleft()
-        ncls._set_ncls(nodes)
+        ncls = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
+        ncls._set_ncls(self._iter_intersection_nodes(other, pairwise))
         return ncls
         
             
@@ -2391,60 +5358,95 @@ class IntervalSet(BaseIntervalCollection):
         self._copy_state(self.symmetric_difference(other, pairwise, setter))
 
 
-    def _scan(self, q, Wq, t, Wt, rev=False):
-        i = 0
-        L = len(Wt)
-        Wo = _deque()
-        overlaps = []
-        while i < L:
-            if Wt[i].interval.end <= q.interval.beg:
-                # A deque del() was implemented internally by rotate()'ing
-                # the deque, pop()'ing, then rotate()'ing back, this is 2n
-                # iterations of the deque length. Is this faster than
-                # building a new empty deque and freeing the old one (which
-                # requires iterating over all elements and freeing mem blocks
-                # anyways)?
-                del(Wt[i])
-                L -= 1
-            elif Wt[i].interval.isoverlapping(q.interval):
-                if rev:
-                    yield (Wt[i], q)
-                else:
-                    yield (q, Wt[i])
-                i += 1
-        if q.interval.end > t.interval.beg:
-            Wq.append(q)
+    def _iter_union_nodes(self, other, abutting=False, pairwise=True):
+        # Sweep both sorted member streams once, in order of `beg`,
+        # keeping only the members that may still overlap an upcoming
+        # node in a min-heap (keyed by `end`) per operand. Members are
+        # retired from the heap as soon as the sweep passes their `end`.
+        # This is the same idea as chrom_sweep (see Resources, 2).
+        if self._length > 0 and len(other) > 0 and \
+           self.namespace != other.namespace:
+            # members of different namespaces never overlap, so both
+            # are produced as-is, by iter_union(); union() raises
+            # ValueError first, as an IntervalSet holds one namespace
+            for this in (self, other):
+                nodes = this._iter_sorted_nodes() \
+                    if   pairwise \
+                    else _merge_nodes(this._iter_top_nodes(), abutting)
+                for node in nodes:
+                    yield node.copy()
+            return
 
-            
-    # def union2(self, other, abutting=False, pairwise=True, setter=None):
-    #     ix = 0;
-    #     iy = 0;
-    #     X  = list(self._iter_nodes())
-    #     Y  = list(other._iter_nodes())
-    #     Wx = _deque()
-    #     Wy = _deque()
-    #     Lx = len(X)
-    #     Ly = len(Y)
-    #     sentinel = _Node(Interval(self.namespace, _INF, _INF))
-    #     while ((ix < Lx) or (iy < Ly)):
-    #         x = X[ix] if ix < Lx else sentinel
-    #         y = Y[iy] if iy < Ly else sentinel
-    #         if x.interval.beg <= y.interval.beg:
-    #             for pair in self._scan(x, Wx, y, Wy, rev=False):
-    #                 print(('x', pair))
-    #             ix += 1
-    #         else:
-    #             for pair in self._scan(y, Wy, x, Wx, rev=True):
-    #                 print(('y', pair))
-    #             iy += 1
+        if not pairwise:
+            for node in _merge_nodes(
+                    _heapmerge(
+                        self._iter_top_nodes(),
+                        other._iter_top_nodes(),
+                        key=_node_beg
+                    ),
+                    abutting):
+                yield node
+            return
+
+        dist = 0  # = -dist
+        upstream = dist.__gt__ if abutting else dist.__ge__
+        nodes1 = self._iter_sorted_nodes()
+        nodes2 = other._iter_sorted_nodes()
+        node1 = next(nodes1, None)
+        node2 = next(nodes2, None)
+        window1 = []  # heap of [end, count, node, paired]
+        window2 = []
+        count = 0
+        while node1 is not None or node2 is not None:
+            if node2 is None or \
+               (node1 is not None and node1.interval.beg <= node2.interval.beg):
+                node, own, opp, rev = node1, window1, window2, False
+                node1 = next(nodes1, None)
+            else:
+                node, own, opp, rev = node2, window2, window1, True
+                node2 = next(nodes2, None)
+
+            # Retire members that end upstream of the sweep position;
+            # they can never overlap this, or any later, node:
+            beg = node.interval.beg
+            for window in (own, opp):
+                while window and upstream(window[0][0] - beg):
+                    item = _heappop(window)
+                    if not item[3]:
+                        yield item[2].copy()
+
+            # Every member remaining in the opposing window overlaps
+            # the node by construction:
+            for item in opp:
+                item[3] = True
+                lower, upper = (item[2], node) if rev else (node, item[2])
+                yield _Node(
+                    Interval(
+                        node.interval.namespace,
+                        min(node.interval.beg, item[2].interval.beg),
+                        max(node.interval.end, item[2].interval.end)
+                    ),
+                    (lower.instance, upper.instance)
+                )
+            _heappush(own, [node.interval.end, count, node, len(opp) > 0])
+            count += 1
+
+        for window in (window1, window2):
+            for item in sorted(window):
+                if not item[3]:
+                    yield item[2].copy()
 
                 
-    def union(self, other, abutting=False, pairwise=True, setter=None):
+    def iter_union(self, other, abutting=False, pairwise=True, setter=None):
         """
-        self.union(other) -> IntervalSet
+        self.iter_union(other) -> generator
 
-        Find the interval overlap union between self and other. Best
-        case, O(m+n); worst case, O(m*n).
+        Generator variant of `union()`, producing the same members as
+        iterating over the IntervalSet returned by `union()`, without
+        materializing it. Requires a single sweep over self and other,
+        O(m+n+k) time, where k is the number of overlapping pairs, and
+        memory proportional to the maximum overlap depth. Members are
+        produced in sweep order, which is not necessarily sorted.
 
         Setting `abutting=True` allows union of abutting intervals. When
         `pairwise=False`, only maximal union ranges with other are 
@@ -2458,76 +5460,54 @@ class IntervalSet(BaseIntervalCollection):
         and output a single Interval-descendant object.
         """
         other = self._coerce_class(other, setter)
+        return (
+            self._get(n) for n in
+            self._iter_union_nodes(other, abutting, pairwise)
+        )
+
+                
+    def union(self, other, abutting=False, pairwise=True, setter=None):
+        """
+        self.union(other) -> IntervalSet
+
+        Find the interval overlap union between self and other. Each 
+        overlapping pair of members is replaced by its hull, and members
+        that do not overlap any member of the other are kept as-is. 
+        Requires O(m+n+k) time, where k is the number of overlapping 
+        pairs.
+
+        Setting `abutting=True` allows union of abutting intervals. When
+        `pairwise=False`, only maximal union ranges with other are 
+        returned, in O(m+n) time.
+
+        Use `iter_union()` to stream the result instead. Raises 
+        ValueError if self and other are of different namespaces, as 
+        an IntervalSet holds one; `iter_union()` then produces the 
+        members of both.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalSet. This is useful for
+        when the query is not of the same object class as the members 
+        of IntervalSet. The function must accept one (and only one) argument
+        and output a single Interval-descendant object.
+        """
         # I independently re-invented an algorithm similar to fjoin:
         # https://doi.org/10.1089/cmb.2006.13.1457
-        if not pairwise:
-            other = other.merge(abutting)
-        nodes  = _deque()
-        nodes1 = sorted(self._copy_nodes(), key=_node_pos)
-        nodes2 = sorted(other._copy_nodes(), key=_node_pos)
-        len1 = len(self)
-        len2 = len(other)
-        i = 0  # nodes1 ref index
-        j = 0  # nodes2 current overlap index
-        k = 0  # nodes2 first overlap index
-        dist = 0  # = -dist
-        upstream = dist.__gt__ if abutting else dist.__ge__
-        while ((i < len1) or (k < len2)):
-            print(
-                (i, j, k,
-                 (nodes1[i].interval if i < len1 else None),
-                 (nodes2[k].interval if k < len2 else None),
-                 (nodes2[j].interval if j < len2 else None))
-            )
-            if ((i < len1) and (j < len2)):
-                if upstream(nodes1[i].interval.end - nodes2[j].interval.beg):
-                    # node1 < node2, next node1
-                    if nodes1[i].sublist == -1:
-                        nodes.append(nodes1[i])
-                        k = j
-                    j  = k
-                    i += 1
-                elif upstream(nodes2[j].interval.end - nodes1[i].interval.beg):
-                    # node2 < node1, next node2
-                    if nodes2[j].sublist == -1:
-                        nodes.append(nodes2[j])
-                    k  = j
-                    j += 1
-                else:
-                    # overlap
-                    if ((i+1 < len1) and
-                        upstream(nodes2[j].interval.end - nodes1[i+1].interval.beg)):
-                        # peek at the next node1 to set k
-                        k = j + 1
-                    nodes.append(_Node(
-                        Interval(
-                            nodes1[i].interval.namespace,
-                            min(nodes1[i].interval.beg, nodes2[j].interval.beg),
-                            max(nodes1[i].interval.end, nodes2[j].interval.end),
-                        ),
-                        (
-                            nodes1[i].instance,
-                            nodes2[j].instance
-                        )
-                    ))
-                    nodes1[i].sublist = -2
-                    nodes2[j].sublist = -2
-                    j += 1
-            elif i < len1:
-                # ergo: j >= len2, nodes1 _may_ be exhausted, reset j
-                if nodes1[i].sublist == -1:
-                    nodes.append(nodes1[i])
-                    k = j
-                j  = k
-                i += 1
-            else:
-                # ergo: i >= len1, nodes1 is exhausted
-                if nodes2[k].sublist == -1:
-                    nodes.append(nodes2[k])
-                k += 1
-                
-        ncls = self.__class__(setter=self._setter)
-        ncls._set_ncls(nodes)
+        other = self._coerce_class(other, setter)
+        if self._length > 0 and len(other) > 0 and \
+           self.namespace != other.namespace:
+            raise ValueError("mixed-namespace IntervalSet")
+        ncls = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
+        nodes = self._iter_union_nodes(other, abutting, pairwise)
+        if pairwise:
+            ncls._set_ncls(nodes)
+        else:
+            # maximal union ranges are sorted and disjoint:
+            ncls._toplist.extend(list(nodes))
+            ncls._length = ncls._toplist.length
         return ncls
         
 
@@ -2566,7 +5546,9 @@ class IntervalSet(BaseIntervalCollection):
         and outputs a single Interval-descendant object.
         """
         other = self._coerce_class(other, setter)
-        ncls = self.__class__(setter=self._setter)
+        ncls = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
         ncls._set_ncls(
             set(self._copy_nodes()) - set(other._copy_nodes())
         )
@@ -2595,7 +5577,9 @@ class IntervalSet(BaseIntervalCollection):
         and outputs a single Interval-descendant object.
         """
         other = self._coerce_class(other, setter)
-        ncls = self.__class__(setter=self._setter)
+        ncls = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
         ncls._set_ncls(
             set(self._copy_nodes()) & set(other._copy_nodes())
         )
@@ -2624,7 +5608,9 @@ class IntervalSet(BaseIntervalCollection):
         and outputs a single Interval-descendant object.
         """
         other = self._coerce_class(other, setter)
-        ncls = self.__class__(setter=self._setter)
+        ncls = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
         ncls._set_ncls(
             set(self._copy_nodes()) ^ set(other._copy_nodes())
         )
@@ -2653,7 +5639,9 @@ class IntervalSet(BaseIntervalCollection):
         and outputs a single Interval-descendant object.
         """
         other = self._coerce_class(other, setter)
-        ncls = self.__class__(setter=self._setter)
+        ncls = self._new_set(
+            setter=self._setter, backend=self._backend, coords=self._coords
+        )
         ncls._set_ncls(
             set(self._copy_nodes()) | set(other._copy_nodes())
         )
@@ -2690,7 +5678,738 @@ class IntervalSet(BaseIntervalCollection):
     clear = empty
     
     to_string = __str__
-    
+
+
+
+class ConcurrentIntervalSet(IntervalSet):
+    """
+    An IntervalSet that may be shared between threads, with any number
+    of concurrent readers and writers serialized by a lock.
+
+    Queries never take the lock for longer than it takes to obtain an
+    O(1) snapshot (see `IntervalSet.snapshot()`) of the latest published
+    state, then search it without locking; generators keep reading from
+    the snapshot they started with. Updates are applied under the lock:
+    those that compute a new state from self, such as the `*_update()`
+    methods and the in-place operators (`&=`, `|=`, ...), hold it from
+    reading self until the result is published, so that no concurrent
+    update is lost. Another ConcurrentIntervalSet operand is read from
+    its snapshot, taken before the lock. Copy-on-write ensures updates
+    never modify (sub)lists that a snapshot is reading. Readers therefore proceed in parallel and never
+    observe a half-restructured (sub)list. All readers between two
+    updates share one snapshot, so only the first update after a read
+    pays for copying the (sub)lists it modifies.
+
+    >>> ncls = ConcurrentIntervalSet([Interval("Chr1", 0, 150)])
+    >>> hits = ncls.overlaps(Interval("Chr1", 75, 120))  # snapshot taken
+    >>> ncls.insort(Interval("Chr1", 10, 100))
+    >>> list(hits)
+    [Interval(Chr1:0-150)]
+    """
+
+    def __init__(self, intervals=[], setter=remit, backend='ncls', coords=None):
+        self._lock = _RLock()
+        self._view = None
+        IntervalSet.__init__(self, intervals, setter, backend, coords)
+
+
+    def _snapshot(self):
+        # Return the latest published, immutable state of self:
+        with self._lock:
+            if self._view is None:
+                view = IntervalSet(
+                    setter=self._setter, backend=self._backend, coords=self._coords
+                )
+                view._copy_state(self)
+                self._view = view
+            return self._view
+
+
+    # Updates hold the lock and unpublish the current snapshot:
+    def _set_ncls(self, nodes):
+        with self._lock:
+            IntervalSet._set_ncls(self, nodes)
+            self._view = None
+
+
+    def _copy_state(self, other):
+        with self._lock:
+            IntervalSet._copy_state(self, other)
+            self._view = None
+
+
+    def empty(self):
+        """Remove all elements from the IntervalSet."""
+        with self._lock:
+            IntervalSet.empty(self)
+            self._view = None
+
+
+    def insort(self, interval, setter=None):
+        """Same as `IntervalSet.insort()`, holding the lock."""
+        with self._lock:
+            IntervalSet.insort(self, interval, setter)
+            self._view = None
+
+
+    def pop(self):
+        """Same as `IntervalSet.pop()`, holding the lock."""
+        with self._lock:
+            interval = IntervalSet.pop(self)
+            self._view = None
+        return interval
+
+
+    def remove(self, interval, setter=None):
+        """Same as `IntervalSet.remove()`, holding the lock."""
+        with self._lock:
+            try:
+                IntervalSet.remove(self, interval, setter)
+            finally:
+                self._view = None
+
+
+    def snapshot(self):
+        """Same as `IntervalSet.snapshot()`, holding the lock."""
+        with self._lock:
+            return IntervalSet.snapshot(self)
+
+
+    def _transform(self, func, lower=None, upper=None):
+        with self._lock:
+            IntervalSet._transform(self, func, lower, upper)
+            self._view = None
+
+
+    # Updates computing a new state from self hold the lock throughout,
+    # from reading self to _copy_state(); a ConcurrentIntervalSet operand
+    # is snapshot first, not to wait for its lock while holding ours.
+    def merge_update(self, abutting=False):
+        """Same as `IntervalSet.merge_update()`, holding the lock."""
+        with self._lock:
+            IntervalSet.merge_update(self, abutting)
+
+
+    def complement_update(self, lower=None, upper=None):
+        """Same as `IntervalSet.complement_update()`, holding the lock."""
+        with self._lock:
+            IntervalSet.complement_update(self, lower, upper)
+
+
+    def difference_update(self, other, pairwise=True, setter=None):
+        """Same as `IntervalSet.difference_update()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.difference_update(self, other, pairwise, setter)
+
+
+    def intersection_update(self, other, pairwise=True, setter=None):
+        """Same as `IntervalSet.intersection_update()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.intersection_update(self, other, pairwise, setter)
+
+
+    def symmetric_difference_update(self, other, pairwise=True, setter=None):
+        """Same as `IntervalSet.symmetric_difference_update()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.symmetric_difference_update(self, other, pairwise, setter)
+
+
+    def union_update(self, other, abutting=False, pairwise=True, setter=None):
+        """Same as `IntervalSet.union_update()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.union_update(self, other, abutting, pairwise, setter)
+
+
+    def difference_update_set(self, other):
+        """Same as `IntervalSet.difference_update_set()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.difference_update_set(self, other)
+
+
+    def intersection_update_set(self, other):
+        """Same as `IntervalSet.intersection_update_set()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.intersection_update_set(self, other)
+
+
+    def symmetric_difference_update_set(self, other):
+        """Same as `IntervalSet.symmetric_difference_update_set()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.symmetric_difference_update_set(self, other)
+
+
+    def union_update_set(self, other):
+        """Same as `IntervalSet.union_update_set()`, holding the lock."""
+        other = _operand_snapshot(other)
+        with self._lock:
+            IntervalSet.union_update_set(self, other)
+
+
+    # Queries search the latest published snapshot:
+    def __len__(self):
+        return len(self._snapshot())
+
+
+    def _iter_nodes(self, lower=0, upper=-1):
+        return self._snapshot()._iter_nodes(lower, upper)
+
+
+    def _iter_sorted_nodes(self):
+        return self._snapshot()._iter_sorted_nodes()
+
+
+    def _iter_top_nodes(self):
+        return self._snapshot()._iter_top_nodes()
+
+
+    def _find_nodes(self, nodes, pairwise=False, get=lambda i,o:o):
+        return self._snapshot()._find_nodes(nodes, pairwise, get)
+
+
+    def _stab_nodes(self, node):
+        return self._snapshot()._stab_nodes(node)
+
+
+    def _iter_intersection_nodes(self, other, pairwise=True):
+        return self._snapshot()._iter_intersection_nodes(other, pairwise)
+
+
+    def _iter_union_nodes(self, other, abutting=False, pairwise=True):
+        return self._snapshot()._iter_union_nodes(other, abutting, pairwise)
+
+
+    def _iter_cluster_nodes(self, distance=0, abutting=False):
+        return self._snapshot()._iter_cluster_nodes(distance, abutting)
+
+
+    def memory_usage(self, deep=True):
+        """Same as `IntervalSet.memory_usage()`, of the latest snapshot."""
+        return self._snapshot().memory_usage(deep)
+
+
+    # Aliases
+    add = insort
+
+    clear = empty
+
+
+
+class IntervalBinIndex(BaseIntervalCollection):
+    """
+    Implements the hierarchical binning index of the UCSC Genome
+    Browser and tabix:
+
+      Kent WJ, Sugnet CW, Furey TS, et al. The Human Genome Browser at
+      UCSC. Genome Res. 2002 12(6):996-1006. 
+      doi: 10.1101/gr.229102. PMID: 12045153.
+
+    Each member is assigned to the smallest of the 16kb, 128kb, 1Mb,
+    8Mb, 64Mb or 512Mb bins containing it. A query only scans the few
+    bins overlapping it at each level, and filters their members with
+    `isoverlapping()`, so the lookup cost depends on the size of the
+    query window, not on how the members nest. Unlike IntervalSet, 
+    members may belong to any number of namespaces. Intervals the 
+    scheme cannot bin (e.g., beyond 512Mb) are kept in an overflow bin
+    scanned by every query.
+
+    >>> index = IntervalBinIndex([
+    ...    Interval("Chr1", 10, 100),
+    ...    Interval("Chr1", 200,500),
+    ...    Interval("Chr2",  0, 150)
+    ... ])
+    >>> list(index.overlaps(Interval("Chr1", 75, 220)))
+    [Interval(Chr1:10-100), Interval(Chr1:200-500)]
+    """
+
+    def __init__(self, intervals=[], setter=remit):
+        """
+        Multiple references to the same object(s) are silently ignored.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalBinIndex. This is useful
+        for when the query is not of the same object class as the members 
+        of IntervalBinIndex. The function must accept one (and only one)
+        argument and outputs a single Interval-descendant object.
+        """
+        BaseIntervalCollection.__init__(self, setter)
+        self.empty()
+        self.update(intervals)
+
+
+    def __bool__(self):
+        return self._length > 0
+
+
+    def __len__(self):
+        return self._length
+
+
+    def __iter__(self):
+        return (self._get(n) for n in self._iter_nodes())
+
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, _reprify(list(self)))
+
+
+    def _iter_nodes(self):
+        # Members sorted by position within each namespace:
+        for bins in self._bins.values():
+            for node in sorted(
+                (n for nodes in bins.values() for n in nodes.values()),
+                key=_node_pos
+            ):
+                yield node
+
+
+    def _find_nodes(self, nodes, pairwise=False, get=lambda i,o:o):
+        nr = not pairwise
+        visited = set()
+        for node in _listify(nodes):
+            bins = self._bins.get(node.interval.namespace)
+            if not bins:
+                continue
+            hits = []
+            for bin_id in _reg2bins(node.interval):
+                for member in bins.get(bin_id, {}).values():
+                    if node.interval.isoverlapping(member.interval):
+                        hits.append(member)
+            hits.sort(key=_node_pos)
+            for member in hits:
+                if nr:
+                    if id(member.instance) in visited:
+                        continue
+                    visited.add(id(member.instance))
+                yield get(node, member)
+
+
+    def empty(self):
+        """Remove all elements from the IntervalBinIndex."""
+        # {namespace: {bin: {id(instance): _Node}}}, so that membership
+        # tests do not scan the bins:
+        self._bins = {}
+        self._length = 0
+
+
+    def insort(self, interval, setter=None):
+        """
+        Add member object to its bin of the IntervalBinIndex. Adding an
+        object that is already a member does nothing.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalBinIndex. This is useful
+        for when the query is not of the same object class as the members 
+        of IntervalBinIndex. The function must accept one (and only one)
+        argument and outputs a single Interval-descendant object.
+        """
+        node = self._set(interval, setter)
+        bins = self._bins.setdefault(node.interval.namespace, {})
+        nodes = bins.setdefault(_reg2bin(node.interval), {})
+        if id(node.instance) in nodes:
+            return
+        nodes[id(node.instance)] = node
+        self._length += 1
+
+
+    def update(self, intervals, setter=None):
+        """
+        Add each member object of an iterable to the IntervalBinIndex.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalBinIndex. This is useful
+        for when the query is not of the same object class as the members 
+        of IntervalBinIndex. The function must accept one (and only one)
+        argument and outputs a single Interval-descendant object.
+        """
+        for interval in intervals:
+            self.insort(interval, setter)
+
+
+    def remove(self, interval, setter=None):
+        """
+        Remove a member object from the IntervalBinIndex. Raises 
+        KeyError if the object is not a member.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalBinIndex. This is useful
+        for when the query is not of the same object class as the members 
+        of IntervalBinIndex. The function must accept one (and only one)
+        argument and outputs a single Interval-descendant object.
+        """
+        node = self._set(interval, setter)
+        bin_id = _reg2bin(node.interval)
+        bins = self._bins.get(node.interval.namespace, {})
+        nodes = bins.get(bin_id, {})
+        if id(node.instance) not in nodes:
+            raise KeyError("'%s'" % repr(node.instance))
+        del nodes[id(node.instance)]
+        self._length -= 1
+        if not nodes:
+            del bins[bin_id]
+            if not bins:
+                del self._bins[node.interval.namespace]
+
+
+    def discard(self, interval, setter=None):
+        """
+        Remove a member object from the IntervalBinIndex. If the object
+        is not a member, do nothing.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalBinIndex. This is useful
+        for when the query is not of the same object class as the members 
+        of IntervalBinIndex. The function must accept one (and only one)
+        argument and outputs a single Interval-descendant object.
+        """
+        try:
+            self.remove(interval, setter)
+        except KeyError:
+            pass
+
+
+    def overlap_pairs(self, intervals, setter=None):
+        """
+        Perform an inclusive overlap search of IntervalBinIndex with one 
+        or more query interval objects and return a generator object 
+        producing 2-tuples of each query interval and its overlapping 
+        IntervalBinIndex member.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalBinIndex. This is useful
+        for when the query is not of the same object class as the members 
+        of IntervalBinIndex. The function must accept one (and only one)
+        argument and outputs a single Interval-descendant object.
+        """
+        nodes = [self._set(i, setter) for i in _listify(intervals)]
+        return (
+            (i.instance, o.instance) for i,o in
+            self._find_nodes(nodes, True, lambda i,o:(i,o))
+        )
+
+
+    def overlaps(self, intervals, setter=None):
+        """
+        Perform an inclusive overlap search of IntervalBinIndex with one
+        or more query interval objects and return a generator object 
+        producing IntervalBinIndex members overlapping the input interval
+        object(s), sorted by position for each query. Members overlapping
+        several queries are produced once.
+
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for querying the IntervalBinIndex. This is useful
+        for when the query is not of the same object class as the members 
+        of IntervalBinIndex. The function must accept one (and only one)
+        argument and outputs a single Interval-descendant object.
+        """
+        nodes = [self._set(i, setter) for i in _listify(intervals)]
+        return (n.instance for n in self._find_nodes(nodes, False))
+
+
+    # Aliases
+    add = insort
+
+    clear = empty
+
+
+
+class IntervalMask(BaseIntervalCollection):
+    """
+    A set of integer positions in one namespace, e.g., callable regions
+    or a blacklist, stored as a compressed mask in the manner of Roaring
+    bitmaps:
+
+      Lemire D, Ssi-Yan-Kai G, Kaser O. Consistently faster and smaller
+      compressed bitmaps with Roaring. Softw Pract Exp. 2016 
+      46(11):1547-1569. doi: 10.1002/spe.2402.
+
+    Positions are split into chunks of 2**16 bases, each held as a list
+    of runs, or as a bitmap (an int) when it has more than 2048 runs.
+    AND (&), OR (|), XOR (^), difference (-) and complement (~) operate
+    chunk by chunk without creating any interval objects: runs by a 
+    sweep of their boundaries, bitmaps by a single int operation. 
+
+    Any intervals may be used to build a mask, typically the output of
+    `IntervalSet.merge()`. Members of ClosedInterval classes include
+    their end position. Iterating over a mask produces the maximal 
+    Interval objects it covers, and `to_interval_set()` converts it
+    back to an IntervalSet.
+
+    >>> I = IntervalMask([Interval("Chr", 0, 100), Interval("Chr", 50, 150)])
+    >>> J = IntervalMask([Interval("Chr", 120, 200)])
+    >>> list(I & J), len(I | J), 130 in I ^ J
+    ([Interval(Chr:120-150)], 200, False)
+    """
+
+    def __init__(self, intervals=[], setter=remit):
+        """
+        The `setter` keyword argument accepts a function used to 
+        extract/construct from the input object an Interval-descendant
+        object instance for building the IntervalMask. This is useful
+        for when the input is not of the same object class as Interval.
+        The function must accept one (and only one) argument and outputs
+        a single Interval-descendant object.
+        """
+        BaseIntervalCollection.__init__(self, setter)
+        self._namespace = None
+        self._chunks = {}  # {chunk: runs or bitmap}
+        chunks = {}
+        for interval in intervals:
+            interval = self._set(interval).interval
+            if interval.isempty():
+                continue
+            self._check_namespace(interval.namespace)
+            self._namespace = interval.namespace
+            try:
+                beg = _ceil(interval.beg)
+                end = _floor(interval.end) + 1 \
+                    if isinstance(interval, ClosedInterval) else \
+                    _ceil(interval.end)
+            except (OverflowError, ValueError):
+                raise ValueError("IntervalMask requires finite coordinates")
+            while beg < end:
+                chunk = beg >> _MASK_BITS
+                stop = min(end, (chunk + 1) << _MASK_BITS)
+                offset = chunk << _MASK_BITS
+                chunks.setdefault(chunk, []).append((beg - offset, stop - offset))
+                beg = stop
+        for chunk, runs in chunks.items():
+            runs.sort()
+            merged = [runs[0]]
+            for beg, end in runs:
+                if beg <= merged[-1][1]:
+                    if merged[-1][1] < end:
+                        merged[-1] = (merged[-1][0], end)
+                else:
+                    merged.append((beg, end))
+            self._chunks[chunk] = _runs_container(merged)
+
+
+    def _check_namespace(self, namespace):
+        if self._namespace is not None and namespace != self._namespace:
+            raise ValueError("mixed-namespace IntervalMask")
+
+
+    def _combine(self, other, op):
+        if not isinstance(other, IntervalMask):
+            other = IntervalMask(_listify(other))
+        if other._namespace is not None:
+            self._check_namespace(other._namespace)
+        mask = IntervalMask(setter=self._setter)
+        mask._namespace = self._namespace if other._namespace is None \
+            else other._namespace
+        chunks = self._chunks
+        others = other._chunks
+        for chunk in sorted(set(chunks) | set(others)):
+            a = chunks.get(chunk, [])
+            b = others.get(chunk, [])
+            if isinstance(a, int) or isinstance(b, int):
+                if not isinstance(a, int):
+                    a = _runs_bitmap(a)
+                if not isinstance(b, int):
+                    b = _runs_bitmap(b)
+                container = _mask_container(op(a, b))
+            else:
+                container = _runs_container(_sweep_runs(a, b, op))
+            if container is not None:
+                mask._chunks[chunk] = container
+        return mask
+
+
+    def _iter_runs(self):
+        # Yield the absolute (beg, end) runs, joining runs that abut
+        # across chunks.
+        prev = None
+        for chunk in sorted(self._chunks):
+            runs = self._chunks[chunk]
+            if isinstance(runs, int):
+                runs = _bitmap_runs(runs)
+            offset = chunk << _MASK_BITS
+            for beg, end in runs:
+                beg += offset
+                end += offset
+                if prev is not None and prev[1] == beg:
+                    prev = (prev[0], end)
+                    continue
+                if prev is not None:
+                    yield prev
+                prev = (beg, end)
+        if prev is not None:
+            yield prev
+
+
+    def __and__(self, other):
+        return self._combine(other, _and)
+
+
+    def __or__(self, other):
+        return self._combine(other, _or)
+
+
+    def __xor__(self, other):
+        return self._combine(other, _xor)
+
+
+    def __sub__(self, other):
+        return self._combine(other, _mask_sub)
+
+
+    def __invert__(self):
+        return self.complement()
+
+
+    def __bool__(self):
+        return bool(self._chunks)
+
+
+    def __contains__(self, pos):
+        """
+        Test whether self covers a 0-based integer position: that of the
+        base [pos, pos + 1), as the mask holds the bases of half-open
+        intervals. Unlike `IntervalSet.stab()`, which takes 1-based 
+        positions as Point objects do, `pos in mask` is therefore
+        `stab(pos + 1)`.
+
+        >>> M = IntervalMask([Interval("Chr", 50, 60)])
+        >>> 49 in M, 50 in M, 59 in M, 60 in M
+        (False, True, True, False)
+        """
+        container = self._chunks.get(pos >> _MASK_BITS)
+        if container is None:
+            return False
+        pos &= _MASK_CHUNK - 1
+        if isinstance(container, int):
+            return bool((container >> pos) & 1)
+        index = _bisect_right(container, (pos, _INF)) - 1
+        return index >= 0 and pos < container[index][1]
+
+
+    def __eq__(self, other):
+        return isinstance(other, IntervalMask) and \
+            self._chunks == other._chunks and \
+            (not self._chunks or self._namespace == other._namespace)
+
+
+    def __ne__(self, other):
+        return not self == other
+
+
+    def __iter__(self):
+        namespace = self._namespace
+        return (Interval(namespace, beg, end) for beg, end in self._iter_runs())
+
+
+    def __len__(self):
+        return self.cardinality()
+
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, _reprify(list(self)))
+
+
+    @property
+    def namespace(self):
+        return self._namespace
+
+
+    @property
+    def beg(self):
+        if not self._chunks:
+            return _NULL_BEG
+        chunk = min(self._chunks)
+        runs = self._chunks[chunk]
+        if isinstance(runs, int):
+            return (chunk << _MASK_BITS) + (runs & -runs).bit_length() - 1
+        return (chunk << _MASK_BITS) + runs[0][0]
+
+
+    @property
+    def end(self):
+        if not self._chunks:
+            return _NULL_END
+        chunk = max(self._chunks)
+        runs = self._chunks[chunk]
+        if isinstance(runs, int):
+            return (chunk << _MASK_BITS) + runs.bit_length()
+        return (chunk << _MASK_BITS) + runs[-1][1]
+
+
+    def isempty(self):
+        return not self._chunks
+
+
+    def cardinality(self):
+        """
+        Return the number of positions (e.g., bases) in the mask.
+        """
+        total = 0
+        for container in self._chunks.values():
+            if isinstance(container, int):
+                total += bin(container).count('1')
+            else:
+                total += sum(end - beg for beg, end in container)
+        return total
+
+
+    def complement(self, lower=None, upper=None):
+        """
+        self.complement() -> IntervalMask
+
+        Return the positions between `lower` and `upper` missing from
+        the mask. The bounds default to the mask's first and last 
+        positions, as for `IntervalSet.complement()`.
+
+        >>> I = IntervalMask([Interval("Chr", 100, 1000)])
+        >>> list(I.complement(lower=0, upper=1048))
+        [Interval(Chr:0-100), Interval(Chr:1000-1048)]
+        """
+        if not self._chunks:
+            return IntervalMask(setter=self._setter)
+        if lower is None:
+            lower = self.beg
+        if lower > self.beg:
+            raise ValueError("Lower bound greater than IntervalMask.beg")
+        if upper is None:
+            upper = self.end
+        if upper < self.end:
+            raise ValueError("Upper bound less than IntervalMask.end")
+        return self._combine(
+            IntervalMask([Interval(self._namespace, lower, upper)]), _xor
+        )
+
+
+    def to_interval_set(self, setter=remit):
+        """
+        Return an IntervalSet of the maximal intervals in the mask.
+        """
+        ncls = IntervalSet(setter=setter)
+        ncls._toplist.extend(list(map(_Node, self)))
+        ncls._length = ncls._toplist.length
+        return ncls
+
+
+    # Aliases
+    intersection = __and__
+
+    union = __or__
+
+    symmetric_difference = __xor__
+
+    difference = __sub__
+
 
 #       10        20        30        40        50        60        70        80
 #---+----|----+----|----+----|----+----|----+----|----+----|----+----|----+----|
@@ -0,0 +1,583 @@
+"""
+Module for the on-disk Nested Containment List
+
+`DiskIntervalSet.from_sorted()` builds the flat layout of NCListIndex
+(see `IntervalSet`) from a stream of intervals sorted by beg, such as
+that of `external_sort()`, without holding it in memory: the stream is
+nested with the stack-of-parents algorithm of `IntervalSet._set_ncls()`,
+and the coordinate and sublist columns are written to the files of a
+directory. A `DiskIntervalSet` maps these files in memory, read-only,
+and is searched like an IntervalSet, with resident memory bounded by
+the pages of the files that queries touch.
+
+Performance Notes:
+ 1. A member is written out when it is popped from the stack of parents,
+    to the level of its nesting depth. The members of one level are
+    popped in stream order, and every member's subtree is contiguous in
+    the stream, so the members of each sublist are contiguous within the
+    next level, and a sublist's range is known when its parent is
+    written. The build holds the stack of parents, and up to
+    `_LEVEL_BUFFER` bytes of records before spilling them to disk.
+ 2. The levels are then concatenated, toplist first, into the columns
+    of NCListIndex, in one sequential pass over the spilled records.
+ 3. Columns are stored as array.array items, in native byte order:
+    doubles, as in IntervalArray, or the integers of a `coords` mode.
+
+"""
+
+import os as _os
+import sys as _sys
+import json as _json
+
+from mmap import mmap as _mmap
+from mmap import ACCESS_READ as _ACCESS_READ
+from struct import Struct as _Struct
+from itertools import islice as _islice
+from array import array as _array
+from sys import getsizeof as _getsizeof
+from .constants import NULL_NAMESPACE as _NULL_NS
+from .constants import NULL_BEG as _NULL_BEG
+from .constants import NULL_END as _NULL_END
+from .intervals import BaseInterval, LeftClosedInterval, ClosedInterval
+from .intervals import Interval, ClosedPoint, Point
+from .collections import BaseIntervalCollection, IntervalSet, NCListIndex
+from .collections import remit, _Node, _listify, _merge_nodes
+from .collections import _COORDS, _get_coords, _coord_arrays
+from .arrays import _number
+
+# column files, in the order of their records' fields:
+_COLUMNS = ('begs', 'ends', 'sublo', 'subhi', 'ranks')
+
+# bytes of records buffered by the build before they are spilled:
+_LEVEL_BUFFER = 2**22
+
+# intervals read from the stream at once:
+_CHUNK = 4096
+
+
+def _class_name(cls):
+    # Return the name an interval class is recorded by in the header
+    return '%s:%s' % (cls.__module__, cls.__qualname__)
+
+
+# interval classes members can be made back as, by recorded name:
+_INTERVAL_CLASSES = {
+    _class_name(cls): cls for cls in (
+        BaseInterval, LeftClosedInterval, ClosedInterval, Interval, ClosedPoint, Point
+    )
+}
+
+
+def _check_namespace(namespace):
+    # The header is JSON: a namespace must be read back equal to itself
+    try:
+        if _json.loads(_json.dumps(namespace)) == namespace:
+            return namespace
+    except (TypeError, ValueError):
+        pass
+    raise ValueError(
+        "DiskIntervalSet namespace is not JSON-serializable: %r" % (namespace,)
+    )
+
+
+def _typecodes(coords):
+    # Return the array typecodes of the columns of a `coords` mode
+    typecode = 'd' if coords is None else _COORDS[coords]
+    return (typecode, typecode, 'q', 'q', 'q')
+
+
+def _pop_parent(parents, buffers, pack):
+    # Pop the innermost parent, and buffer its record at its level
+    beg, end, rank, sublo, subhi = parents.pop()
+    buffers[len(parents)].append(pack(beg, end, sublo, subhi, rank))
+
+
+def _spill(buffers, blocks, spill):
+    # Write the buffered records of each level to the spill file
+    for level, buffer in enumerate(buffers):
+        if buffer:
+            data = b''.join(buffer)
+            blocks[level].append((spill.tell(), len(data)))
+            spill.write(data)
+            buffer.clear()
+
+
+def _write_ncls(intervals, path, interval_cls, coords):
+    # Nest a stream of intervals sorted by beg, and write its NCLS to
+    # the files of directory `path` (see DiskNCListIndex)
+    typecodes = _typecodes(coords)
+    record = _Struct('=' + ''.join(typecodes))
+    pack = record.pack
+    namespace = None
+    length = 0
+    last = None  # beg of the previous member
+    parents = []  # stack of open superintervals, [beg, end, rank, sublo, subhi]
+    counts = []  # per level, member count
+    buffers = []  # per level, records not yet spilled
+    blocks = []  # per level, (offset, size) of its spilled records
+    buffered = 0
+    _os.makedirs(path, exist_ok=True)
+    levels = _os.path.join(path, 'levels')
+    try:
+        with open(levels, 'w+b') as spill:
+            iterator = iter(intervals)
+            while True:
+                chunk = [i for i in _islice(iterator, _CHUNK) if not i.isempty()]
+                if not chunk:
+                    break
+                if coords is not None:
+                    _coord_arrays(chunk, typecodes[0])
+                for interval in chunk:
+                    beg = interval.beg
+                    end = interval.end
+                    if length == 0:
+                        namespace = _check_namespace(interval.namespace)
+                    elif interval.namespace != namespace:
+                        raise ValueError("mixed-namespace IntervalSet")
+                    elif beg < last:
+                        raise ValueError(
+                            "DiskIntervalSet.from_sorted() intervals must be sorted by beg"
+                        )
+                    last = beg
+                    # Nest as NCListIndex does; members with the same beg
+                    # are best sorted by -end, to be nested in each other.
+                    while parents:
+                        parent = parents[-1]
+                        if parent[0] <= beg and end <= parent[1] and \
+                           (parent[0], parent[1]) != (beg, end):
+                            break
+                        _pop_parent(parents, buffers, pack)
+                    level = len(parents)
+                    if level == len(counts):
+                        counts.append(0)
+                        buffers.append([])
+                        blocks.append([])
+                    if parents:
+                        parent = parents[-1]
+                        if parent[3] < 0:
+                            parent[3] = counts[level]
+                        parent[4] = counts[level] + 1
+                    counts[level] += 1
+                    parents.append([beg, end, length, -1, -1])
+                    length += 1
+                buffered += len(chunk) * record.size
+                if buffered >= _LEVEL_BUFFER:
+                    _spill(buffers, blocks, spill)
+                    buffered = 0
+            while parents:
+                _pop_parent(parents, buffers, pack)
+            _spill(buffers, blocks, spill)
+
+            # Concatenate the levels, offsetting each sublist range by
+            # the slot of the first member of the next level:
+            files = [open(_os.path.join(path, name), 'wb') for name in _COLUMNS]
+            try:
+                base = 0
+                for level, spans in enumerate(blocks):
+                    base += counts[level]
+                    for offset, size in spans:
+                        spill.seek(offset)
+                        begs, ends, sublo, subhi, ranks = \
+                            zip(*record.iter_unpack(spill.read(size)))
+                        subhi = [
+                            hi + base if lo >= 0 else 0
+                            for lo, hi in zip(sublo, subhi)
+                        ]
+                        sublo = [lo + base if lo >= 0 else 0 for lo in sublo]
+                        for column, values, typecode in zip(
+                                files, (begs, ends, sublo, subhi, ranks), typecodes):
+                            _array(typecode, values).tofile(column)
+            finally:
+                for column in files:
+                    column.close()
+    finally:
+        if _os.path.exists(levels):
+            _os.remove(levels)
+
+    with open(_os.path.join(path, 'header'), 'w') as file:
+        _json.dump({
+            'length': length,
+            'toplength': counts[0] if counts else 0,
+            'namespace': namespace,
+            'cls': _class_name(interval_cls),
+            'coords': coords,
+            'byteorder': _sys.byteorder,
+        }, file)
+
+
+
+class _DiskNodes(object):
+    # The members of a DiskNCListIndex, by slot, as _Node objects of
+    # new intervals made on access.
+    def __init__(self, cls, namespace, begs, ends, number):
+        self._cls = cls
+        self._namespace = namespace
+        self._begs = begs
+        self._ends = ends
+        self._number = number
+
+
+    def __len__(self):
+        return len(self._begs)
+
+
+    def __getitem__(self, slot):
+        interval = self._cls.__new__(self._cls)
+        BaseInterval.__init__(
+            interval,
+            self._number(self._begs[slot]),
+            self._number(self._ends[slot]),
+            self._namespace
+        )
+        return _Node(interval)
+
+
+
+class DiskNCListIndex(NCListIndex):
+    """
+    An NCListIndex stored in the files of a directory, as written by
+    `DiskIntervalSet.from_sorted()`: its columns are mapped in memory,
+    read-only, and searched in place by `NCListIndex.find()`. Members
+    are made, as new intervals of the class they were written with, as
+    the search reaches them.
+    """
+
+    def __init__(self, path):
+        with open(_os.path.join(path, 'header'), 'r') as file:
+            header = _json.load(file)
+        if header['cls'] not in _INTERVAL_CLASSES:
+            raise ValueError(
+                "%r has an unknown interval class: %r" % (path, header['cls'])
+            )
+        if header['byteorder'] != _sys.byteorder:
+            raise ValueError(
+                "%r was written in %s-endian byte order" % (path, header['byteorder'])
+            )
+        self._maps = []
+        columns = []
+        for name, typecode in zip(_COLUMNS, _typecodes(header['coords'])):
+            if header['length'] < 1:
+                # empty files cannot be mapped
+                columns.append(_array(typecode))
+                continue
+            with open(_os.path.join(path, name), 'rb') as file:
+                self._maps.append(_mmap(file.fileno(), 0, access=_ACCESS_READ))
+            columns.append(memoryview(self._maps[-1]).cast(typecode))
+        self._begs, self._ends, self._sublo, self._subhi, self._ranks = columns
+        self._nodes = _DiskNodes(
+            _INTERVAL_CLASSES[header['cls']], header['namespace'], self._begs, self._ends,
+            _number if header['coords'] is None else remit
+        )
+        self._toplength = header['toplength']
+        self._length = header['length']
+        self._namespace = header['namespace']
+        self._coords = header['coords']
+        self._typecode = None if self._coords is None else _COORDS[self._coords]
+
+
+    def close(self):
+        """Release the memory maps of the index's files."""
+        for column in (self._begs, self._ends, self._sublo, self._subhi, self._ranks):
+            if isinstance(column, memoryview):
+                column.release()
+        for map in self._maps:
+            map.close()
+        self._maps = []
+
+
+
+class DiskIntervalSet(IntervalSet):
+    """
+    A read-only IntervalSet stored on disk, in the flat layout of
+    NCListIndex, and searched through memory maps of its files: it can
+    index more intervals than fit in memory. Build one from a stream
+    of intervals sorted by beg with `DiskIntervalSet.from_sorted()`,
+    then open it again with `DiskIntervalSet(path)`.
+
+    Members are made, as new interval objects, each time they are
+    iterated or found; they are equal to the intervals written, but are
+    not those objects. Queries, iteration, merges and clusters, and the
+    set operations that return a new (in-memory) IntervalSet are all
+    supported, while updates raise NotImplementedError.
+
+    >>> from tempfile import mkdtemp
+    >>> from shutil import rmtree
+    >>> path = mkdtemp()
+    >>> stream = external_sort(Interval("Chr1", i, i + 50) for i in range(100))
+    >>> ncls = DiskIntervalSet.from_sorted(stream, path)
+    >>> list(ncls.overlaps(Interval("Chr1", 75, 76)))[:2]
+    [Interval(Chr1:26-76), Interval(Chr1:27-77)]
+    >>> ncls.close()
+    >>> rmtree(path)
+    """
+
+    def __init__(self, path):
+        BaseIntervalCollection.__init__(self)
+        self._path = path
+        self._index = DiskNCListIndex(path)
+        self._backend = None
+        self._coords = self._index._coords
+        self._length = len(self._index)
+
+
+    @classmethod
+    def from_sorted(cls, intervals, path, interval_cls=Interval, coords=None):
+        """
+        DiskIntervalSet.from_sorted(intervals, path) -> DiskIntervalSet
+
+        Build a DiskIntervalSet in the directory `path` (created if
+        needed) from an iterable of intervals of one namespace, sorted
+        by beg, and ideally by -end among those with the same beg, as
+        IntervalSet nests them. The intervals are read as a stream:
+        only the stack of their open superintervals, and a bounded
+        buffer of records, are held in memory. Empty intervals are
+        skipped, and unsorted input raises ValueError.
+
+        Members are made back as `interval_cls` objects, which must be
+        one of the interval classes of this package: the header records
+        the class by name, and only these are made back on load. The
+        namespace must be JSON-serializable, as the header is JSON.
+
+        Coordinates are stored as doubles (exact for integers up to
+        2**53), or in the integer coordinate mode `coords` ('int64' or
+        'int32', see IntervalSet), as validated integers, searched with
+        integer comparisons only.
+        """
+        if _INTERVAL_CLASSES.get(_class_name(interval_cls)) is not interval_cls:
+            raise ValueError(
+                "unsupported DiskIntervalSet interval class: %r" % (interval_cls,)
+            )
+        _write_ncls(intervals, path, interval_cls, _get_coords(coords))
+        return cls(path)
+
+
+    def close(self):
+        """Release the memory maps of the DiskIntervalSet's files."""
+        self._index.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def _new_set(self, *args, **kwargs):
+        # Methods return in-memory IntervalSets:
+        return IntervalSet(*args, **kwargs)
+
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "%s(%r)" % (self.__class__.__name__, self._path)
+
+
+    def __eq__(self, other):
+        return isinstance(other, DiskIntervalSet) and \
+            self._length == other._length and \
+            all(
+                node.interval == other_node.interval for node, other_node
+                in zip(self._iter_nodes(), other._iter_nodes())
+            )
+
+
+    __hash__ = IntervalSet.__hash__
+
+
+    @property
+    def namespace(self):
+        return _NULL_NS \
+            if   self.isempty() \
+            else self._index._namespace
+
+
+    @property
+    def beg(self):
+        return _NULL_BEG \
+            if   self.isempty() \
+            else self._index._nodes[0].interval.beg
+
+
+    @property
+    def end(self):
+        return _NULL_END \
+            if   self.isempty() \
+            else self._index._nodes[self._index._toplength - 1].interval.end
+
+
+    # Iteration and search methods
+    def _iter_slots(self, lower=0, upper=-1):
+        # Yield the slots of the members depth-first, in the order of
+        # the stream they were built from, as IntervalSet._iter_nodes()
+        index = self._index
+        sublo = index._sublo
+        subhi = index._subhi
+        if not (0 <= lower < index._toplength):
+            lower = 0
+        if not (0 <= upper < index._toplength):
+            upper = index._toplength
+        stack = [(lower, upper)]  # per-call (sub)list ranges
+        while stack:
+            slot, upper = stack.pop()
+            if slot < upper:
+                stack.append((slot + 1, upper))
+                yield slot
+                if sublo[slot] < subhi[slot]:
+                    stack.append((sublo[slot], subhi[slot]))
+
+
+    def _iter_nodes(self, lower=0, upper=-1):
+        nodes = self._index._nodes
+        return (nodes[slot] for slot in self._iter_slots(lower, upper))
+
+
+    def _iter_sorted_nodes(self):
+        # the stream order is sorted
+        return self._iter_nodes()
+
+
+    def _iter_top_nodes(self):
+        nodes = self._index._nodes
+        return (nodes[slot] for slot in range(self._index._toplength))
+
+
+    def _find_nodes(self, nodes, pairwise=False, get=lambda i,o:o):
+        # Same as IntervalSet._find_index_nodes(), telling the members
+        # found by more than one query by their slots, since nodes are
+        # made on access.
+        if self._length < 1:
+            return
+        index = self._index
+        members = index._nodes
+        nr = not pairwise
+        visited = set()
+        for node in _listify(nodes):
+            for slot in index._find_slots(node):
+                if nr:
+                    if slot in visited:
+                        continue
+                    visited.add(slot)
+                yield get(node, members[slot])
+
+
+    def _stab_nodes(self, node):
+        return self._find_nodes([node])
+
+
+    def _iter_cluster_nodes(self, distance=0, abutting=False):
+        # Same as IntervalSet._iter_cluster_nodes(), telling the toplist
+        # members by their slots, since nodes are made on access.
+        if abutting:
+            within = lambda gap: gap <= distance
+        else:
+            within = lambda gap: gap < distance
+        nodes = self._index._nodes
+        toplength = self._index._toplength
+        cluster = -1
+        end = None
+        for slot in self._iter_slots():
+            node = nodes[slot]
+            if slot < toplength:
+                if end is None or not within(node.interval.beg - end):
+                    cluster += 1
+                    end = node.interval.end
+                elif end < node.interval.end:
+                    end = node.interval.end
+            yield cluster, node
+
+
+    def _iter_intersection_nodes(self, other, pairwise=True):
+        # Search the index for the members overlapping each query:
+        if self._length < 1 or len(other) < 1:
+            return
+        if pairwise:
+            queries = other._iter_nodes()
+        else:
+            queries = _merge_nodes(other._iter_top_nodes())
+        index = self._index
+        for node in queries:
+            for member in index.find(node):
+                copy = Interval()
+                copy.namespace = member.interval.namespace
+                copy.beg = max(member.interval.beg, node.interval.beg)
+                copy.end = min(member.interval.end, node.interval.end)
+                yield _Node(copy, (member.instance, node.instance))
+
+
+    def _isoverlapping(self, other, setter=remit):
+        if not isinstance(other, BaseIntervalCollection):
+            other = self._new_set(_listify(other), setter=setter)
+        return self.namespace == other.namespace and \
+            next(self._find_nodes(other._iter_nodes()), None) is not None
+
+
+    def snapshot(self):
+        """
+        Same as `IntervalSet.snapshot()`: a DiskIntervalSet is read-only,
+        so the snapshot opens the same files.
+        """
+        return self.__class__(self._path)
+
+
+    def memory_usage(self, deep=True):
+        """
+        Same as `IntervalSet.memory_usage()`, counting only the 'index'
+        objects: members are made on access, and the columns mapped from
+        the index's files are paged in and out by the operating system.
+        """
+        usage = dict.fromkeys(
+            ('nodes', 'intervals', 'payload', 'sublists', 'free_slots', 'index'), 0
+        )
+        index = self._index
+        usage['index'] = sum(_getsizeof(obj) for obj in (
+            index, index.__dict__, index._nodes, index._nodes.__dict__,
+            index._begs, index._ends, index._sublo, index._subhi, index._ranks
+        ))
+        usage['total'] = sum(usage.values())
+        return usage
+
+
+    # Update methods
+    def _set_ncls(self, nodes):
+        raise NotImplementedError('%s._set_ncls()' % self.__class__.__name__)
+
+
+    def _copy_state(self, other):
+        raise NotImplementedError('%s._copy_state()' % self.__class__.__name__)
+
+
+    def _transform(self, func, lower=None, upper=None):
+        raise NotImplementedError('%s._transform()' % self.__class__.__name__)
+
+
+    def empty(self):
+        """Not supported: a DiskIntervalSet is read-only."""
+        raise NotImplementedError('%s.empty()' % self.__class__.__name__)
+
+
+    def insort(self, interval, setter=None):
+        """Not supported: a DiskIntervalSet is read-only."""
+        raise NotImplementedError('%s.insort()' % self.__class__.__name__)
+
+
+    def pop(self):
+        """Not supported: a DiskIntervalSet is read-only."""
+        raise NotImplementedError('%s.pop()' % self.__class__.__name__)
+
+
+    def remove(self, interval, setter=None):
+        """Not supported: a DiskIntervalSet is read-only."""
+        raise NotImplementedError('%s.remove()' % self.__class__.__name__)
+
+
+    def discard(self, interval, setter=None):
+        """Not supported: a DiskIntervalSet is read-only."""
+        raise NotImplementedError('%s.discard()' % self.__class__.__name__)
+
+
+    # Aliases
+    add = insort
+
+    clear = empty
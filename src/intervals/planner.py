@@ -0,0 +1,393 @@
+"""
+Module for the cost-based planning of overlap joins
+
+`intersect(a, b)` finds the overlapping pairs of members of two
+collections, or iterables of intervals, with whichever of two
+strategies it estimates to be cheaper:
+
+ - 'search': a binary search of one operand per member of the other,
+   as `IntervalList.find_overlap_pairs()` and `IntervalSet.overlap_pairs()`
+   do, costing O(m log n) for m queries of n members;
+ - 'sweep': a single sweep over both operands in order of beg, as
+   `IntervalSet.iter_union()` does, costing O(m + n), once both are
+   sorted. It takes the place of the `IntervalSet._scan()` sweep, which
+   that linear union sweep replaced.
+
+`explain(a, b)` describes the estimates and the choice, without
+running the join.
+
+Performance Notes:
+ 1. The estimates read the sizes of the operands, whether they are
+    sorted and indexed, the fraction of nested members of an IntervalSet
+    (from its toplist length), and a sample of `_SAMPLE` evenly spaced
+    members, from which the number of overlapping pairs is estimated as
+    if members were spread evenly over the operands' extent. Plain
+    iterables are materialized, and checked for sortedness in one pass.
+ 2. A search costs more per pair than a sweep, which only tests the
+    members of its windows, so the pairs weigh in the estimates too:
+    a search of few queries wins, and of many, or dense, queries loses.
+ 3. The constants, in microseconds, were fitted to the timings of
+    bench/bench_planner.py, which also checks the choices.
+
+"""
+
+from heapq import heappush as _heappush
+from heapq import heappop as _heappop
+from heapq import merge as _heapmerge
+from itertools import islice as _islice
+from math import log2 as _log2
+from .intervals import BaseInterval
+from .collections import IntervalList, BlockedIntervalList, IntervalSet
+from .collections import IntervalBinIndex
+from .collections import _Node, _node_beg
+from .disk import DiskIntervalSet
+
+# microseconds per query, and per step of the binary search of a query,
+# of an IntervalList and of an IntervalSet:
+_LIST_QUERY = 2.0
+_LIST_STEP = 0.5
+_SET_QUERY = 15.0
+_SET_STEP = 3.0
+
+# microseconds per query of the bins of an IntervalBinIndex:
+_BINS_QUERY = 100.0
+
+# microseconds per member to build an IntervalList, and its search index:
+_BUILD_NODE = 3.5
+_INDEX_NODE = 1.2
+
+# microseconds per node swept:
+_SWEEP_NODE = 1.4
+
+# microseconds per overlapping pair found by a search, and by a sweep:
+_SEARCH_PAIR = 3.5
+_SWEEP_PAIR = 0.7
+
+# microseconds per step of a sort, and to wrap an interval in a node:
+_SORT_STEP = 0.02
+_WRAP_NODE = 0.2
+
+# members sampled, evenly spaced, to estimate their extent and length:
+_SAMPLE = 64
+
+_STRATEGIES = ('auto', 'search', 'sweep')
+
+
+def _sample_indexes(length):
+    # Return up to _SAMPLE + 1 evenly spaced indexes, first and last included
+    if length < 1:
+        return []
+    indexes = list(range(0, length, max(1, length // _SAMPLE)))
+    if indexes[-1] != length - 1:
+        indexes.append(length - 1)
+    return indexes
+
+
+class _Operand(object):
+    # An operand of intersect(): its nodes, and the statistics of the
+    # cost estimates.
+    def __init__(self, name, collection):
+        self.name = name
+        self.collection = collection
+        self.nesting = 0.0
+        self.indexed = True
+        if isinstance(collection, IntervalList):
+            self.kind = 'list'
+            self.sorted = True
+            self.indexed = isinstance(collection, BlockedIntervalList) or \
+                collection._maxends is not None
+            sample = [
+                collection._get_node(i).interval
+                for i in _sample_indexes(len(collection))
+            ]
+        elif isinstance(collection, IntervalSet):
+            self.kind = 'set'
+            self.sorted = True
+            if isinstance(collection, DiskIntervalSet):
+                toplist = collection._index._nodes
+                toplength = collection._index._toplength
+            else:
+                toplist = collection._toplist
+                toplength = toplist.length
+            if len(collection) > 0:
+                self.nesting = 1.0 - toplength / len(collection)
+            # the top-level members span the extent of the set:
+            sample = [toplist[i].interval for i in _sample_indexes(toplength)]
+        elif isinstance(collection, IntervalBinIndex):
+            self.kind = 'bins'
+            self.sorted = False
+            sample = list(_islice((
+                node.interval
+                for bins in collection._bins.values()
+                for nodes in bins.values()
+                for node in nodes.values()
+            ), _SAMPLE))
+        else:
+            self.kind = None
+            nodes = []
+            for interval in collection:
+                if not isinstance(interval, BaseInterval):
+                    raise TypeError(
+                        "intersect() operands must hold intervals, not %r" %
+                        (interval.__class__.__name__,)
+                    )
+                nodes.append(_Node(interval, interval))
+            self.collection = nodes
+            self.sorted = all(
+                nodes[i].interval.beg <= nodes[i+1].interval.beg
+                for i in range(len(nodes) - 1)
+            )
+            sample = [nodes[i].interval for i in _sample_indexes(len(nodes))]
+        self.length = len(self.collection)
+        self.sample = [i for i in sample if not i.isnull()]
+        if self.sample:
+            self.lo = min(i.beg for i in self.sample)
+            self.hi = max(i.end for i in self.sample)
+            self.span = sum(i.end - i.beg for i in self.sample) / len(self.sample)
+
+
+    def __str__(self):
+        return "%s: %s of %d members, %s%s" % (
+            self.name,
+            self.collection.__class__.__name__ if self.kind else 'iterable',
+            self.length,
+            'sorted' if self.sorted else 'unsorted',
+            ', %.0f%% nested' % (100 * self.nesting) if self.kind == 'set' else ''
+        )
+
+
+    def _sort_cost(self):
+        return _SORT_STEP * self.length * _log2(self.length + 1)
+
+
+    def _wrap_cost(self):
+        return 0.0 if self.kind else _WRAP_NODE * self.length
+
+
+    def search_cost(self, queries, pairs):
+        # Estimate the cost of searching self once per member of queries
+        cost = queries._wrap_cost() + _SEARCH_PAIR * pairs
+        if self.kind == 'bins':
+            return cost + _BINS_QUERY * queries.length
+        if self.kind is None:
+            # an IntervalList of self is built first:
+            cost += (_BUILD_NODE + _INDEX_NODE) * self.length + self._sort_cost()
+        elif not self.indexed:
+            cost += _INDEX_NODE * self.length
+        query, step = (_SET_QUERY, _SET_STEP) \
+            if   self.kind == 'set' \
+            else (_LIST_QUERY, _LIST_STEP)
+        steps = _log2(self.length + 1) * (1.0 + self.nesting)
+        return cost + queries.length * (query + step * steps)
+
+
+    def sweep_cost(self):
+        # Estimate the cost of sweeping the members of self, in order
+        cost = self._wrap_cost()
+        if not self.sorted:
+            cost += self._sort_cost()
+        return cost + _SWEEP_NODE * self.length * (1.0 + self.nesting)
+
+
+    def iter_nodes(self):
+        # Yield the nodes of self, in any order
+        if self.kind is None:
+            return iter(self.collection)
+        return self.collection._iter_nodes()
+
+
+    def iter_sorted_nodes(self):
+        # Yield the nodes of self, sorted by beg
+        if not self.sorted:
+            return iter(sorted(self.iter_nodes(), key=_node_beg))
+        if self.kind == 'list':
+            # the empty members sort last, by beg:
+            collection = self.collection
+            tail = collection._find_index_empty()
+            if tail < len(collection):
+                return _heapmerge(
+                    _islice(collection._iter_nodes(), tail),
+                    _islice(collection._iter_nodes(), tail, None),
+                    key=_node_beg
+                )
+            return collection._iter_nodes()
+        if self.kind == 'set':
+            return self.collection._iter_sorted_nodes()
+        return iter(self.collection)
+
+
+    def iter_matches(self, queries):
+        # Yield a 2-tuple of each query node, and the nodes of self
+        # overlapping it
+        collection = self.collection
+        if self.kind is None:
+            collection = IntervalList([n.instance for n in collection])
+        if self.kind in ('set', 'bins'):
+            return collection._find_nodes(
+                list(queries.iter_nodes()), True, lambda i,o:(i,o)
+            )
+        return (
+            (node, collection._get_node(index))
+            for node in queries.iter_nodes()
+            for index in collection._iter_overlap_indexes(node)
+        )
+
+
+
+def _estimate_pairs(a, b):
+    # Estimate the number of overlapping pairs of members of a and b,
+    # as if they were spread evenly over their joint extent
+    if not a.sample or not b.sample:
+        return 0.0
+    width = max(a.hi, b.hi) - min(a.lo, b.lo)
+    reach = a.span + b.span
+    if not width > reach:
+        return float(a.length * b.length)
+    return a.length * b.length * reach / width
+
+
+
+class _Plan(object):
+    # The costs of the strategies of intersect(a, b), and the choice
+    def __init__(self, a, b, strategy='auto'):
+        if strategy not in _STRATEGIES:
+            raise ValueError("unknown intersect() strategy: %r" % (strategy,))
+        self.a = _Operand('a', a)
+        self.b = _Operand('b', b)
+        self.pairs = _estimate_pairs(self.a, self.b)
+        self.costs = {
+            'search a': self.a.search_cost(self.b, self.pairs),
+            'search b': self.b.search_cost(self.a, self.pairs),
+            'sweep': self.a.sweep_cost() + self.b.sweep_cost() + \
+                _SWEEP_PAIR * self.pairs,
+        }
+        candidates = [
+            key for key in ('search a', 'search b', 'sweep')
+            if strategy == 'auto' or key.startswith(strategy)
+        ]
+        self.choice = min(candidates, key=self.costs.__getitem__)
+
+
+    def __str__(self):
+        notes = {
+            'search a': self._notes('search', self.a),
+            'search b': self._notes('search', self.b),
+            'sweep': self._notes('sweep', self.a, self.b),
+        }
+        lines = [
+            "intersect(a, b): %s" % self.choice, str(self.a), str(self.b),
+            "pairs: ~%d" % self.pairs
+        ]
+        for key in ('search a', 'search b', 'sweep'):
+            lines.append("%s%-8s  cost %12.1f%s" % (
+                '* ' if key == self.choice else '  ',
+                key, self.costs[key], notes[key]
+            ))
+        return '\n'.join(lines)
+
+
+    @staticmethod
+    def _notes(strategy, *operands):
+        if strategy == 'search':
+            operand = operands[0]
+            if operand.kind is None:
+                return " (builds an IntervalList of %s)" % operand.name
+            return ''
+        unsorted = [o.name for o in operands if not o.sorted]
+        return " (sorts %s)" % ' and '.join(unsorted) if unsorted else ''
+
+
+    def execute(self):
+        a, b = self.a, self.b
+        if self.choice == 'search a':
+            for query, member in a.iter_matches(b):
+                yield (member.instance, query.instance)
+        elif self.choice == 'search b':
+            for query, member in b.iter_matches(a):
+                yield (query.instance, member.instance)
+        else:
+            for node1, node2 in _sweep(a.iter_sorted_nodes(), b.iter_sorted_nodes()):
+                yield (node1.instance, node2.instance)
+
+
+
+def _sweep(nodes1, nodes2):
+    # Yield the overlapping pairs of nodes of two streams sorted by beg,
+    # in one sweep, keeping the nodes that may still overlap an upcoming
+    # one in a min-heap (keyed by end) per stream, as
+    # IntervalSet._iter_union_nodes() does.
+    node1 = next(nodes1, None)
+    node2 = next(nodes2, None)
+    window1 = []  # heap of (end, count, node)
+    window2 = []
+    count = 0
+    while node1 is not None or node2 is not None:
+        if node2 is None or \
+           (node1 is not None and node1.interval.beg <= node2.interval.beg):
+            node, own, opp, rev = node1, window1, window2, False
+            node1 = next(nodes1, None)
+        else:
+            node, own, opp, rev = node2, window2, window1, True
+            node2 = next(nodes2, None)
+
+        # Retire the nodes ending before the sweep position; they can
+        # never overlap this, or any later, node:
+        beg = node.interval.beg
+        for window in (own, opp):
+            while window and window[0][0] < beg:
+                _heappop(window)
+
+        for item in opp:
+            lower, upper = (item[2], node) if rev else (node, item[2])
+            if lower.interval.isoverlapping(upper.interval):
+                yield (lower, upper)
+        _heappush(own, (node.interval.end, count, node))
+        count += 1
+
+
+
+def intersect(a, b, strategy='auto'):
+    """
+    intersect(a, b, strategy='auto') -> generator
+
+    Produce a 2-tuple of each member of `a` and each member of `b`
+    overlapping it, in no particular order. The operands may be
+    IntervalLists, IntervalSets (including DiskIntervalSets),
+    IntervalBinIndexes, or iterables of intervals, which are
+    materialized.
+
+    With `strategy='auto'`, the strategy whose estimated cost is lowest
+    (see `explain()`) is used: a binary search of either operand per
+    member of the other ('search'), or a single sweep over both operands,
+    in order of beg ('sweep'). Either may be forced, and `'search'`
+    then searches the operand it estimates cheaper to search. With
+    intervals of one class, all strategies produce the same pairs.
+
+    >>> a = IntervalList([Interval("Chr", 0, 10), Interval("Chr", 20, 30)])
+    >>> b = [Interval("Chr", 5, 25)]
+    >>> sorted(intersect(a, b))
+    [(Interval(Chr:0-10), Interval(Chr:5-25)), (Interval(Chr:20-30), Interval(Chr:5-25))]
+    """
+    return _Plan(a, b, strategy).execute()
+
+
+def explain(a, b, strategy='auto'):
+    """
+    explain(a, b, strategy='auto') -> str
+
+    Describe how `intersect(a, b, strategy)` would be run: the operands'
+    sizes, sortedness and (for IntervalSets) fraction of nested members,
+    the estimated cost of each strategy, in microseconds, and the
+    choice, marked with '*'.
+
+    >>> a = IntervalList([Interval("Chr", i, i + 10) for i in range(0, 10000, 5)])
+    >>> print(explain(a, [Interval("Chr", 5, 25)]))
+    intersect(a, b): search a
+    a: IntervalList of 2000 members, sorted
+    b: iterable of 1 members, sorted
+    pairs: ~5
+    * search a  cost       2428.7
+      search b  cost       5025.7 (builds an IntervalList of b)
+      sweep     cost       2805.8
+    """
+    return str(_Plan(a, b, strategy))
@@ -0,0 +1,239 @@
+"""
+Module for the external-memory sorting of interval streams
+
+`external_sort()` sorts a stream of intervals larger than memory: it
+reads the stream in chunks of at most a `memory` budget, sorts each
+chunk (in parallel worker processes, with `workers=N`) and spills it to
+a temporary file as a sorted run, then k-way merges the runs back into
+a single sorted stream of intervals.
+
+Performance Notes:
+ 1. Runs are encoded compactly, as fixed-size binary records of a
+    namespace code (indexing a table of namespaces, kept in memory)
+    and double beg and end coordinates, the columns of IntervalArray.
+    As nothing else is kept, only intervals of the package's classes
+    are accepted, with coordinates that doubles hold exactly (integers
+    up to 2**53 in magnitude).
+ 2. The merge reads each run through a buffer of `_RUN_BUFFER` records,
+    and merges at most `_MERGE_FANIN` runs at once, merging groups of
+    runs into longer runs first when there are more.
+ 3. An input that fits the memory budget is sorted in memory, without
+    spilling any run.
+
+"""
+
+import os as _os
+
+from heapq import merge as _heapmerge
+from struct import Struct as _Struct
+from tempfile import mkdtemp as _mkdtemp
+from shutil import rmtree as _rmtree
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from array import array as _array
+from .intervals import BaseInterval, LeftClosedInterval, ClosedInterval
+from .intervals import Interval, ClosedPoint, Point
+from .arrays import _semantics, _isempty, _number
+
+# (namespace code, beg, end):
+_RECORD = _Struct('<qdd')
+
+# estimated memory, in bytes, of an interval of a chunk being sorted:
+_INTERVAL_BYTES = 200
+
+# records read at once from each run being merged:
+_RUN_BUFFER = 4096
+
+# maximum number of runs merged at once:
+_MERGE_FANIN = 64
+
+# interval classes whose instances hold only a namespace and coordinates:
+_INTERVAL_CLASSES = (
+    BaseInterval, LeftClosedInterval, ClosedInterval, Interval, ClosedPoint, Point
+)
+
+
+def _check_interval(interval, cls):
+    # Raise TypeError or ValueError if a run would not keep all its data
+    if type(interval) is not cls:
+        raise TypeError(
+            "external_sort() intervals must be %s objects, not %r"
+            % (cls.__name__, type(interval).__name__)
+        )
+    for x in (interval.beg, interval.end):
+        try:
+            exact = x != x or float(x) == x  # nan, or exactly a double
+        except OverflowError:
+            exact = False
+        if not exact:
+            raise ValueError(
+                "external_sort() coordinates must be exact as doubles, not %r" % (x,)
+            )
+
+
+def _sort_key(namespace, beg, end, strict):
+    # (namespace, isempty(), beg, end), with null namespaces last
+    return (namespace is None, namespace, _isempty(beg, end, strict), beg, end)
+
+
+def _sorted_records(namespaces, codes, begs, ends, strict):
+    # Return the sort keys of a chunk, followed by their namespace codes
+    records = [
+        _sort_key(namespaces[code], beg, end, strict) + (code,)
+        for code, beg, end in zip(codes, begs, ends)
+    ]
+    records.sort()
+    return records
+
+
+def _write_run(path, namespaces, codes, begs, ends, strict):
+    # Sort a chunk and write it to a run file; also run by the worker
+    # processes.
+    pack = _RECORD.pack
+    with open(path, 'wb') as run:
+        run.write(b''.join(
+            pack(record[-1], record[-3], record[-2])
+            for record in _sorted_records(namespaces, codes, begs, ends, strict)
+        ))
+    return path
+
+
+def _iter_run(path, namespaces, strict):
+    # Yield the records of a run file, with their sort keys.
+    size = _RECORD.size * _RUN_BUFFER
+    with open(path, 'rb') as run:
+        while True:
+            data = run.read(size)
+            if not data:
+                break
+            for code, beg, end in _RECORD.iter_unpack(data):
+                yield _sort_key(namespaces[code], beg, end, strict) + (code,)
+
+
+def _merge_runs(paths, path, namespaces, strict):
+    # Merge run files into a new run file.
+    pack = _RECORD.pack
+    with open(path, 'wb') as run:
+        for record in _heapmerge(*[
+            _iter_run(p, namespaces, strict) for p in paths
+        ]):
+            run.write(pack(record[-1], record[-3], record[-2]))
+    for p in paths:
+        _os.remove(p)
+    return path
+
+
+def _make(cls, namespace, beg, end):
+    # Same as IntervalArray._make()
+    interval = cls.__new__(cls)
+    BaseInterval.__init__(interval, _number(beg), _number(end), namespace)
+    return interval
+
+
+def external_sort(intervals, cls=None, memory=256 * 2**20, workers=1, tmpdir=None):
+    """
+    external_sort(intervals) -> generator
+
+    Sort an iterable of intervals that may not fit in memory, and yield
+    them as new intervals of their class, sorted by namespace (null
+    namespaces last), then as collections sort their members: empty
+    intervals (as their class defines them) last, by beg, then by end.
+    The intervals of one namespace can thus be passed to
+    `IntervalList.merge_sorted()`, without being sorted again.
+
+    The `memory` keyword argument is the budget, in bytes, of the chunks
+    of intervals sorted in memory; larger inputs are sorted in chunks,
+    spilled to temporary files in `tmpdir` (by default, that of the
+    `tempfile` module), and merged. With `workers` > 1, chunks are
+    sorted and written by as many worker processes, as the next chunk
+    is read, each within its share of the budget. The temporary files
+    are removed when the generator is exhausted or closed.
+
+    Only the namespaces and coordinates of the intervals are kept, as
+    doubles, as in IntervalArray, so that the intervals must be of one
+    of the package's interval classes, `cls` (by default, that of the
+    first interval), else TypeError is raised, and their coordinates
+    exactly representable as doubles (e.g., integers up to 2**53 in
+    magnitude), else ValueError. Namespaces must be hashable and
+    comparable.
+
+    >>> stream = (Interval("Chr", i % 7, i % 7 + 3) for i in range(20))
+    >>> list(external_sort(stream))[:3]
+    [Interval(Chr:0-3), Interval(Chr:0-3), Interval(Chr:0-3)]
+    """
+    if cls is not None and cls not in _INTERVAL_CLASSES:
+        raise TypeError("external_sort() cannot keep %r objects" % (cls,))
+    strict = None if cls is None else _semantics(cls)[1]
+    workers = max(1, workers)
+    chunksize = max(1, memory // _INTERVAL_BYTES // workers)
+    namespaces = []  # code -> namespace
+    table = {}  # namespace -> code
+    paths = []
+    count = 0  # of run files
+    pending = []
+    directory = None
+    pool = None
+    iterator = iter(intervals)
+    try:
+        while True:
+            codes = _array('q')
+            begs = _array('d')
+            ends = _array('d')
+            for interval in iterator:
+                if cls is None:
+                    if type(interval) not in _INTERVAL_CLASSES:
+                        raise TypeError(
+                            "external_sort() cannot keep %r objects"
+                            % (type(interval).__name__,)
+                        )
+                    cls = type(interval)
+                    strict = _semantics(cls)[1]
+                _check_interval(interval, cls)
+                namespace = interval.namespace
+                code = table.get(namespace)
+                if code is None:
+                    code = table[namespace] = len(namespaces)
+                    namespaces.append(namespace)
+                codes.append(code)
+                begs.append(interval.beg)
+                ends.append(interval.end)
+                if len(codes) >= chunksize:
+                    break
+            if len(codes) < chunksize and directory is None:
+                # the input fits in memory:
+                for record in _sorted_records(namespaces, codes, begs, ends, strict):
+                    yield _make(cls, namespaces[record[-1]], record[-3], record[-2])
+                return
+            if len(codes) > 0:
+                if directory is None:
+                    directory = _mkdtemp(prefix='intervals-', dir=tmpdir)
+                path = _os.path.join(directory, 'run%d' % count)
+                paths.append(path)
+                count += 1
+                args = (path, list(namespaces), codes, begs, ends, strict)
+                if workers == 1:
+                    _write_run(*args)
+                else:
+                    if pool is None:
+                        pool = _ProcessPoolExecutor(max_workers=workers)
+                    pending.append(pool.submit(_write_run, *args))
+                    while len(pending) >= workers:
+                        pending.pop(0).result()
+            if len(codes) < chunksize:
+                break
+        for future in pending:
+            future.result()
+        while len(paths) > _MERGE_FANIN:
+            path = _os.path.join(directory, 'run%d' % count)
+            paths = paths[_MERGE_FANIN:] + [
+                _merge_runs(paths[:_MERGE_FANIN], path, namespaces, strict)
+            ]
+            count += 1
+        for record in _heapmerge(*[
+            _iter_run(path, namespaces, strict) for path in paths
+        ]):
+            yield _make(cls, namespaces[record[-1]], record[-3], record[-2])
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if directory is not None:
+            _rmtree(directory, ignore_errors=True)
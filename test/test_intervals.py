@@ -5,10 +5,32 @@ from intervals import (
     ClosedInterval,
     LeftClosedInterval,
     Interval,
+    Point,
     IntervalList,
+    BlockedIntervalList,
+    IntervalSet,
+    ConcurrentIntervalSet,
+    IntervalBinIndex,
+    IntervalMask,
+    NCListIndex,
+    IntervalArray,
+    external_sort,
+    DiskIntervalSet,
+    QueryCache,
+    intersect,
+    explain,
 )
+import intervals.disk
 from intervals.collections import _Node
 from math import isnan, nan, isinf, inf
+from array import array as _array
+from tempfile import mkdtemp
+from shutil import rmtree
+import os
+import json
+import pickle
+from copy import deepcopy
+from operator import itemgetter
 
 
 class TestCase001_BaseInterval(TestCase):
@@ -2347,6 +2369,24 @@ class TestCase008_IntervalList(TestCase):
         index = self.intervalList.find_index_end(Interval("Chr", 35, 36))
         self.assertEqual(index, 3)        
         
+    def test_find_index_duplicates_0(self):
+        # both backends return the first of equal members
+        for backend in ('deque', 'blocked'):
+            intervalList = IntervalList(
+                [Interval("Chr", 0, 10) for i in range(1200)] + [Interval("Chr", 5, 6)],
+                backend=backend
+            )
+            self.assertEqual(intervalList.index(Interval("Chr", 0, 10)), 0)
+            self.assertEqual(intervalList.find_index(Interval("Chr", 0, 10), lower=600), 600)
+            self.assertEqual(intervalList.find_index(Interval("Chr", 5, 6)), 1200)
+            self.assertEqual(intervalList.find_index(Interval("Chr", 0, 11)), -1)
+            intervalList = IntervalList(
+                [Interval("A", 0, 10), Interval("B", 0, 10), Interval("A", 0, 10)],
+                backend=backend
+            )
+            self.assertEqual(intervalList.find_index(Interval("B", 0, 10)), 1)
+            self.assertEqual(intervalList.find_index(Interval("A", 0, 10)), 0)
+
     def test_find_index_nearest_0(self):
         self.assertTrue(hasattr(self.intervalList, 'find_index_nearest'))
 
@@ -2710,6 +2750,315 @@ class TestCase008_IntervalList(TestCase):
     
 
                 
+
+    def test_coords_0(self):
+        intervals = [
+            Interval("Chr", 9, 30), Interval("Chr", 22, 23), Interval("Chr", 40, 60),
+            Interval("Chr", 45, 50), Interval("Chr", 70, 71), Interval("Chr", 80, 120)
+        ]
+        generic = IntervalList(intervals)
+        intervalList = IntervalList(intervals, coords='int64')
+        for query in (
+            Interval("Chr", 23, 45), ClosedInterval("Chr", 30, 40), Interval("Chr", 22.5, 22.7),
+            Interval("Chr", 60, 70), Interval("Chr", 50, 50)
+        ):
+            self.assertEqual(list(intervalList.find_overlaps(query)), list(generic.find_overlaps(query)))
+            self.assertEqual(intervalList.find_overlap_length(query), generic.find_overlap_length(query))
+            self.assertEqual(intervalList.find_index_beg(query), generic.find_index_beg(query))
+        intervalList.insort(Interval("Chr", 30, 41))
+        self.assertEqual(
+            list(intervalList.find_overlaps(Interval("Chr", 35, 36))), [Interval("Chr", 30, 41)]
+        )
+        intervalList.popleft()
+        self.assertEqual(list(intervalList.find_overlaps(Interval("Chr", 9, 10))), [])
+        self.assertEqual(intervalList.copy()._coords, 'int64')
+
+    def test_coords_1(self):
+        self.assertRaises(ValueError, IntervalList, [ClosedInterval("Chr", 1, 5)], coords='int64')
+        self.assertRaises(
+            ValueError, IntervalList, [Interval("Chr", 1, 5), Interval("Chr2", 1, 5)], coords='int64'
+        )
+        self.assertRaises(ValueError, IntervalList, [Interval("Chr", 1, 2 ** 40)], coords='int32')
+        intervalList = IntervalList([Interval("Chr", 1, 5)], coords='int64')
+        self.assertRaises(ValueError, intervalList.append, Interval("Chr", -3, 5))
+
+    def test_memory_usage_0(self):
+        intervals = [Interval("Chr", 0, 50), Interval("Chr", 40, 250), Interval("Chr", 60, 70)]
+        intervalList = IntervalList(intervals)
+        usage = intervalList.memory_usage()
+        self.assertEqual(usage['total'], sum(v for k, v in usage.items() if k != 'total'))
+        self.assertGreater(usage['nodes'], 0)
+        self.assertGreater(usage['intervals'], 0)
+        self.assertEqual(usage['payload'], 0)
+        self.assertEqual(usage['index'], 0)
+        shallow = intervalList.memory_usage(deep=False)
+        self.assertEqual(shallow['intervals'], 0)
+        self.assertEqual(shallow['total'], usage['total'] - usage['intervals'])
+        intervalList = IntervalList(intervals, coords='int64')
+        self.assertGreater(intervalList.memory_usage()['index'], 0)
+        records = [(i, "record") for i in intervals]
+        intervalList = IntervalList(records, setter=lambda r: r[0])
+        self.assertGreater(intervalList.memory_usage()['payload'], 0)
+
+    def test_nested_0(self):
+        intervals = [
+            Interval("Chr", 0, 100), Interval("Chr", 10, 20), Interval("Chr", 30, 40),
+            Interval("Chr", 50, 60), Interval("Chr", 55, 56), Interval("Chr", 70, 80)
+        ]
+        for coords in (None, 'int64'):
+            intervalList = IntervalList(intervals, coords=coords)
+            query = Interval("Chr", 52, 58)
+            self.assertEqual(
+                list(intervalList.find_overlaps(query)),
+                [Interval("Chr", 0, 100), Interval("Chr", 50, 60), Interval("Chr", 55, 56)]
+            )
+            self.assertEqual(list(intervalList.find_overlap_index_range(query)), [0, 3, 4])
+            self.assertEqual(intervalList.find_overlap_index_beg(Interval("Chr", 65, 75)), 0)
+            self.assertEqual(intervalList.find_overlap_index_end(Interval("Chr", 25, 35)), 3)
+            self.assertEqual(
+                intervalList.find_overlap_index_bounds([Interval("Chr", 12, 13), query]), (0, 5)
+            )
+            self.assertEqual(
+                [p[1] for p in intervalList.find_overlap_pairs(Interval("Chr", 35, 36))],
+                [Interval("Chr", 0, 100), Interval("Chr", 30, 40)]
+            )
+            self.assertEqual(
+                list(intervalList.find_overlap_index_range([Interval("Chr", 15, 16), query])),
+                [0, 1, 3, 4]
+            )
+
+    def test_nested_1(self):
+        intervalList = IntervalList([Interval("Chr", 10, 20), Interval("Chr", 30, 40)])
+        self.assertEqual(list(intervalList.find_overlaps(Interval("Chr", 50, 60))), [])
+        member = Interval("Chr", 0, 100)
+        intervalList.insort(member)
+        self.assertEqual(
+            list(intervalList.find_overlaps(Interval("Chr", 50, 60))), [member]
+        )
+        intervalList.insort(Interval("Chr", 55, 57))
+        intervalList.remove(member)
+        self.assertEqual(
+            list(intervalList.find_overlaps(Interval("Chr", 50, 60))), [Interval("Chr", 55, 57)]
+        )
+        self.assertEqual(intervalList._maxends, [20, 40, 57])
+        intervalList.insort(Interval("Chr", 45, 45))
+        self.assertEqual(
+            list(intervalList.find_overlaps(Interval("Chr", 40, 50))), [Interval("Chr", 45, 45)]
+        )
+        self.assertEqual(IntervalList().find_overlap_index_end(Interval("Chr", 1, 2)), -1)
+
+    def test_update_merge_0(self):
+        records = [(Interval("Chr", i % 50, i % 50 + i % 7), i) for i in range(200)]
+        for update, insort in (('update', 'insort'), ('updateleft', 'insortleft')):
+            for batch in (records[:10], records):
+                merged = IntervalList(records[::3], setter=lambda r: r[0])
+                inserted = IntervalList(records[::3], setter=lambda r: r[0])
+                getattr(merged, update)(batch)
+                for record in sorted(batch, key=lambda r: (r[0].beg, r[0].end)):
+                    getattr(inserted, insort)(record)
+                self.assertEqual(list(merged), list(inserted))
+                self.assertEqual(
+                    list(merged.find_overlaps(Interval("Chr", 20, 22))),
+                    [r for r in merged if r[0].isoverlapping(Interval("Chr", 20, 22))]
+                )
+        intervalList = IntervalList([Interval("Chr", 0, 10)], coords='int64')
+        self.assertRaises(
+            ValueError, intervalList.update, 
+            [Interval("Chr", i, i + 1) for i in range(100)] + [Interval("Chr", -5, 1)]
+        )
+        self.assertEqual(list(intervalList), [Interval("Chr", 0, 10)])
+
+    def test_blocked_0(self):
+        intervals = [
+            Interval("Chr", (i * 37) % 200, (i * 37) % 200 + i % 23)
+            for i in range(300)
+        ]
+        intervalList = IntervalList(intervals[::2])
+        blocked = IntervalList(backend='blocked')
+        blocked._load = 4  # split and join small blocks
+        blocked.update(intervals[::2])
+        self.assertIsInstance(blocked, BlockedIntervalList)
+        for i, interval in enumerate(intervals[1::2]):
+            getattr(intervalList, ('insort', 'insortleft')[i % 2])(interval)
+            getattr(blocked, ('insort', 'insortleft')[i % 2])(interval)
+        self.assertGreater(len(blocked._lists), 30)
+        for interval in intervals[::5]:
+            intervalList.remove(interval)
+            blocked.remove(interval)
+        for index in (0, -1, 17, 100):
+            del intervalList[index]
+            del blocked[index]
+        self.assertEqual(blocked.pop(), intervalList.pop())
+        self.assertEqual(blocked.popleft(), intervalList.popleft())
+        self.assertEqual(list(blocked), list(intervalList))
+        self.assertEqual(blocked, intervalList)
+        self.assertEqual(list(reversed(blocked)), list(intervalList)[::-1])
+        self.assertEqual(blocked[100], intervalList[100])
+        for query in (Interval("Chr", 50, 52), Interval("Chr", 150, 190), 
+                      Interval("Chr", 300, 400), Interval("Chr", 0, 0)):
+            self.assertEqual(
+                list(blocked.find_overlap_index_range(query)),
+                list(intervalList.find_overlap_index_range(query))
+            )
+            self.assertEqual(
+                list(blocked.find_overlaps(query)),
+                list(intervalList.find_overlaps(query))
+            )
+            for method in ('find_index_beg', 'find_index_end', 'find_index'):
+                self.assertEqual(
+                    getattr(blocked, method)(query), 
+                    getattr(intervalList, method)(query)
+                )
+        self.assertEqual(blocked.find_index(intervals[1]), intervalList.find_index(intervals[1]))
+
+    def test_blocked_1(self):
+        blocked = IntervalList(
+            [Interval("Chr", 10, 20), Interval("Chr", 30, 40)], backend='blocked'
+        )
+        self.assertRaises(ValueError, blocked.append, Interval("Chr", 0, 5))
+        self.assertRaises(ValueError, blocked.appendleft, Interval("Chr", 50, 55))
+        self.assertRaises(ValueError, blocked.insert, 1, Interval("Chr", 35, 45))
+        self.assertRaises(ValueError, blocked.extend, [Interval("Chr", 50, 55), Interval("Chr", 45, 55)])
+        self.assertRaises(ValueError, blocked.__setitem__, 0, Interval("Chr", 35, 45))
+        self.assertRaises(ValueError, blocked.reverse)
+        self.assertRaises(ValueError, blocked.rotate, 1)
+        self.assertEqual(list(blocked), [Interval("Chr", 10, 20), Interval("Chr", 30, 40)])
+        blocked.append(Interval("Chr", 50, 55))
+        blocked.extendleft([Interval("Chr", 5, 10), Interval("Chr", 0, 5)])
+        blocked[1] = Interval("Chr", 5, 15)
+        self.assertEqual(list(blocked), [
+            Interval("Chr", 0, 5), Interval("Chr", 5, 15), Interval("Chr", 10, 20),
+            Interval("Chr", 30, 40), Interval("Chr", 50, 55)
+        ])
+        self.assertIsInstance(blocked.copy(), BlockedIntervalList)
+        self.assertEqual(blocked.copy(), blocked)
+        self.assertEqual(blocked.find_overlap_index_bounds(Interval("Chr", 12, 31)), (1, 4))
+        blocked.shift(100)
+        self.assertEqual(blocked.beg, 100)
+        self.assertEqual(blocked.find_overlap_index_bounds(Interval("Chr", 112, 131)), (1, 4))
+        usage = blocked.memory_usage()
+        self.assertEqual(usage['total'], sum(v for k, v in usage.items() if k != 'total'))
+        self.assertRaises(ValueError, IntervalList, [], backend='tree')
+        blocked = IntervalList([Interval("Chr", 0, 10)], coords='int64', backend='blocked')
+        self.assertRaises(ValueError, blocked.insort, Interval("Chr", -5, 1))
+        self.assertRaises(ValueError, blocked.insort, Interval("Chr2", 5, 10))
+        blocked.insort(Interval("Chr", 5, 10))
+        self.assertEqual(blocked.find_overlap_index_bounds(Interval("Chr", 9, 12)), (0, 2))
+
+    def test_blocked_2(self):
+        # copies and pickles are rebuilt from the members
+        for backend in ('deque', 'blocked'):
+            intervalList = IntervalList(
+                [Interval("Chr", (i * 7) % 50, (i * 7) % 50 + 5) for i in range(40)],
+                coords='int64', backend=backend
+            )
+            for copy in (deepcopy(intervalList), pickle.loads(pickle.dumps(intervalList))):
+                self.assertIs(type(copy), type(intervalList))
+                self.assertEqual(list(copy), list(intervalList))
+                self.assertIsNot(copy[0], intervalList[0])
+                self.assertEqual(copy._coords, 'int64')
+                copy.insort(Interval("Chr", 12, 13))
+                self.assertEqual(len(copy), len(intervalList) + 1)
+                self.assertEqual(
+                    list(copy.find_overlaps(Interval("Chr", 12, 13))),
+                    list(IntervalList(list(copy)).find_overlaps(Interval("Chr", 12, 13)))
+                )
+            records = IntervalList(
+                [(Interval("Chr", 5, 10), 'b'), (Interval("Chr", 0, 10), 'a')],
+                setter=itemgetter(0), backend=backend
+            )
+            for copy in (deepcopy(records), pickle.loads(pickle.dumps(records))):
+                self.assertEqual(list(copy), list(records))
+                self.assertIsNot(copy[0], records[0])
+                self.assertEqual(
+                    list(copy.find_overlaps([(Interval("Chr", 7, 8), None)])), list(records)
+                )
+
+    def test_merge_sorted_0(self):
+        lists = [
+            IntervalList([Interval("Chr", (i * k) % 97, (i * k) % 97 + i % 5) for i in range(40)])
+            for k in (3, 7, 11, 3)
+        ]
+        concatenated = [i for intervalList in lists for i in intervalList]
+        self.assertEqual(
+            list(IntervalList.merge_sorted(*lists)), list(IntervalList(concatenated))
+        )
+        self.assertEqual(
+            list(IntervalList.iter_merge_sorted(*lists)), list(IntervalList(concatenated))
+        )
+        # identical members follow the order of their lists:
+        merged = IntervalList.merge_sorted(*lists)
+        self.assertEqual(
+            [id(i) for i in merged], [id(i) for i in IntervalList(concatenated)]
+        )
+        unique = IntervalList.merge_sorted(*lists, unique=True)
+        self.assertEqual(
+            [(i.beg, i.end) for i in unique], 
+            list(dict.fromkeys((i.beg, i.end) for i in IntervalList(concatenated)))
+        )
+        self.assertEqual(
+            list(IntervalList.iter_merge_sorted(*lists, unique=True)), list(unique)
+        )
+        blocked = IntervalList.merge_sorted(*lists, backend='blocked', coords='int64')
+        self.assertIsInstance(blocked, BlockedIntervalList)
+        self.assertEqual(list(blocked), list(merged))
+        self.assertEqual(
+            blocked.find_overlap_index_bounds(Interval("Chr", 10, 12)),
+            merged.find_overlap_index_bounds(Interval("Chr", 10, 12))
+        )
+        self.assertEqual(list(IntervalList.merge_sorted()), [])
+
+    def test_merge_sorted_1(self):
+        records = IntervalList(
+            [(Interval("Chr", 0, 10), 'a'), (Interval("Chr", 5, 10), 'b')],
+            setter=lambda r: r[0]
+        )
+        other = [(Interval("Chr", 0, 10), 'a'), (Interval("Chr", 0, 10), 'c')]
+        merged = IntervalList.merge_sorted(records, other, unique=True)
+        self.assertEqual(list(merged), [
+            (Interval("Chr", 0, 10), 'a'), (Interval("Chr", 0, 10), 'c'), 
+            (Interval("Chr", 5, 10), 'b')
+        ])
+        merged.insort((Interval("Chr", 2, 3), 'd'))
+        self.assertEqual(merged[2], (Interval("Chr", 2, 3), 'd'))
+        # exact duplicates are found among other namespaces:
+        self.assertEqual(list(IntervalList.iter_merge_sorted(
+            [Interval("Chr1", 0, 10), Interval("Chr2", 0, 10)], [Interval("Chr1", 0, 10)], 
+            unique=True
+        )), [Interval("Chr1", 0, 10), Interval("Chr2", 0, 10)])
+        unsorted = [Interval("Chr", 5, 10), Interval("Chr", 0, 10)]
+        self.assertRaises(ValueError, IntervalList.merge_sorted, records, unsorted)
+        self.assertRaises(
+            ValueError, IntervalList.merge_sorted, [BaseInterval(0.5, 10, "Chr")], coords='int64'
+        )
+
+    def test_cache_0(self):
+        for backend in ('deque', 'blocked'):
+            intervalList = IntervalList([
+                Interval("Chr", i, i + 10) for i in range(0, 100, 5)
+            ], backend=backend)
+            self.assertIsNone(intervalList.cache_info())
+            intervalList.set_cache(QueryCache(maxsize=3))
+            query = Interval("Chr", 12, 14)
+            expected = [Interval("Chr", 5, 15), Interval("Chr", 10, 20)]
+            for i in range(2):
+                self.assertEqual(list(intervalList.find_overlaps(query)), expected)
+                self.assertEqual(intervalList.count_overlaps(query), 2)
+                self.assertEqual(intervalList.find_index_nearest(query), 2)
+            info = intervalList.cache_info()
+            self.assertEqual((info['hits'], info['misses'], info['entries']), (3, 3, 3))
+            self.assertEqual(intervalList.count_overlaps(Interval("Chr", 0, 1)), 1)
+            self.assertEqual(intervalList.cache_info()['evictions'], 1)
+            intervalList.insort(Interval("Chr", 13, 14))
+            self.assertEqual(intervalList.count_overlaps(query), 3)
+            intervalList.remove(Interval("Chr", 5, 15))
+            self.assertEqual(list(intervalList.find_overlaps(query)),
+                             [Interval("Chr", 10, 20), Interval("Chr", 13, 14)])
+            info = intervalList.cache_info()
+            self.assertEqual((info['hits'], info['invalidations']), (3, 4))
+            intervalList.set_cache(None)
+            self.assertEqual(intervalList.count_overlaps(query), 2)
+
 class TestCase009_IntervalList(TestCase):
     def setUp(self):
         pass
@@ -2724,28 +3073,1387 @@ class TestCase009_IntervalList(TestCase):
 
 class TestCase010_IntervalSet(TestCase):
     def setUp(self):
-        pass
+        self.intervalSet1 = IntervalSet((
+            Interval("Chr", 100, 150),
+            Interval("Chr", 500, 800),
+            Interval("Chr", 900, 1000)
+        ))
+        self.intervalSet2 = IntervalSet((
+            Interval("Chr", 0, 10),
+            Interval("Chr", 125, 300),
+            Interval("Chr", 850, 900)
+        ))
 
     def tearDown(self):
-        pass
+        del(self.intervalSet1)
+        del(self.intervalSet2)
+
+    def test_union_0(self):
+        self.assertTrue(hasattr(self.intervalSet1, 'union'))
+
+    def test_union_1(self):
+        intervalSet = IntervalSet((
+            Interval("Chr", 0, 10),
+            Interval("Chr", 180, 300),
+            Interval("Chr", 850, 900)
+        ))
+        self.assertEqual(len(intervalSet.union(self.intervalSet1)), 6)
+
+    def test_union_2(self):
+        # test symmetry:
+        union1 = self.intervalSet1.union(self.intervalSet2)
+        union2 = self.intervalSet2.union(self.intervalSet1)
+        self.assertEqual(union1, union2)
+
+    def test_union_3(self):
+        union = self.intervalSet2.union(self.intervalSet1)
+        self.assertEqual(len(union), 5)
+        self.assertEqual(
+            [n.interval for n in union._iter_nodes()],
+            [Interval("Chr", 0, 10),
+             Interval("Chr", 100, 300),
+             Interval("Chr", 500, 800),
+             Interval("Chr", 850, 900),
+             Interval("Chr", 900, 1000)]
+        )
+
+    def test_union_4(self):
+        union = self.intervalSet2.union(self.intervalSet1, abutting=True)
+        self.assertEqual(len(union), 4)
+        self.assertEqual(
+            [n.interval for n in union._iter_nodes()][-1],
+            Interval("Chr", 850, 1000)
+        )
+
+    def test_union_5(self):
+        intervalSet = IntervalSet((
+            Interval("Chr", 120, 130),
+            Interval("Chr", 140, 520)
+        ))
+        union = self.intervalSet1.union(intervalSet, pairwise=False)
+        self.assertEqual(
+            list(union),
+            [Interval("Chr", 100, 800), Interval("Chr", 900, 1000)]
+        )
+
+    def test_iter_union_0(self):
+        union = self.intervalSet2.union(self.intervalSet1)
+        self.assertEqual(
+            sorted(map(str, self.intervalSet2.iter_union(self.intervalSet1))),
+            sorted(map(str, union))
+        )
+
+    def test_iter_union_1(self):
+        union = self.intervalSet2.iter_union(self.intervalSet1, pairwise=False)
+        self.assertEqual(
+            list(union),
+            list(self.intervalSet2.union(self.intervalSet1, pairwise=False))
+        )
+
+    def test_iter_union_2(self):
+        # members of different namespaces never overlap: iter_union()
+        # produces both, and union() cannot hold them
+        chr1 = IntervalSet([Interval("Chr1", 0, 10), Interval("Chr1", 5, 8)])
+        chr2 = IntervalSet([Interval("Chr2", 5, 20)])
+        self.assertEqual(
+            list(chr1.iter_union(chr2)),
+            [Interval("Chr1", 0, 10), Interval("Chr1", 5, 8), Interval("Chr2", 5, 20)]
+        )
+        self.assertEqual(
+            list(chr1.iter_union(chr2, pairwise=False)),
+            [Interval("Chr1", 0, 10), Interval("Chr2", 5, 20)]
+        )
+        for pairwise in (True, False):
+            with self.assertRaises(ValueError):
+                chr1.union(chr2, pairwise=pairwise)
+        self.assertEqual(list(chr1.union(IntervalSet())), list(chr1))
+
+    def test_iter_merge_0(self):
+        intervalSet = IntervalSet((
+            Interval("Chr", 100, 150),
+            Interval("Chr", 120, 130),
+            Interval("Chr", 140, 200),
+            Interval("Chr", 200, 300)
+        ))
+        self.assertEqual(
+            list(intervalSet.iter_merge()),
+            [Interval("Chr", 100, 200), Interval("Chr", 200, 300)]
+        )
+        self.assertEqual(
+            list(intervalSet.iter_merge(abutting=True)),
+            [Interval("Chr", 100, 300)]
+        )
+
+    def test_iter_merge_1(self):
+        self.assertEqual(
+            list(self.intervalSet1.iter_merge()),
+            list(self.intervalSet1.merge())
+        )
+
+    def test_iter_complement_0(self):
+        self.assertEqual(
+            list(self.intervalSet1.iter_complement(0, 1048)),
+            [Interval("Chr", 0, 100),
+             Interval("Chr", 150, 500),
+             Interval("Chr", 800, 900),
+             Interval("Chr", 1000, 1048)]
+        )
+
+    def test_iter_complement_1(self):
+        self.assertEqual(
+            list(self.intervalSet1.iter_complement()),
+            list(self.intervalSet1.complement())
+        )
+
+    def test_iter_complement_2(self):
+        with self.assertRaises(ValueError):
+            self.intervalSet1.iter_complement(lower=200)
+
+    def test_iter_intersection_0(self):
+        intersection = self.intervalSet1.iter_intersection(self.intervalSet2)
+        self.assertEqual(
+            list(intersection),
+            [(self.intervalSet1.header[0].instance,
+              self.intervalSet2.header[1].instance)]
+        )
+
+    def test_iter_intersection_1(self):
+        intersection = self.intervalSet1.intersection(self.intervalSet2)
+        self.assertEqual(
+            [n.interval for n in intersection._iter_nodes()],
+            [Interval("Chr", 125, 150)]
+        )
+
+    def test_snapshot_0(self):
+        snapshot = self.intervalSet1.snapshot()
+        self.assertEqual(snapshot, self.intervalSet1)
+        self.assertIs(snapshot.header, self.intervalSet1.header)
+
+    def test_snapshot_1(self):
+        snapshot = self.intervalSet1.snapshot()
+        members = list(snapshot)
+        self.intervalSet1.insort(Interval("Chr", 110, 120))
+        self.intervalSet1.remove(members[-1])
+        self.assertEqual(len(self.intervalSet1), 3)
+        self.assertEqual(list(snapshot), members)
+        self.assertEqual(snapshot.subheader.length, 0)
+
+    def test_snapshot_2(self):
+        snapshot = self.intervalSet1.snapshot()
+        members = list(self.intervalSet1)
+        snapshot.insort(Interval("Chr", 0, 2000))
+        self.assertEqual(len(snapshot), 4)
+        self.assertEqual(list(self.intervalSet1), members)
+        self.assertEqual(self.intervalSet1.header.length, 3)
+
+    def test_copy_0(self):
+        copy = self.intervalSet1.copy()
+        copy.pop()
+        self.assertEqual(len(copy), 2)
+        self.assertEqual(len(self.intervalSet1), 3)
+
+    def test_overlaps_interleaved_0(self):
+        # generators over the same IntervalSet must not share cursors
+        intervalSet = IntervalSet(
+            Interval("Chr", i, i + 10 * (i % 7 + 1)) for i in range(0, 500, 3)
+        )
+        queries = [Interval("Chr", i, i + 25) for i in range(0, 500, 11)]
+        answers = [list(intervalSet.overlaps(q)) for q in queries]
+        generators = [intervalSet.overlaps(q) for q in queries]
+        results = [[] for q in queries]
+        active = True
+        while active:
+            active = False
+            for generator, result in zip(generators, results):
+                for interval in generator:
+                    result.append(interval)
+                    active = True
+                    break
+        self.assertEqual(results, answers)
+
+    def test_overlaps_threaded_0(self):
+        from concurrent.futures import ThreadPoolExecutor
+        intervalSet = IntervalSet(
+            Interval("Chr", i, i + 10 * (i % 7 + 1)) for i in range(0, 5000, 3)
+        )
+        queries = [Interval("Chr", i, i + 25) for i in range(0, 5000, 7)]
+        answers = [list(intervalSet.overlaps(q)) for q in queries]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda q: list(intervalSet.overlaps(q)), queries * 4
+            ))
+        self.assertEqual(results, answers * 4)
+
+    def test_insort_remove_0(self):
+        intervals = [
+            Interval("Chr", 70, 149),
+            Interval("Chr", 80, 100),
+            Interval("Chr", 85, 90),
+            Interval("Chr", 99, 128),
+            Interval("Chr", 0, 200)
+        ]
+        intervalSet = IntervalSet()
+        for interval in intervals:
+            intervalSet.insort(interval)
+        self.assertEqual(len(intervalSet), 5)
+        self.assertEqual(intervalSet.header.length, 1)
+        self.assertEqual(
+            list(intervalSet.overlaps(Interval("Chr", 110, 111))),
+            [intervals[4], intervals[0], intervals[3]]
+        )
+        intervalSet.remove(intervals[4])
+        intervalSet.remove(intervals[1])
+        self.assertEqual(
+            list(intervalSet),
+            [intervals[0], intervals[2], intervals[3]]
+        )
+
+    def test_concurrent_snapshot_0(self):
+        intervalSet = ConcurrentIntervalSet(self.intervalSet1)
+        query = Interval("Chr", 120, 600)
+        results = intervalSet.overlaps(query)
+        intervalSet.insort(Interval("Chr", 0, 1000))
+        self.assertEqual(
+            list(results),
+            [Interval("Chr", 100, 150), Interval("Chr", 500, 800)]
+        )
+        self.assertEqual(len(list(intervalSet.overlaps(query))), 3)
+        self.assertEqual(len(intervalSet), 4)
+
+    def test_concurrent_readers_writer_0(self):
+        from threading import Thread, Event
+        intervals = [Interval("Chr", i, i + 50) for i in range(0, 5000, 10)]
+        intervalSet = ConcurrentIntervalSet(intervals)
+        queries = [Interval("Chr", i, i + 25) for i in range(0, 5000, 70)]
+        answers = [list(intervalSet.overlaps(q)) for q in queries]
+        outer = Interval("Chr", 0, 10000)
+        done = Event()
+        errors = []
+
+        def writer():
+            while not done.is_set():
+                intervalSet.insort(outer)
+                intervalSet.remove(outer)
+
+        def reader():
+            for i in range(20):
+                for query, answer in zip(queries, answers):
+                    result = [
+                        o for o in intervalSet.overlaps(query) if o is not outer
+                    ]
+                    if result != answer:
+                        errors.append((query, result))
+
+        threads = [Thread(target=reader) for i in range(4)]
+        thread = Thread(target=writer)
+        thread.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        done.set()
+        thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(list(intervalSet), intervals)
+
+    def test_concurrent_writers_0(self):
+        # An insort() racing with an update of self is applied after it,
+        # not lost: the update holds the lock until _copy_state().
+        from threading import Thread
+        intervals = [Interval("Chr", i, i + 50) for i in range(0, 1000, 40)]
+        other = ConcurrentIntervalSet([Interval("Chr", 100, 300), Interval("Chr", 600, 700)])
+        added = Interval("Chr", 2000, 2010)
+
+        def iand(intervalSet):
+            intervalSet &= other
+
+        def ior(intervalSet):
+            intervalSet |= other
+
+        updates = [
+            lambda s: s.merge_update(),
+            lambda s: s.complement_update(0, 1500),
+            lambda s: s.intersection_update(other),
+            lambda s: s.union_update(other),
+            iand, ior,
+        ]
+        for update in updates:
+            intervalSet = ConcurrentIntervalSet(intervals)
+            expected = IntervalSet(intervals)
+            update(expected)
+            expected.insort(added)
+
+            def racing_copy_state(state):
+                # start the writer between reading self and publishing
+                thread = Thread(target=intervalSet.insort, args=(added,))
+                thread.start()
+                thread.join(0.05)
+                ConcurrentIntervalSet._copy_state(intervalSet, state)
+                threads.append(thread)
+
+            threads = []
+            intervalSet._copy_state = racing_copy_state
+            update(intervalSet)
+            for thread in threads:
+                thread.join()
+            self.assertEqual(list(intervalSet), list(expected))
+
+    def test_aoverlaps_0(self):
+        import asyncio
+        intervalSet = IntervalSet(
+            Interval("Chr", i, i + 10 * (i % 7 + 1)) for i in range(0, 1000, 3)
+        )
+        queries = [Interval("Chr", i, i + 25) for i in range(0, 1000, 7)]
+        answers = [o for q in queries for o in intervalSet.overlaps(q)]
+
+        async def source():
+            for query in queries:
+                await asyncio.sleep(0)
+                yield query
+
+        async def main(**kwargs):
+            return [o async for o in intervalSet.aoverlaps(source(), **kwargs)]
+
+        self.assertEqual(asyncio.run(main()), answers)
+        self.assertEqual(asyncio.run(main(batch=5, chunk=3)), answers)
+
+    def test_aoverlaps_1(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        queries = [Interval("Chr", 120, 130), Interval("Chr", 0, 1000)]
+
+        async def main(executor):
+            return [
+                o async for o in self.intervalSet1.aoverlaps(
+                    queries, batch=1, executor=executor
+                )
+            ]
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(
+                asyncio.run(main(executor)),
+                [Interval("Chr", 100, 150)] + list(self.intervalSet1)
+            )
+
+    def test_aoverlaps_2(self):
+        import asyncio
+
+        async def source():
+            yield Interval("Chr", 120, 130)
+            raise KeyError("source")
+
+        async def main():
+            return [o async for o in self.intervalSet1.aoverlaps(source())]
+
+        with self.assertRaises(KeyError):
+            asyncio.run(main())
+
+    def test_overlaps_nested_queries_0(self):
+        intervalSet = IntervalSet([Interval("Chr", 0, 100), Interval("Chr", 50, 60)])
+        queries = [Interval("Chr", 10, 20), Interval("Chr", 55, 56)]
+        self.assertEqual(
+            list(intervalSet.overlaps(queries)),
+            [Interval("Chr", 0, 100), Interval("Chr", 50, 60)]
+        )
+        self.assertEqual(
+            list(intervalSet.overlap_pairs(queries)),
+            [
+                (queries[0], Interval("Chr", 0, 100)),
+                (queries[1], Interval("Chr", 0, 100)),
+                (queries[1], Interval("Chr", 50, 60))
+            ]
+        )
+
+    def test_overlaps_closed_0(self):
+        intervalSet = IntervalSet([
+            ClosedInterval("Chr", 33, 133), ClosedInterval("Chr", 150, 200)
+        ])
+        self.assertEqual(
+            list(intervalSet.overlaps(ClosedInterval("Chr", 133, 150))),
+            [ClosedInterval("Chr", 33, 133), ClosedInterval("Chr", 150, 200)]
+        )
+
+    def test_backend_tree_0(self):
+        key = lambda i: (i.beg, i.end)
+        intervals = [
+            Interval("Chr", i, i + 10 * (i % 13 + 1)) for i in range(0, 3000, 3)
+        ] + [Interval("Chr", i, i + 1000) for i in range(0, 3000, 50)]
+        queries = [Interval("Chr", i, i + 25) for i in range(-50, 3100, 7)]
+        ncls = IntervalSet(intervals)
+        tree = IntervalSet(intervals, backend='tree')
+        for query in queries:
+            self.assertEqual(
+                sorted(tree.overlaps(query), key=key),
+                sorted(ncls.overlaps(query), key=key)
+            )
+        self.assertEqual(
+            sorted(tree.overlaps(queries), key=key),
+            sorted(ncls.overlaps(queries), key=key)
+        )
+        self.assertEqual(list(tree), list(ncls))
+        self.assertEqual(list(tree.overlaps(Interval("Chr2", 0, 100))), [])
+
+    def test_backend_tree_1(self):
+        intervalSet = IntervalSet(self.intervalSet1, backend='tree')
+        query = Interval("Chr", 120, 600)
+        self.assertEqual(
+            list(intervalSet.overlaps(query)),
+            [Interval("Chr", 100, 150), Interval("Chr", 500, 800)]
+        )
+        snapshot = intervalSet.snapshot()
+        intervalSet.insort(Interval("Chr", 140, 510))
+        self.assertEqual(len(list(intervalSet.overlaps(query))), 3)
+        self.assertEqual(len(list(snapshot.overlaps(query))), 2)
+        intervalSet.remove(list(self.intervalSet1)[0])
+        self.assertEqual(
+            list(intervalSet.overlaps(query)),
+            [Interval("Chr", 140, 510), Interval("Chr", 500, 800)]
+        )
+        self.assertEqual(
+            list(intervalSet.merge().overlaps(query)),
+            [Interval("Chr", 140, 800)]
+        )
+        self.assertEqual(list(IntervalSet(backend='tree').overlaps(query)), [])
+        with self.assertRaises(ValueError):
+            IntervalSet(backend='unknown')
+
+    def test_backend_ailist_0(self):
+        key = lambda i: (i.beg, i.end)
+        intervals = [
+            Interval("Chr", i, i + 100 + 7 * (i % 11)) for i in range(0, 6000, 5)
+        ] + [Interval("Chr", i, i + 3000 + i % 997) for i in range(0, 6000, 97)]
+        queries = [Interval("Chr", i, i + 25) for i in range(-50, 9200, 13)]
+        ncls = IntervalSet(intervals)
+        ailist = IntervalSet(intervals, backend='ailist')
+        for query in queries:
+            hits = list(ailist.overlaps(query))
+            self.assertEqual(sorted(hits, key=key), sorted(ncls.overlaps(query), key=key))
+            self.assertEqual(hits, sorted(hits, key=lambda i: (i.beg, -i.end)))
+        self.assertGreater(len(ailist._get_index()._components), 1)
+        self.assertEqual(
+            sorted(ailist.overlaps(queries), key=key),
+            sorted(ncls.overlaps(queries), key=key)
+        )
+        ailist.insort(Interval("Chr", 20000, 20100))
+        self.assertEqual(len(list(ailist.overlaps(Interval("Chr", 20050, 20060)))), 1)
+
+
+    def test_window_counts_0(self):
+        intervals = [
+            Interval("Chr", 0, 50), Interval("Chr", 40, 250), Interval("Chr", 45, 47)
+        ]
+        for collection in (IntervalSet(intervals), IntervalList(intervals)):
+            self.assertEqual(
+                list(collection.make_windows(100, 50)),
+                [
+                    Interval("Chr", 0, 100), Interval("Chr", 50, 150),
+                    Interval("Chr", 100, 200), Interval("Chr", 150, 250),
+                    Interval("Chr", 200, 250)
+                ]
+            )
+            begs, counts, covered = collection.window_counts(100, 50)
+            self.assertEqual(begs.tolist(), [0, 50, 100, 150, 200])
+            self.assertEqual(counts.tolist(), [3, 1, 1, 1, 1])
+            self.assertEqual(covered.tolist(), [100, 100, 100, 100, 50])
+            begs, counts, covered = collection.window_counts(40, 60, lower=-20, upper=300)
+            self.assertEqual(begs.tolist(), [-20, 40, 100, 160, 220, 280])
+            self.assertEqual(counts.tolist(), [1, 3, 1, 1, 1, 0])
+            self.assertEqual(covered.tolist(), [20, 40, 40, 40, 30, 0])
+        with self.assertRaises(ValueError):
+            self.intervalSet1.window_counts(0)
+        begs, counts, covered = IntervalSet().window_counts(10)
+        self.assertEqual((begs.tolist(), counts.tolist(), covered.tolist()), ([], [], []))
+
+    def test_shift_scale_slop_0(self):
+        for cls, kwargs in ((IntervalList, {}), (IntervalSet, {}), 
+                            (IntervalSet, {'backend': 'tree'}),
+                            (ConcurrentIntervalSet, {})):
+            collection = cls([
+                Interval("Chr", 100, 200), Interval("Chr", 120, 150),
+                Interval("Chr", 300, 400)
+            ], **kwargs)
+            overlaps = getattr(collection, 'overlaps', None) or collection.find_overlaps
+            overlaps(Interval("Chr", 0, 1))  # builds any index
+            collection.shift(-50)
+            self.assertEqual(
+                list(overlaps(Interval("Chr", 75, 80))), 
+                [Interval("Chr", 50, 150), Interval("Chr", 70, 100)]
+            )
+            collection.scale(2)
+            self.assertEqual(
+                list(overlaps(Interval("Chr", 500, 501))), 
+                [Interval("Chr", 500, 700)]
+            )
+            # [100, 300), [140, 200), [500, 700)
+            collection.slop(150, 10, lower=0, upper=650)
+            self.assertEqual(
+                sorted(collection, key=lambda i: (i.beg, i.end)), 
+                [Interval("Chr", 0, 210), Interval("Chr", 0, 310), Interval("Chr", 350, 650)]
+            )
+            self.assertEqual(
+                sorted(overlaps(Interval("Chr", 205, 206)), key=lambda i: (i.beg, i.end)), 
+                [Interval("Chr", 0, 210), Interval("Chr", 0, 310)]
+            )
+            collection.slop(-100)
+            self.assertEqual(
+                sorted(overlaps(Interval("Chr", 100, 500)), key=lambda i: (i.beg, i.end)), 
+                [Interval("Chr", 100, 110), Interval("Chr", 100, 210), Interval("Chr", 450, 550)]
+            )
+            with self.assertRaises(ValueError):
+                collection.scale(0)
+
+    def test_shift_scale_slop_1(self):
+        # transforms change the members in place, except the intervals
+        # shared with a snapshot, which keeps their coordinates
+        coords = lambda intervals: sorted((i.beg, i.end) for i in intervals)
+        for cls, kwargs in ((IntervalList, {}), (IntervalList, {'backend': 'blocked'}),
+                            (IntervalSet, {}), (ConcurrentIntervalSet, {})):
+            intervals = [Interval("c", 0, 10), Interval("c", 20, 30), Interval("c", 2, 5)]
+            collection = cls(intervals, **kwargs)
+            overlaps = getattr(collection, 'overlaps', None) or collection.find_overlaps
+            # (but the reads of a ConcurrentIntervalSet take snapshots)
+            members = list(collection) if cls is not ConcurrentIntervalSet else None
+            collection.shift(100)
+            self.assertEqual(coords(intervals), [(100, 110), (102, 105), (120, 130)])
+            self.assertEqual(list(overlaps(Interval("c", 5, 6))), [])
+            if members is not None:
+                self.assertTrue(all(a is b for a, b in zip(collection, members)))
+            if cls is IntervalList:
+                continue
+            snapshot = collection.snapshot()
+            hits = overlaps(Interval("c", 100, 130))
+            first = next(hits)
+            collection.slop(5, lower=103)
+            self.assertEqual(coords(collection), [(103, 110), (103, 115), (115, 135)])
+            self.assertEqual(coords(intervals), [(100, 110), (102, 105), (120, 130)])
+            self.assertEqual(coords([first] + list(hits)), coords(intervals))
+            self.assertEqual(coords(snapshot), coords(intervals))
+            self.assertEqual(
+                list(snapshot.overlaps(Interval("c", 101, 102))), [Interval("c", 100, 110)]
+            )
+            if cls is IntervalSet:
+                # the copies are not shared, and are changed in place
+                members = list(collection)
+                collection.scale(2)
+                self.assertTrue(all(a is b for a, b in zip(collection, members)))
+                self.assertEqual(coords(snapshot), coords(intervals))
+
+    def test_shift_scale_slop_2(self):
+        # a setter's records are changed only through the interval it
+        # returned; integer coordinate mode errors restore coordinates
+        for cls, kwargs in ((IntervalList, {}), (IntervalList, {'backend': 'blocked'}),
+                            (IntervalSet, {}), (ConcurrentIntervalSet, {})):
+            records = [(Interval("c", 0, 10), 'a'), (Interval("c", 20, 30), 'b')]
+            collection = cls(records, setter=itemgetter(0), **kwargs)
+            collection.shift(5)
+            self.assertEqual(sorted(collection), records)
+            self.assertEqual(records[0][0], Interval("c", 5, 15))
+            self.assertIs(sorted(collection)[0], records[0])
+            rows = [("c", 0, 10), ("c", 20, 30)]
+            collection = cls(rows, setter=lambda r: Interval(*r), **kwargs)
+            overlaps = getattr(collection, 'overlaps', None) or collection.find_overlaps
+            collection.shift(5)
+            self.assertEqual(sorted(collection), [("c", 0, 10), ("c", 20, 30)])
+            self.assertEqual(list(overlaps([("c", 12, 13)])), [("c", 0, 10)])
+            intervals = [Interval("c", 10, 20), Interval("c", 40, 50)]
+            collection = cls(intervals, coords='int64', **kwargs)
+            overlaps = getattr(collection, 'overlaps', None) or collection.find_overlaps
+            self.assertRaises(ValueError, collection.shift, -15)
+            self.assertEqual(intervals, [Interval("c", 10, 20), Interval("c", 40, 50)])
+            self.assertEqual(list(overlaps(Interval("c", 45, 46))), [Interval("c", 40, 50)])
+
+    def test_flank_0(self):
+        intervals = [Interval("Chr", 10, 20), Interval("Chr", 15, 40)]
+        for collection in (IntervalList(intervals), IntervalSet(intervals, backend='ailist')):
+            flanks = collection.flank(15, 5, lower=0, upper=42)
+            self.assertIs(flanks.__class__, collection.__class__)
+            self.assertEqual(
+                sorted(flanks, key=lambda i: (i.beg, i.end)), 
+                [
+                    Interval("Chr", 0, 10), Interval("Chr", 0, 15),
+                    Interval("Chr", 20, 25), Interval("Chr", 40, 42)
+                ]
+            )
+            self.assertEqual(list(collection), intervals)
+    def test_cluster_0(self):
+        intervals = [
+            Interval("Chr", 1, 50), Interval("Chr", 10, 20), Interval("Chr", 20, 30),
+            Interval("Chr", 50, 80), Interval("Chr", 85, 95), Interval("Chr", 200, 210)
+        ]
+        for intervalSet in (IntervalSet(intervals), ConcurrentIntervalSet(intervals)):
+            labels = intervalSet.cluster()
+            self.assertEqual(len(labels), len(intervalSet))
+            members = list(intervalSet)
+            merged = list(intervalSet.iter_merge())
+            for label, member in zip(labels, members):
+                self.assertTrue(merged[label].issuperinterval(member))
+            self.assertEqual(
+                sorted(zip(members, labels), key=lambda p: (p[0].beg, p[0].end)),
+                [
+                    (Interval("Chr", 1, 50), 0), (Interval("Chr", 10, 20), 0),
+                    (Interval("Chr", 20, 30), 0), (Interval("Chr", 50, 80), 1),
+                    (Interval("Chr", 85, 95), 2), (Interval("Chr", 200, 210), 3)
+                ]
+            )
+            labels, hulls, counts = intervalSet.cluster(abutting=True, hulls=True, counts=True)
+            self.assertEqual(
+                hulls, 
+                [Interval("Chr", 1, 80), Interval("Chr", 85, 95), Interval("Chr", 200, 210)]
+            )
+            self.assertEqual(counts.tolist(), [4, 1, 1])
+            labels, counts = intervalSet.cluster(distance=5, counts=True)
+            self.assertEqual(counts.tolist(), [4, 1, 1])
+            labels, counts = intervalSet.cluster(distance=5, abutting=True, counts=True)
+            self.assertEqual(counts.tolist(), [5, 1])
+        self.assertEqual(IntervalSet().cluster(hulls=True), (_array('q'), []))
+
+    def test_cluster_1(self):
+        # hulls are of the type of the members, not Interval
+        intervals = [
+            ClosedInterval("Chr", 1, 10), ClosedInterval("Chr", 5, 20),
+            ClosedInterval("Chr", 21, 30), ClosedInterval("Chr", 40, 45)
+        ]
+        for intervalSet in (IntervalSet(intervals), ConcurrentIntervalSet(intervals)):
+            labels, hulls = intervalSet.cluster(hulls=True)
+            self.assertEqual(
+                hulls,
+                [ClosedInterval("Chr", 1, 20), ClosedInterval("Chr", 21, 30),
+                 ClosedInterval("Chr", 40, 45)]
+            )
+            self.assertEqual([type(hull) for hull in hulls], [ClosedInterval] * 3)
+            self.assertIsNot(hulls[0], intervals[0])
+            self.assertEqual(intervals[0].end, 10)
+
+    def test_coords_0(self):
+        intervals = [
+            Interval("Chr", 9, 30), Interval("Chr", 22, 23), Interval("Chr", 40, 60),
+            Interval("Chr", 45, 50), Interval("Chr", 70, 71), Interval("Chr", 80, 120)
+        ]
+        queries = [
+            Interval("Chr", 23, 45), ClosedInterval("Chr", 30, 40), Interval("Chr", 22.5, 22.7),
+            Interval("Chr", 60, 70), Interval("Chr", 50, 50), Interval("Chr2", 1, 100)
+        ]
+        for backend in ('ncls', 'tree', 'ailist'):
+            generic = IntervalSet(intervals, backend=backend)
+            for coords in ('int64', 'int32'):
+                for intervalSet in (
+                    IntervalSet(intervals, backend=backend, coords=coords),
+                    ConcurrentIntervalSet(intervals, backend=backend, coords=coords)
+                ):
+                    for query in queries:
+                        self.assertEqual(
+                            sorted(intervalSet.overlaps(query), key=lambda i: (i.beg, i.end)),
+                            sorted(generic.overlaps(query), key=lambda i: (i.beg, i.end))
+                        )
+                    for pos in (9, 10, 23, 30, 41, 71, 120, 121):
+                        self.assertEqual(
+                            sorted(intervalSet.stab(pos), key=lambda i: (i.beg, i.end)),
+                            sorted(generic.stab(pos), key=lambda i: (i.beg, i.end))
+                        )
+                    self.assertEqual(intervalSet.union(generic)._coords, coords)
+
+    def test_coords_1(self):
+        self.assertRaises(ValueError, IntervalSet, [Interval("Chr", -1, 5)], coords='int64')
+        self.assertRaises(ValueError, IntervalSet, [BaseInterval(1.5, 5, "Chr")], coords='int64')
+        self.assertRaises(ValueError, IntervalSet, [Interval("Chr", 1, 2 ** 40)], coords='int32')
+        self.assertRaises(ValueError, IntervalSet, [Interval("Chr", 1, 5)], coords='uint8')
+        IntervalSet([Interval("Chr", 1, 2 ** 40)], coords='int64')
+        intervalSet = IntervalSet([Interval("Chr", 1, 5)], coords='int32')
+        self.assertRaises(ValueError, intervalSet.insort, BaseInterval(0.5, 5, "Chr"))
+        self.assertEqual(list(intervalSet), [Interval("Chr", 1, 5)])
+
+    def test_coords_2(self):
+        a, b = Interval("Chr", 9, 30), Interval("Chr", 22, 23)
+        for backend in ('ncls', 'tree', 'ailist'):
+            for coords in (None, 'int64'):
+                intervalSet = IntervalSet([a, b, a], backend=backend, coords=coords)
+                self.assertEqual(list(intervalSet.overlaps(Interval("Chr", 24, 29))), [a])
+
+    def test_coords_3(self):
+        # after an update, the NCLS is searched in place until enough
+        # queries follow to pay for rebuilding the flat index
+        intervals = [Interval("Chr", i, i + 5 + i % 20) for i in range(0, 2000, 3)]
+        queries = [
+            Interval("Chr", 23, 45), ClosedInterval("Chr", 30, 40),
+            Interval("Chr", 22.5, 22.7), Interval("Chr", 60, 60)
+        ]
+        key = lambda i: (i.beg, i.end)
+        for coords in ('int64', 'int32'):
+            intervalSet = IntervalSet(intervals, coords=coords)
+            generic = IntervalSet(intervals)
+            list(intervalSet.overlaps(queries[0]))
+            self.assertIsInstance(intervalSet._index, NCListIndex)
+            for i in range(5):
+                for collection in (intervalSet, generic):
+                    collection.insort(Interval("Chr", 40 + i, 41 + i))
+                for query in queries:
+                    self.assertEqual(
+                        sorted(intervalSet.overlaps(query), key=key),
+                        sorted(generic.overlaps(query), key=key)
+                    )
+                self.assertEqual(sorted(intervalSet.stab(41), key=key),
+                                 sorted(generic.stab(41), key=key))
+                self.assertIsNone(intervalSet._index)
+            intervalSet.count_overlaps([
+                Interval("Chr", i, i + 1)
+                for i in range(len(intervalSet) // intervalSet._reindex)
+            ])
+            self.assertIsInstance(intervalSet._index, NCListIndex)
+            self.assertEqual(
+                sorted(intervalSet.overlaps(queries[1]), key=key),
+                sorted(generic.overlaps(queries[1]), key=key)
+            )
+            self.assertEqual(intervalSet._index._sublo.typecode, 'i')
+
+    def test_memory_usage_0(self):
+        intervals = [
+            Interval("Chr", 0, 100), Interval("Chr", 10, 20), Interval("Chr", 30, 40),
+            Interval("Chr", 200, 300)
+        ]
+        for intervalSet in (IntervalSet(intervals), ConcurrentIntervalSet(intervals)):
+            usage = intervalSet.memory_usage()
+            self.assertEqual(usage['total'], sum(v for k, v in usage.items() if k != 'total'))
+            self.assertGreater(usage['sublists'], 0)
+            self.assertEqual(usage['payload'], 0)
+            self.assertEqual(intervalSet.memory_usage(deep=False)['intervals'], 0)
+            free_slots = usage['free_slots']
+            intervalSet.remove(intervals[0])
+            self.assertGreater(intervalSet.memory_usage()['free_slots'], free_slots)
+        intervalSet = IntervalSet(intervals, backend='tree')
+        self.assertEqual(intervalSet.memory_usage()['index'], 0)
+        list(intervalSet.overlaps(Interval("Chr", 15, 16)))
+        self.assertGreater(intervalSet.memory_usage()['index'], 0)
+
+    def test_cache_0(self):
+        intervals = [Interval("Chr", i, i + 10) for i in range(0, 100, 5)]
+        for intervalSet in (IntervalSet(intervals), ConcurrentIntervalSet(intervals)):
+            cache = QueryCache(maxbytes=10000)
+            intervalSet.set_cache(cache)
+            queries = [Interval("Chr", 12, 14), Interval("Chr", 12, 13)]
+            expected = [Interval("Chr", 5, 15), Interval("Chr", 10, 20)]
+            for i in range(3):
+                self.assertEqual(sorted(intervalSet.overlaps(queries)), expected)
+                self.assertEqual(intervalSet.count_overlaps(queries[0]), 2)
+            # nested queries are normalized away:
+            self.assertEqual(sorted(intervalSet.overlaps(queries[0])), expected)
+            info = intervalSet.cache_info()
+            self.assertEqual((info['hits'], info['misses'], info['entries']), (5, 2, 2))
+            self.assertLessEqual(info['bytes'], 10000)
+            intervalSet.insort(Interval("Chr", 13, 14))
+            self.assertEqual(intervalSet.count_overlaps(queries[0]), 3)
+            intervalSet.merge_update()
+            self.assertEqual(list(intervalSet.overlaps(queries)), [Interval("Chr", 0, 105)])
+            self.assertEqual(cache.info()['invalidations'], 3)
+            cache.clear()
+            self.assertEqual(cache.info()['misses'], 0)
+        intervalSet = IntervalSet(intervals)
+        intervalSet.set_cache(QueryCache(maxbytes=1))
+        self.assertEqual(intervalSet.count_overlaps(queries[0]), 2)
+        self.assertEqual(intervalSet.cache_info()['entries'], 0)
+
+    def test_stab_0(self):
+        from intervals import Point, ClosedPoint
+        intervalSet = IntervalSet([
+            Interval("Chr", 0, 100), Interval("Chr", 50, 60),
+            Interval("Chr", 55, 58), ClosedInterval("Chr", 90, 120)
+        ])
+        self.assertEqual(
+            list(intervalSet.stab(57)),
+            [Interval("Chr", 0, 100), Interval("Chr", 50, 60), Interval("Chr", 55, 58)]
+        )
+        self.assertEqual(list(intervalSet.stab(58)), list(intervalSet.stab(57)))
+        self.assertEqual(list(intervalSet.stab(59)), list(intervalSet.stab(51)))
+        self.assertEqual(
+            list(intervalSet.stab(Point("Chr", 100))),
+            [Interval("Chr", 0, 100), ClosedInterval("Chr", 90, 120)]
+        )
+        self.assertEqual(
+            list(intervalSet.stab(ClosedPoint("Chr", 120))),
+            [ClosedInterval("Chr", 90, 120)]
+        )
+        self.assertEqual(list(intervalSet.stab(Point("Chr2", 57))), [])
+        self.assertEqual(list(IntervalSet().stab(57)), [])
+
+    def test_stab_many_0(self):
+        from intervals import Point
+        intervals = [
+            Interval("Chr", i, i + 10 * (i % 7 + 1)) for i in range(0, 1000, 3)
+        ]
+        positions = [i * 37 % 1100 for i in range(500)]
+        for backend in ('ncls', 'tree'):
+            intervalSet = IntervalSet(intervals, backend=backend)
+            offsets, hits = intervalSet.stab_many(positions)
+            self.assertEqual(len(offsets), len(positions) + 1)
+            self.assertEqual(offsets[-1], len(hits))
+            for i, pos in enumerate(positions):
+                self.assertEqual(
+                    hits[offsets[i]:offsets[i + 1]],
+                    sorted(
+                        intervalSet.overlaps(Point("Chr", pos)),
+                        key=lambda i: (i.beg, -i.end)
+                    )
+                )
+        offsets, hits = IntervalSet().stab_many([1, 2])
+        self.assertEqual((offsets.tolist(), hits), ([0, 0, 0], []))
+
+
+class TestCase011_IntervalBinIndex(TestCase):
+    def setUp(self):
+        self.intervals = [
+            Interval("Chr1", 10, 100),
+            Interval("Chr1", 200, 500),
+            Interval("Chr1", 16000, 17000),
+            Interval("Chr1", 0, 3000000),
+            Interval("Chr1", 600000000, 600000100),
+            Interval("Chr2", 0, 150),
+        ]
+        self.index = IntervalBinIndex(self.intervals)
+
+    def test_overlaps_0(self):
+        self.assertEqual(len(self.index), 6)
+        self.assertEqual(
+            list(self.index.overlaps(Interval("Chr1", 75, 220))),
+            [self.intervals[3], self.intervals[0], self.intervals[1]]
+        )
+        self.assertEqual(
+            list(self.index.overlaps(Interval("Chr1", 16384, 16385))),
+            [self.intervals[3], self.intervals[2]]
+        )
+        self.assertEqual(
+            list(self.index.overlaps(Interval("Chr1", 600000050, 600000051))),
+            [self.intervals[4]]
+        )
+        self.assertEqual(list(self.index.overlaps(Interval("Chr3", 0, 100))), [])
+
+    def test_overlaps_1(self):
+        queries = [Interval("Chr1", 50, 60), Interval("Chr1", 90, 300)]
+        self.assertEqual(
+            list(self.index.overlaps(queries)),
+            [self.intervals[3], self.intervals[0], self.intervals[1]]
+        )
+        self.assertEqual(
+            list(self.index.overlap_pairs(queries)),
+            [
+                (queries[0], self.intervals[3]),
+                (queries[0], self.intervals[0]),
+                (queries[1], self.intervals[3]),
+                (queries[1], self.intervals[0]),
+                (queries[1], self.intervals[1])
+            ]
+        )
+
+    def test_overlaps_2(self):
+        index = IntervalBinIndex(
+            [(10, 100), (200, 500)], setter=lambda t: Interval("Chr1", *t)
+        )
+        self.assertEqual(
+            list(index.overlaps([(50, 250)], setter=lambda t: Interval("Chr1", *t))),
+            [(10, 100), (200, 500)]
+        )
+
+    def test_remove_0(self):
+        self.index.add(self.intervals[0])
+        self.assertEqual(len(self.index), 6)
+        self.index.remove(self.intervals[0])
+        self.index.discard(Interval("Chr1", 200, 500))
+        with self.assertRaises(KeyError):
+            self.index.remove(self.intervals[0])
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(
+            list(self.index.overlaps(Interval("Chr1", 75, 220))),
+            [self.intervals[3], self.intervals[1]]
+        )
+        self.assertEqual(list(self.index), [
+            self.intervals[3], self.intervals[1], self.intervals[2],
+            self.intervals[4], self.intervals[5]
+        ])
+
+
+class TestCase012_IntervalMask(TestCase):
+    def setUp(self):
+        self.mask1 = IntervalMask(IntervalSet([
+            Interval("Chr", 100, 150),
+            Interval("Chr", 120, 300),
+            Interval("Chr", 65530, 65600),
+        ]).merge())
+        self.mask2 = IntervalMask([
+            Interval("Chr", 0, 10),
+            Interval("Chr", 125, 200),
+            ClosedInterval("Chr", 65536, 65539),
+        ])
+
+    def test_mask_0(self):
+        self.assertEqual(
+            list(self.mask1),
+            [Interval("Chr", 100, 300), Interval("Chr", 65530, 65600)]
+        )
+        self.assertEqual(len(self.mask1), 270)
+        self.assertEqual(len(self.mask2), 89)
+        self.assertEqual((self.mask1.beg, self.mask1.end), (100, 65600))
+        self.assertIn(299, self.mask1)
+        self.assertNotIn(300, self.mask1)
+        self.assertIn(65539, self.mask2)
+        self.assertNotIn(65540, self.mask2)
+
+    def test_mask_1(self):
+        self.assertEqual(
+            list(self.mask1 & self.mask2),
+            [Interval("Chr", 125, 200), Interval("Chr", 65536, 65540)]
+        )
+        self.assertEqual(
+            list(self.mask1 | self.mask2),
+            [
+                Interval("Chr", 0, 10),
+                Interval("Chr", 100, 300),
+                Interval("Chr", 65530, 65600)
+            ]
+        )
+        self.assertEqual(
+            list(self.mask1 ^ self.mask2),
+            [
+                Interval("Chr", 0, 10),
+                Interval("Chr", 100, 125),
+                Interval("Chr", 200, 300),
+                Interval("Chr", 65530, 65536),
+                Interval("Chr", 65540, 65600)
+            ]
+        )
+        self.assertEqual(
+            list(self.mask1 - self.mask2),
+            [
+                Interval("Chr", 100, 125),
+                Interval("Chr", 200, 300),
+                Interval("Chr", 65530, 65536),
+                Interval("Chr", 65540, 65600)
+            ]
+        )
+
+    def test_mask_2(self):
+        self.assertEqual(
+            list(~self.mask1),
+            [Interval("Chr", 300, 65530)]
+        )
+        self.assertEqual(
+            list(self.mask1.complement(lower=0, upper=70000)),
+            [
+                Interval("Chr", 0, 100),
+                Interval("Chr", 300, 65530),
+                Interval("Chr", 65600, 70000)
+            ]
+        )
+        with self.assertRaises(ValueError):
+            self.mask1.complement(lower=200)
+        with self.assertRaises(ValueError):
+            self.mask1 | IntervalMask([Interval("Chr2", 0, 10)])
+
+    def test_mask_3(self):
+        # over 2048 runs in a chunk are stored as a bitmap
+        mask = IntervalMask(Interval("Chr", i, i + 1) for i in range(0, 10000, 2))
+        self.assertIsInstance(mask._chunks[0], int)
+        self.assertEqual(len(mask), 5000)
+        self.assertIn(9998, mask)
+        self.assertNotIn(9999, mask)
+        full = IntervalMask([Interval("Chr", 0, 10000)])
+        self.assertEqual(mask | full, full)
+        self.assertEqual(len(full - mask), 5000)
+        self.assertEqual((full - mask) ^ mask, full)
+        self.assertEqual(list(mask & full)[:2], [
+            Interval("Chr", 0, 1), Interval("Chr", 2, 3)
+        ])
+
+    def test_to_interval_set_0(self):
+        intervalSet = (self.mask1 & self.mask2).to_interval_set()
+        self.assertIsInstance(intervalSet, IntervalSet)
+        self.assertEqual(
+            list(intervalSet.overlaps(Interval("Chr", 0, 70000))),
+            [Interval("Chr", 125, 200), Interval("Chr", 65536, 65540)]
+        )
+
+
+class TestCase013_IntervalArray(TestCase):
+    def setUp(self):
+        self.intervals = [
+            Interval("Chr", 10, 50),
+            Interval("Chr", 40, 80),
+            Interval("Chr", 90, 95),
+            Interval("Chr2", 40, 80),
+            Interval(),
+        ]
+        self.others = [
+            Interval("Chr", 45, 60),
+            Interval("Chr", 0, 100),
+            Interval("Chr", 95, 99),
+            Interval("Chr", 40, 80),
+            Interval("Chr", 0, 1),
+        ]
+        self.array = IntervalArray(self.intervals)
+
+    def _assertIntervalsEqual(self, intervals, expected):
+        self.assertEqual(len(intervals), len(expected))
+        for i, e in zip(intervals, expected):
+            if e.isnull():
+                self.assertTrue(i.isnull())
+            else:
+                self.assertEqual(i, e)
+                self.assertIs(i.__class__, e.__class__)
+
+    def test_conversion_0(self):
+        self._assertIntervalsEqual(list(self.array), self.intervals)
+        self._assertIntervalsEqual(self.array[1:3], self.intervals[1:3])
+        self.assertEqual(self.array[0], Interval("Chr", 10, 50))
+        self.assertIsInstance(self.array[0].beg, int)
+        intervalSet = IntervalSet(self.intervals[:3])
+        self.assertEqual(list(IntervalArray(intervalSet)), list(intervalSet))
+        self.assertEqual(
+            list(IntervalArray(intervalSet).to_interval_set(backend='tree')),
+            list(intervalSet)
+        )
+        self.assertEqual(
+            list(IntervalArray.from_arrays(["Chr", "Chr"], [0, 10], [5, 20])),
+            [Interval("Chr", 0, 5), Interval("Chr", 10, 20)]
+        )
+
+    def test_elementwise_0(self):
+        array = self.array
+        others = IntervalArray(self.others)
+        for name in (
+            'isoverlapping', 'issuperinterval', 'issubinterval', 'isabutting',
+            'overlap_length', 'overlap_fraction', 'inner_distance',
+            'outer_distance'
+        ):
+            self.assertEqual(
+                getattr(array, name)(others).tolist(),
+                [getattr(i, name)(o) for i, o in zip(self.intervals, self.others)]
+            )
+        self._assertIntervalsEqual(
+            array & others,
+            [i & o for i, o in zip(self.intervals, self.others)]
+        )
+        self._assertIntervalsEqual(
+            array.hull(others),
+            [i.hull(o) for i, o in zip(self.intervals, self.others)]
+        )
+        for name in ('union', 'difference', 'symmetric_difference'):
+            first, second = getattr(array, name)(others)
+            for j, (i, o) in enumerate(zip(self.intervals, self.others)):
+                expected = getattr(i, name)(o)
+                if not isinstance(expected, tuple):
+                    expected = (expected, Interval())
+                self._assertIntervalsEqual([first[j], second[j]], list(expected))
+
+    def test_broadcast_0(self):
+        query = Interval("Chr", 45, 92)
+        self.assertEqual(
+            self.array.overlap_length(query).tolist(),
+            [i.overlap_length(query) for i in self.intervals]
+        )
+        self.assertEqual(
+            self.array.overlap_length(IntervalArray([query])).tolist(),
+            self.array.overlap_length(query).tolist()
+        )
+        self.assertEqual(
+            IntervalArray([query]).isoverlapping(self.array).tolist(),
+            [1, 1, 1, 0, 0]
+        )
+        left, right = self.array.product(IntervalArray(self.others[:2]))
+        self.assertEqual(len(left), 10)
+        self.assertEqual(
+            left.isoverlapping(right).tolist(),
+            [i.isoverlapping(o) for i in self.intervals for o in self.others[:2]]
+        )
+        with self.assertRaises(ValueError):
+            self.array.isoverlapping(IntervalArray(self.others[:2]))
+        with self.assertRaises(TypeError):
+            self.array.isoverlapping(None)
+        self.assertEqual(
+            list(self.array.compress(self.array.isoverlapping(query))),
+            self.intervals[:3]
+        )
+
+    def test_broadcast_1(self):
+        # queries of other namespaces never change the array's table
+        namespaces = list(self.array.namespaces)
+        query = Interval("Chr9", 45, 92)
+        self.assertEqual(self.array.isoverlapping(query).tolist(), [0] * 5)
+        self.assertEqual(self.array.outer_distance(query).tolist(), [inf] * 5)
+        self.assertTrue(all((self.array & query).isnull()))
+        self.assertIn(query, list(self.array.union(query)[1]))
+        self.array.hull()
+        self.array.difference(query)
+        self.array.symmetric_difference(IntervalArray([query] * 5))
+        self.assertEqual(self.array.namespaces, namespaces)
+        self.assertEqual(list(self.array)[:4], self.intervals[:4])
+
+    def test_arithmetic_0(self):
+        array = self.array[:3]
+        intervals = self.intervals[:3]
+        self._assertIntervalsEqual(array + 5, [i + 5 for i in intervals])
+        self._assertIntervalsEqual(array * 3, [i * 3 for i in intervals])
+        self._assertIntervalsEqual(array / 4, [i / 4 for i in intervals])
+        self._assertIntervalsEqual(array // 4, [i // 4 for i in intervals])
+        self._assertIntervalsEqual(100 - array, [100 - i for i in intervals])
+        self._assertIntervalsEqual(-array, [-i for i in intervals])
+        self._assertIntervalsEqual(array << 1, [i << 1 for i in intervals])
+        self._assertIntervalsEqual(
+            array + Interval("Chr", 1, 2), [i + Interval("Chr", 1, 2) for i in intervals]
+        )
+        self._assertIntervalsEqual(array + Interval(), intervals)
+        with self.assertRaises(ValueError):
+            array + Interval("Chr2", 1, 2)
+        with self.assertRaises(ZeroDivisionError):
+            array // Interval()
+        with self.assertRaises(TypeError):
+            array + "Chr"
+
+    def test_closed_0(self):
+        intervals = [ClosedInterval("Chr", 10, 20), ClosedInterval("Chr", 20, 20)]
+        array = IntervalArray(intervals, cls=ClosedInterval)
+        query = ClosedInterval("Chr", 20, 30)
+        self.assertEqual(array.isoverlapping(query).tolist(), [1, 1])
+        self.assertEqual(array.isempty().tolist(), [0, 0])
+        self.assertEqual(
+            IntervalArray(intervals).isoverlapping(query).tolist(), [0, 0]
+        )
+        self._assertIntervalsEqual(array & query, [i & query for i in intervals])
+
+class TestCase014_ExternalSort(TestCase):
+    def setUp(self):
+        self.intervals = [
+            Interval(("Chr1", "Chr2", "Chr10")[i % 3], (i * 37) % 101, (i * 37) % 101 + i % 4)
+            for i in range(1000)
+        ] + [Interval(None, 5, 6)]
+        self.expected = sorted(
+            self.intervals, 
+            key=lambda i: (i.namespace is None, i.namespace, i.isempty(), i.beg, i.end)
+        )
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmpdir)
+
+    def _assertIntervalsEqual(self, intervals, expected):
+        self.assertEqual(
+            [(i.__class__, i.namespace, i.beg, i.end) for i in intervals],
+            [(i.__class__, i.namespace, i.beg, i.end) for i in expected]
+        )
+
+    def test_external_sort_0(self):
+        self._assertIntervalsEqual(external_sort(self.intervals), self.expected)
+        self.assertEqual(list(external_sort([])), [])
+        for memory, workers in ((1, 1), (200 * 50, 1), (200 * 50, 2)):
+            self._assertIntervalsEqual(external_sort(
+                iter(self.intervals), memory=memory, workers=workers, tmpdir=self.tmpdir
+            ), self.expected)
+            self.assertEqual(os.listdir(self.tmpdir), [])
+        sorter = external_sort(self.intervals, memory=200 * 50, tmpdir=self.tmpdir)
+        next(sorter)
+        self.assertEqual(len(os.listdir(self.tmpdir)), 1)
+        sorter.close()
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_external_sort_1(self):
+        intervals = [ClosedInterval("Chr", 5, 4), ClosedInterval("Chr", 5, 5), 
+                     ClosedInterval("Chr", 0, 10)]
+        self._assertIntervalsEqual(
+            external_sort(intervals, cls=ClosedInterval, memory=1), 
+            [ClosedInterval("Chr", 0, 10), ClosedInterval("Chr", 5, 5), ClosedInterval("Chr", 5, 4)]
+        )
+        intervals = [BaseInterval(0.5, 2.5, "Chr"), BaseInterval(0.25, 2, "Chr")]
+        self.assertEqual(
+            [(i.beg, i.end) for i in external_sort(intervals, cls=BaseInterval, memory=1)],
+            [(0.25, 2), (0.5, 2.5)]
+        )
+        chr1 = [i for i in external_sort(self.intervals, memory=200 * 50) if i.namespace == "Chr1"]
+        self.assertEqual(list(IntervalList.merge_sorted(chr1)), list(IntervalList(chr1)))
+
+    def test_external_sort_2(self):
+        # the class and emptiness of the inputs are kept
+        intervals = [ClosedInterval("Chr", 5, 5), ClosedInterval("Chr", 6, 5), 
+                     ClosedInterval("Chr", 0, 10)]
+        self._assertIntervalsEqual(
+            external_sort(intervals, memory=1),
+            [ClosedInterval("Chr", 0, 10), ClosedInterval("Chr", 5, 5), ClosedInterval("Chr", 6, 5)]
+        )
+        self._assertIntervalsEqual(
+            external_sort([Point("Chr", 3), Point("Chr", 1)]), [Point("Chr", 1), Point("Chr", 3)]
+        )
+        self.assertEqual(
+            [i.beg for i in external_sort([Interval("Chr", 2**53, 2**53 + 2)])], [2**53]
+        )
+
+        # inputs the runs cannot hold exactly are rejected
+        class Tagged(Interval):
+            pass
+
+        for intervals in ([Tagged("Chr", 0, 1)], [Interval("Chr", 0, 1), ClosedInterval("Chr", 0, 1)],
+                          [("Chr", 0, 1)]):
+            with self.assertRaises(TypeError):
+                list(external_sort(intervals, tmpdir=self.tmpdir))
+        with self.assertRaises(TypeError):
+            list(external_sort([Tagged("Chr", 0, 1)], cls=Tagged))
+        for beg, end in ((2**53 + 1, 2**53 + 2), (-2**53 - 1, 0), (0, 10**400)):
+            with self.assertRaises(ValueError):
+                list(external_sort([Interval("Chr", beg, end)], memory=1, tmpdir=self.tmpdir))
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+
+class TestCase015_DiskIntervalSet(TestCase):
+    def setUp(self):
+        self.intervals = [
+            Interval("Chr1", (i * 37) % 1009, (i * 37) % 1009 + (i * 13) % 50)
+            for i in range(2000)
+        ]
+        self.queries = [Interval("Chr1", i, i + i % 7) for i in range(0, 1100, 9)]
+        self.tmpdir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmpdir)
+
+    def _assertFindsLike(self, ncls, other):
+        self.assertEqual(len(ncls), len(other))
+        self.assertEqual(sorted(ncls), sorted(other))
+        for query in self.queries:
+            self.assertEqual(sorted(ncls.overlaps(query)), sorted(other.overlaps(query)))
+            self.assertEqual(sorted(ncls.stab(query.beg)), sorted(other.stab(query.beg)))
+
+    def test_disk_0(self):
+        stream = sorted(self.intervals, key=lambda i: (i.beg, -i.end))
+        expected = IntervalSet(self.intervals)
+        for coords in (None, 'int64', 'int32'):
+            path = os.path.join(self.tmpdir, str(coords))
+            ncls = DiskIntervalSet.from_sorted(iter(stream), path, coords=coords)
+            self._assertFindsLike(ncls, expected)
+            self.assertEqual(
+                [(i.beg, i.end) for i in ncls],
+                [(i.beg, i.end) for i in stream if not i.isempty()]
+            )
+            self.assertEqual(list(ncls.iter_merge()), list(expected.iter_merge()))
+            self.assertEqual(ncls.cluster().tolist(), expected.cluster().tolist())
+            self.assertEqual((ncls.namespace, ncls.beg, ncls.end),
+                             (expected.namespace, expected.beg, expected.end))
+            with DiskIntervalSet(path) as reopened:
+                self.assertEqual(reopened, ncls)
+            ncls.close()
+
+    def test_disk_1(self):
+        # a small buffer spills the levels of the stream of external_sort()
+        size = intervals.disk._LEVEL_BUFFER
+        intervals.disk._LEVEL_BUFFER = 64
+        try:
+            ncls = DiskIntervalSet.from_sorted(
+                external_sort(self.intervals, memory=200 * 100), self.tmpdir
+            )
+        finally:
+            intervals.disk._LEVEL_BUFFER = size
+        self._assertFindsLike(ncls, IntervalSet(self.intervals))
+        self.assertEqual(sorted(os.listdir(self.tmpdir)),
+                         ['begs', 'ends', 'header', 'ranks', 'subhi', 'sublo'])
+        query = IntervalSet([Interval("Chr1", 100, 200)])
+        result = ncls.intersection(query)
+        self.assertEqual(type(result), IntervalSet)
+        self.assertEqual(len(result), len(IntervalSet(self.intervals).intersection(query)))
+        self.assertRaises(NotImplementedError, ncls.insort, Interval("Chr1", 0, 1))
+        self.assertRaises(NotImplementedError, ncls.pop)
+        self.assertRaises(NotImplementedError, ncls.intersection_update, query)
+        ncls.close()
+
+    def test_disk_2(self):
+        path = os.path.join(self.tmpdir, 'empty')
+        ncls = DiskIntervalSet.from_sorted([Interval("Chr1", 5, 5)], path)
+        self.assertEqual(len(ncls), 0)
+        self.assertEqual(list(ncls.overlaps(Interval("Chr1", 0, 10))), [])
+        self.assertFalse(ncls)
+        ncls = DiskIntervalSet.from_sorted(
+            [BaseInterval(0.5, 2.5, "Chr"), BaseInterval(1, 1.5, "Chr")], path,
+            interval_cls=BaseInterval
+        )
+        self.assertEqual([(i.beg, i.end) for i in ncls.overlaps(BaseInterval(2, 3, "Chr"))],
+                         [(0.5, 2.5)])
+        self.assertRaises(ValueError, DiskIntervalSet.from_sorted,
+                          [Interval("Chr1", 5, 6), Interval("Chr1", 1, 2)], path)
+        self.assertRaises(ValueError, DiskIntervalSet.from_sorted,
+                          [Interval("Chr1", 5, 6), Interval("Chr2", 5, 6)], path)
+        self.assertRaises(ValueError, DiskIntervalSet.from_sorted,
+                          [BaseInterval(0.5, 2.5, "Chr")], path, coords='int64')
+        self.assertFalse(os.path.exists(os.path.join(path, 'levels')))
+
+    def test_disk_3(self):
+        # the header is JSON, naming the interval class of the members
+        path = os.path.join(self.tmpdir, 'closed')
+        ncls = DiskIntervalSet.from_sorted(
+            [ClosedInterval("Chr", 1, 2), ClosedInterval("Chr", 3, 4)], path,
+            interval_cls=ClosedInterval
+        )
+        ncls.close()
+        with open(os.path.join(path, 'header')) as file:
+            header = json.load(file)
+        self.assertEqual(header['cls'], 'intervals.intervals:ClosedInterval')
+        with DiskIntervalSet(path) as reopened:
+            self.assertEqual([type(i) for i in reopened], [ClosedInterval] * 2)
+            self.assertEqual(list(reopened.stab(2)), [ClosedInterval("Chr", 1, 2)])
+        # only the package's interval classes are made back
+        header['cls'] = 'os:system'
+        with open(os.path.join(path, 'header'), 'w') as file:
+            json.dump(header, file)
+        self.assertRaises(ValueError, DiskIntervalSet, path)
+        class MyInterval(Interval):
+            __slots__ = ()
+        self.assertRaises(ValueError, DiskIntervalSet.from_sorted,
+                          [Interval("Chr1", 1, 2)], path, interval_cls=MyInterval)
+        self.assertRaises(ValueError, DiskIntervalSet.from_sorted,
+                          [Interval(("Chr", 1), 1, 2)], path)
+
+
+class TestCase016_Planner(TestCase):
+    def setUp(self):
+        self.a = [
+            Interval("Chr1", (i * 37) % 1009, (i * 37) % 1009 + (i * 13) % 50)
+            for i in range(500)
+        ]
+        self.b = [Interval("Chr1", i, i + i % 7) for i in range(0, 1100, 9)]
+
+    def _pairs(self, pairs):
+        return sorted((id(x), id(y)) for x, y in pairs)
+
+    def test_planner_0(self):
+        expected = self._pairs(
+            (x, y) for x in self.a for y in self.b if x.isoverlapping(y)
+        )
+        operands = lambda intervals: (
+            intervals, IntervalList(intervals), BlockedIntervalList(intervals),
+            IntervalBinIndex(intervals),
+        )
+        for a in operands(self.a):
+            for b in operands(self.b):
+                for strategy in ('auto', 'search', 'sweep'):
+                    self.assertEqual(self._pairs(intersect(a, b, strategy)), expected)
+        # IntervalSets skip the empty intervals:
+        members = [i for i in self.a if not i.isempty()]
+        expected = self._pairs(
+            (x, y) for x in members for y in self.b if x.isoverlapping(y)
+        )
+        for strategy in ('auto', 'search', 'sweep'):
+            self.assertEqual(self._pairs(intersect(IntervalSet(self.a), self.b, strategy)), expected)
+            self.assertEqual(
+                self._pairs((x, y) for y, x in intersect(self.b, IntervalSet(self.a), strategy)),
+                expected
+            )
+
+    def test_planner_1(self):
+        a = IntervalList(self.a)
+        plan = explain(a, self.b[:2])
+        self.assertTrue(plan.startswith("intersect(a, b): search a\n"))
+        self.assertIn("* search a", plan)
+        self.assertIn("a: IntervalList of 500 members, sorted", plan)
+        # many queries are swept:
+        b = list(reversed(self.b * 20))
+        plan = explain(a, b)
+        self.assertTrue(plan.startswith("intersect(a, b): sweep\n"))
+        self.assertIn("b: iterable of %d members, unsorted" % len(b), plan)
+        self.assertIn("(sorts b)", plan)
+        self.assertTrue(explain(a, b, 'search').startswith("intersect(a, b): search"))
+        self.assertIn("% nested", explain(IntervalSet(self.a), b))
+        self.assertEqual(list(intersect([], self.b)), [])
+        self.assertRaises(ValueError, intersect, a, self.b, 'scan')
+        self.assertRaises(TypeError, intersect, a, [(0, 1)])
 
-# TODO: need to perform union() boundary checks
-# def test_union_1(self):
-#     n = IntervalSet((Interval("Chr",100,150), Interval("Chr",500,800), Interval("Chr",900,1000)))
-#     m = IntervalSet((Interval("Chr",0,10), Interval("Chr",180,300), Interval("Chr",850,900)))
-#     u = m.union(n)
-#     self.assertEqual(len(u), 6)
-
-# def test_union_2(self):
-#     # test symmetry:
-#     n = IntervalSet((Interval("Chr",100,150), Interval("Chr",500,800), Interval("Chr",900,1000)))
-#     m = IntervalSet((Interval("Chr",0,125), Interval("Chr",125,300), Interval("Chr",850,900)))
-#     u = n.union(m)
-#     v = m.union(n)
-#     self.assertEqual(u, v)
-
-# def test_untion_2(self):
-#     n = IntervalSet((Interval("Chr",100,150), Interval("Chr",500,800), Interval("Chr",900,1000)))
-#     m = IntervalSet((Interval("Chr",0,10), Interval("Chr",125,300), Interval("Chr",850,900)))
-#     self.assertEqual(len(m.union(n)), 5)
-    